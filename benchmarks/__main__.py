@@ -0,0 +1,67 @@
+"""Runs the benchmarks headless and prints the time per call.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --threshold 0.2
+
+With a baseline, every benchmark is compared against it, and the
+exit code is 1 if any of them got slower than the threshold allows.
+"""
+import argparse
+import sys
+
+from benchmarks import cases # noqa: F401, registers the benchmarks
+from benchmarks.runner import compare, get_benchmark_names, load_baseline, run_benchmark, save_results
+
+
+def _format_time(seconds: float) -> str:
+    """Formats a duration with a sensible unit.
+    """
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f}{unit}'
+    return f'{seconds / 1e-9:.0f}ns'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks the engine and scene hot paths.')
+    parser.add_argument('-k', '--filter', default='*', help='only run benchmarks matching this glob pattern')
+    parser.add_argument('--repeats', type=int, default=5, help='how many times to time each benchmark')
+    parser.add_argument('--min-time', type=float, default=0.1, help='the shortest each timing should take, in seconds')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='how much slower counts as a regression, e.g. 0.1 for 10%%')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    names = get_benchmark_names(args.filter)
+    if not names:
+        parser.error(f'No benchmarks match {args.filter}')
+
+    header = f'{"benchmark":<36}{"median":>10}{"best":>10}'
+    if baseline:
+        header += f'{"baseline":>10}{"ratio":>9}'
+    print(header)
+
+    results = []
+    regressions = 0
+    for name in names:
+        result = run_benchmark(name, args.repeats, args.min_time)
+        results.append(result)
+
+        line = f'{name:<36}{_format_time(result.median):>10}{_format_time(result.best):>10}'
+        for comparison in compare([result], baseline, args.threshold):
+            status = 'REGRESSED' if comparison.regressed else 'ok'
+            line += f'{_format_time(comparison.baseline):>10}{comparison.ratio:>8.2f}x  {status}'
+            regressions += comparison.regressed
+        print(line, flush=True)
+
+    if args.output:
+        save_results(args.output, results)
+    if regressions:
+        print(f'{regressions} benchmark(s) regressed by more than {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
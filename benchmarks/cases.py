@@ -0,0 +1,210 @@
+"""This module contains the benchmarks of the engine and scene
+hot paths. Everything draws to offscreen surfaces, so they run
+headless.
+
+Importing this module registers the benchmarks with the runner.
+"""
+import math
+import random
+from typing import List, Tuple
+
+import Box2D
+import pygame
+
+from benchmarks.runner import benchmark
+from crane import globals
+from crane.engine.display import Display
+from crane.engine.scene.scene import PhysicsScene
+from crane.engine.scene.scene_object import PhysicsObject
+from crane.game.resources import disable_saving, get_background, prefetch_background
+from crane.game.scene.crane_scene.container_object import ContainerObject
+from crane.game.scene.crane_scene.crane_scene import CraneScene
+from crane.game.scene.crane_scene.prize_object import PrizeObject
+from crane.game.scene.crane_scene.prize_pool import PrizePool
+from crane.game.scene.progress_scene.progress_scene import ProgressScene
+from crane.helpers import draw_text
+
+
+_DT = 1 / 60
+_PRIZE_SPACING = 3.5 # meters, more than the biggest prize
+
+# Initializes the video system without opening a window
+_DISPLAY = Display('benchmarks', headless=True)
+disable_saving()
+
+
+class _Box(PhysicsObject):
+
+    def __init__(self, world: Box2D.b2World, position: tuple):
+        """A plain box, drawn as a solid color.
+        """
+        super(_Box, self).__init__(world)
+        self.body = world.CreateDynamicBody(position=position, angularVelocity=1)
+        self.body.CreatePolygonFixture(box=(1, 1), density=1)
+
+    def render(self, surface: pygame.surface.Surface):
+        self.render_body(surface, self.body, (255, 0, 0))
+
+
+def _get_surface() -> pygame.surface.Surface:
+    """Gets an offscreen surface the size of the screen.
+    """
+    return pygame.Surface(globals.SCREEN_SIZE_P, 0, 32)
+
+
+def _get_spinning_prizes(num_prizes: int) -> Tuple[PhysicsScene, List[PrizeObject]]:
+    """Makes a scene with prizes spinning in place on a grid, without
+    gravity. The bodies never touch or fall asleep, so every update
+    and render costs the same.
+
+    Returns:
+        A tuple (scene, prizes).
+    """
+    scene = PhysicsScene(gravity=0)
+    pool = PrizePool(scene.world, rng=random.Random(0))
+
+    # Bigger grids go off screen, which still costs something to draw
+    columns = math.ceil(math.sqrt(num_prizes))
+    spacing = _PRIZE_SPACING
+    prizes = [pool.acquire() for _ in range(num_prizes)]
+    for i, prize in enumerate(prizes):
+        prize.place((spacing * (i % columns + 0.5), spacing * (i // columns + 0.5)))
+        prize.body.angularVelocity = 1 + i % 3
+        scene.add(prize)
+
+    scene.update(_DT)
+    return scene, prizes
+
+
+@benchmark('render_body/polygon')
+def _render_polygon_body():
+    scene = PhysicsScene(gravity=0)
+    box = _Box(scene.world, globals.SCREEN_CENTER_M)
+    scene.add(box)
+    scene.update(_DT)
+    surface = _get_surface()
+    return lambda: box.render(surface)
+
+
+@benchmark('render_body/textured')
+def _render_textured_body():
+    _, (prize,) = _get_spinning_prizes(1)
+    surface = _get_surface()
+    return lambda: prize.render(surface)
+
+
+@benchmark('render_body/textured_spinning')
+def _render_spinning_textured_body():
+    scene, (prize,) = _get_spinning_prizes(1)
+    surface = _get_surface()
+
+    def run():
+        # Turn a little every call, so it isn't just the last-sprite shortcut
+        scene.update(_DT)
+        prize.render(surface)
+    return run
+
+
+@benchmark('draw_text/plain')
+def _draw_text_plain():
+    surface = _get_surface()
+    return lambda: draw_text(surface, 'Total Pokemon: 1234', 'Comic Sans MS', 20, (255, 255, 255), (10, 40))
+
+
+@benchmark('draw_text/atlas')
+def _draw_text_atlas():
+    surface = _get_surface()
+    counter = iter(range(10 ** 9))
+    return lambda: draw_text(surface, f'Spent: ${next(counter) / 4:.2f}', 'Comic Sans MS', 20, (255, 255, 255), (300, 0), use_atlas=True)
+
+
+def _register_scene_benchmarks(num_prizes: int):
+    """Registers the update/render benchmarks for a number of prizes.
+    A frame is an update and a render, which is what the game does,
+    and it's the only one where the sprites actually turn.
+    """
+    @benchmark(f'scene_update/{num_prizes}_prizes')
+    def _update():
+        scene, _ = _get_spinning_prizes(num_prizes)
+        return lambda: scene.update(_DT)
+
+    @benchmark(f'scene_render/{num_prizes}_prizes')
+    def _render():
+        scene, _ = _get_spinning_prizes(num_prizes)
+        surface = _get_surface()
+        return lambda: scene.render(surface)
+
+    @benchmark(f'scene_frame/{num_prizes}_prizes')
+    def _frame():
+        scene, _ = _get_spinning_prizes(num_prizes)
+        surface = _get_surface()
+
+        def run():
+            scene.update(_DT)
+            scene.render(surface)
+        return run
+
+
+for _num_prizes in (10, 100, 1000):
+    _register_scene_benchmarks(_num_prizes)
+
+
+def _register_display_benchmarks(dirty_rects: bool):
+    """Registers a benchmark of whole display frames of a crane
+    machine where everything settled, with and without dirty rects.
+    """
+    name = 'dirty_rects' if dirty_rects else 'full'
+
+    @benchmark(f'display_frame/{name}')
+    def _frame():
+        display = Display('benchmarks', headless=True, dirty_rects=dirty_rects)
+        scene = CraneScene(rng=random.Random(0))
+        for _ in range(600):
+            scene.update(_DT)
+
+        def run():
+            if dirty_rects:
+                display.mark(scene.get_marks(display.surface))
+            with display as surface:
+                if display.last_dirty_rects != []:
+                    scene.render(surface)
+        return run
+
+
+for _dirty_rects in (False, True):
+    _register_display_benchmarks(_dirty_rects)
+
+
+@benchmark('world_step/container_rope')
+def _step_container_rope():
+    world = Box2D.b2World(gravity=(0, -9.81), doSleep=True)
+    container = ContainerObject(world)
+    support = container.support
+    counter = iter(range(10 ** 9))
+
+    def run():
+        # Swing the claw back and forth, so the rope never falls asleep
+        direction = 1 if next(counter) // 60 % 2 else -1
+        support.linearVelocity = (3 * direction, 0)
+        world.Step(_DT, 10, 10)
+    return run
+
+
+@benchmark('progress_scene/render')
+def _render_progress_scene():
+    scene = ProgressScene()
+    surface = _get_surface()
+    return lambda: scene.render(surface)
+
+
+@benchmark('get_background/lookup')
+def _get_background():
+    prefetch_background(globals.SCREEN_SIZE_P)
+    return lambda: get_background(globals.SCREEN_SIZE_P)
+
+
+@benchmark('get_background/blit')
+def _blit_background():
+    prefetch_background(globals.SCREEN_SIZE_P)
+    surface = _get_surface()
+    return lambda: surface.blit(get_background(globals.SCREEN_SIZE_P), (0, 0))
@@ -0,0 +1,208 @@
+"""This module contains the benchmark registry, the timing loop
+and the comparison against a baseline.
+
+A benchmark is a setup function, registered with `@benchmark()`,
+that builds whatever it needs and returns the function to time.
+Every benchmark is timed like `timeit` does it: the function is
+called in a loop enough times to take a while, a few times over,
+and the time per call of each repeat is kept.
+"""
+import fnmatch
+import gc
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple
+
+import Box2D
+import pygame
+
+
+_VERSION = 1
+
+# Setup functions by benchmark name, in the order they were registered
+_BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+
+
+class BenchmarkResult(NamedTuple):
+    """The timings of a benchmark.
+
+    name: the benchmark name.
+    number: how many calls each repeat was.
+    times: the time per call of each repeat, in seconds.
+    """
+    name: str
+    number: int
+    times: List[float]
+
+    @property
+    def median(self) -> float:
+        """The median time per call, in seconds. Compared against baselines.
+        """
+        return statistics.median(self.times)
+
+    @property
+    def best(self) -> float:
+        """The fastest time per call, in seconds.
+        """
+        return min(self.times)
+
+
+class Comparison(NamedTuple):
+    """A benchmark compared against its baseline.
+
+    name: the benchmark name.
+    baseline: the baseline median time per call, in seconds.
+    current: the current median time per call, in seconds.
+    regressed: whether it got slower than the threshold allows.
+    """
+    name: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def ratio(self) -> float:
+        """How many times slower it got, less than 1 means faster.
+        """
+        return self.current / self.baseline if self.baseline else float('inf')
+
+
+def benchmark(name: str):
+    """Decorator that registers a benchmark setup function. It's
+    called once, and returns the function to time.
+
+    Args:
+        name (str): the benchmark name, like 'draw_text/plain'.
+    """
+    def register(setup: Callable[[], Callable[[], None]]):
+        if name in _BENCHMARKS:
+            raise ValueError(f'Benchmark already registered: {name}')
+        _BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def get_benchmark_names(pattern: str='*') -> List[str]:
+    """Gets the names of the registered benchmarks.
+
+    Args:
+        pattern (str): a glob pattern the names have to match.
+
+    Returns:
+        The names, in the order they were registered.
+    """
+    return [name for name in _BENCHMARKS if fnmatch.fnmatchcase(name, pattern)]
+
+
+def run_benchmark(name: str, repeats: int=5, min_time: float=0.1) -> BenchmarkResult:
+    """Sets up and times a benchmark.
+
+    Args:
+        name (str): the benchmark name.
+        repeats (int): how many times to time the loop.
+        min_time (float): the shortest a loop should take, in seconds.
+            The number of calls per loop is picked to match.
+
+    Returns:
+        The timings.
+    """
+    function = _BENCHMARKS[name]()
+
+    # Warm up caches, and find out how many calls it takes
+    number = 1
+    while True:
+        elapsed = _time_loop(function, number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    times = [_time_loop(function, number) / number for _ in range(repeats)]
+    return BenchmarkResult(name, number, times)
+
+
+def _time_loop(function: Callable[[], None], number: int) -> float:
+    """Times calling a function a number of times, with the garbage
+    collector off so it doesn't add noise.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        return time.perf_counter() - start_time
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def save_results(path: Path, results: List[BenchmarkResult]):
+    """Saves benchmark results as JSON, along with what they ran on.
+
+    Args:
+        path (Path): the file to write.
+        results (List[BenchmarkResult]): the results.
+    """
+    data = {
+        'version': _VERSION,
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'box2d': Box2D.__version__,
+        },
+        'results': {
+            result.name: {
+                'median': result.median,
+                'best': result.best,
+                'number': result.number,
+                'times': result.times,
+            }
+            for result in results
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_baseline(path: Path) -> Dict[str, float]:
+    """Loads the median time per call of every benchmark in
+    a results file.
+
+    Args:
+        path (Path): the file written by `save_results()`.
+
+    Returns:
+        The median times in seconds by benchmark name.
+
+    Raises:
+        ValueError: if the file isn't a results file this version can read.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if data.get('version', None) != _VERSION:
+        raise ValueError(f'Unsupported results version: {data.get("version", None)}')
+    return {name: result['median'] for name, result in data['results'].items()}
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, float], threshold: float) -> List[Comparison]:
+    """Compares results against a baseline. Benchmarks missing
+    from the baseline are left out.
+
+    Args:
+        results (List[BenchmarkResult]): the results.
+        baseline (Dict[str, float]): the baseline median times by name.
+        threshold (float): how much slower a benchmark can get before
+            it counts as a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        The comparisons.
+    """
+    return [
+        Comparison(result.name, baseline[result.name], result.median, result.median > baseline[result.name] * (1 + threshold))
+        for result in results
+        if result.name in baseline
+    ]
@@ -0,0 +1,141 @@
+"""This module contains the `Camera` class, used to turn
+world coordinates (meters, y up) into screen coordinates
+(pixels, y down) for whole batches of bodies at once.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from crane.engine.snapshot import BodyShape, BodyState
+from crane.globals import PIXELS_PER_METER
+
+
+class PolygonBatch:
+
+    def __init__(self, shapes: Sequence[BodyShape]):
+        """The local vertices of every fixture of a bunch of bodies,
+        packed into a single array so they can be transformed in one go.
+
+        Shapes never change, so a batch can be built once and reused
+        every frame.
+
+        Args:
+            shapes (Sequence[BodyShape]): the fixture polygons of each body.
+        """
+        vertices = []
+        body_index = []
+        self._polygon_slices: List[Tuple[int, int, int]] = []
+
+        for i, shape in enumerate(shapes):
+            for polygon in shape:
+                start = len(vertices)
+                vertices.extend(polygon)
+                body_index.extend([i] * len(polygon))
+                self._polygon_slices.append((i, start, len(vertices)))
+
+        self._vertices = np.array(vertices, dtype=np.float64).reshape(-1, 2)
+        self._body_index = np.array(body_index, dtype=np.intp)
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """The local vertices of all polygons as an (N, 2) array.
+        """
+        return self._vertices
+
+    @property
+    def body_index(self) -> np.ndarray:
+        """The index of the body each vertex belongs to, as an (N,) array.
+        """
+        return self._body_index
+
+    @property
+    def polygon_slices(self) -> List[Tuple[int, int, int]]:
+        """Where each polygon is in the vertex array, as tuples (body index, start, end).
+        """
+        return self._polygon_slices
+
+
+class Camera:
+
+    def __init__(self, pixels_per_meter: float=PIXELS_PER_METER, offset: Tuple[float, float]=(0, 0)):
+        """Maps world coordinates onto the screen.
+
+        Args:
+            pixels_per_meter (float): how many pixels one meter takes up.
+            offset (Tuple[float, float]): the world position, in meters, that
+                ends up at the bottom left corner of the screen.
+        """
+        self._pixels_per_meter = pixels_per_meter
+        self._offset = offset
+
+    @property
+    def pixels_per_meter(self) -> float:
+        """Get/set how many pixels one meter takes up.
+        """
+        return self._pixels_per_meter
+
+    @pixels_per_meter.setter
+    def pixels_per_meter(self, pixels_per_meter: float):
+        self._pixels_per_meter = pixels_per_meter
+
+    @property
+    def offset(self) -> Tuple[float, float]:
+        """Get/set the world position that ends up at the bottom left corner of the screen.
+        """
+        return self._offset
+
+    @offset.setter
+    def offset(self, offset: Tuple[float, float]):
+        self._offset = offset
+
+    def to_screen(self, x: float, y: float, screen_height: int) -> Tuple[float, float]:
+        """Maps a single world point onto the screen.
+
+        Args:
+            x (float): the x coordinate in meters.
+            y (float): the y coordinate in meters.
+            screen_height (int): the height of the screen in pixels.
+
+        Returns:
+            The screen coordinates as a tuple (x, y) of pixels.
+        """
+        return (
+            (x - self._offset[0]) * self._pixels_per_meter,
+            screen_height - (y - self._offset[1]) * self._pixels_per_meter,
+        )
+
+    def project(self, batch: PolygonBatch, transforms: Sequence[BodyState], screen_height: int) -> np.ndarray:
+        """Transforms all the vertices of a batch onto the screen at once.
+
+        Args:
+            batch (PolygonBatch): the polygons to transform.
+            transforms (Sequence[BodyState]): the transform of each body in the batch.
+            screen_height (int): the height of the screen in pixels.
+
+        Returns:
+            The screen coordinates of every vertex as an (N, 2) array.
+        """
+        transforms = np.array(transforms, dtype=np.float64).reshape(-1, 3)[batch.body_index]
+        c, s = np.cos(transforms[:, 2]), np.sin(transforms[:, 2])
+        local = batch.vertices
+
+        points = np.empty_like(local)
+        points[:, 0] = transforms[:, 0] + c * local[:, 0] - s * local[:, 1] - self._offset[0]
+        points[:, 1] = transforms[:, 1] + s * local[:, 0] + c * local[:, 1] - self._offset[1]
+        points *= self._pixels_per_meter
+
+        # Flip vertically, since pygame coordinates are flipped
+        points[:, 1] = screen_height - points[:, 1]
+        return points
+
+
+_CAMERA = Camera()
+
+
+def get_camera() -> Camera:
+    """Gets the camera shared by all physics objects.
+
+    Returns:
+        The shared camera.
+    """
+    return _CAMERA
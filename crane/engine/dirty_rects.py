@@ -0,0 +1,118 @@
+"""This module contains the `DirtyRectTracker` class, which works
+out which parts of the screen changed from one frame to the next.
+
+Renderable scene objects describe what they're about to draw as
+marks: tuples (rect, token), where the rect is the area of the
+screen they draw to and the token is anything hashable that
+changes whenever what they draw there changes, like a sprite and
+its position. A mark that's in one frame but not the other is an
+area that has to be redrawn, everything else is left as it was.
+"""
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+
+# A screen area as a tuple (x, y, w, h) in pixels
+Rect = Tuple[int, int, int, int]
+
+# A screen area and something that changes when what's drawn there does
+Mark = Tuple[Rect, Hashable]
+
+
+def get_full_mark(surface: pygame.surface.Surface, token: Hashable) -> Mark:
+    """Gets a mark covering the whole surface, for things like
+    backgrounds. Every time the token changes, the whole frame
+    is redrawn.
+
+    Args:
+        surface (Surface): the surface that will be drawn to.
+        token (Hashable): what's being drawn.
+
+    Returns:
+        The mark.
+    """
+    return ((0, 0) + surface.get_size(), token)
+
+
+def get_bounding_rect(points: np.ndarray, padding: int=0) -> Optional[Rect]:
+    """Gets the smallest rect containing a bunch of points.
+
+    Args:
+        points (ndarray): the points in pixels, as an array (n, 2).
+        padding (int): how many pixels to grow the rect by on every side,
+            e.g. for anti-aliasing.
+
+    Returns:
+        The rect, or `None` if there are no points.
+    """
+    if not len(points):
+        return None
+    (left, top), (right, bottom) = np.floor(points.min(axis=0)), np.floor(points.max(axis=0))
+    left, top = int(left) - padding, int(top) - padding
+    right, bottom = int(right) + 1 + padding, int(bottom) + 1 + padding
+    return (left, top, right - left, bottom - top)
+
+
+class DirtyRectTracker:
+
+    def __init__(self, max_coverage: float=0.5):
+        """Compares the marks of every frame against the ones of the
+        frame before, to find the rects that need to be redrawn.
+
+        Args:
+            max_coverage (float): the fraction of the screen that can
+                be dirty before it's cheaper to just redraw everything.
+        """
+        self._max_coverage = max_coverage
+        self._marks: Optional[frozenset] = None
+        self._size: Tuple[int, int] = None
+
+    @property
+    def max_coverage(self) -> float:
+        """Get/set the fraction of the screen that can be dirty
+        before everything is redrawn.
+        """
+        return self._max_coverage
+
+    @max_coverage.setter
+    def max_coverage(self, max_coverage: float):
+        self._max_coverage = max_coverage
+
+    def reset(self):
+        """Forgets the last frame, so the next one is redrawn in full.
+        Call whenever the screen was drawn to without marks.
+        """
+        self._marks = None
+
+    def track(self, size: Tuple[int, int], marks: Optional[Iterable[Mark]]) -> Optional[List[pygame.Rect]]:
+        """Finds the rects that changed since the last frame.
+
+        Args:
+            size (Tuple[int, int]): the size of the screen as a tuple (w, h).
+            marks (Iterable[Mark]): the marks of the new frame, or `None`
+                if something can't tell what it's going to draw.
+
+        Returns:
+            The dirty rects, clipped to the screen, or `None` if the
+            whole frame should be redrawn: the first frame, after the
+            screen was resized, or when too much of it changed.
+        """
+        marks = None if marks is None else frozenset(marks)
+        previous, self._marks = self._marks, marks
+        if marks is None or previous is None or size != self._size:
+            self._size = size
+            return None
+
+        screen = pygame.Rect((0, 0), size)
+        rects = [screen.clip(rect) for rect, _ in previous ^ marks]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        if not rects:
+            return []
+
+        # Everything inside the union gets redrawn, so that's the cost
+        union = rects[0].unionall(rects[1:])
+        if union.width * union.height > self._max_coverage * size[0] * size[1]:
+            return None
+        return rects
@@ -1,17 +1,34 @@
 """This module contains the Display class,
 used to create and manage a pygame window.
+
+The display can also run headless, drawing to an offscreen
+surface instead of a window (useful for benchmarks/CI).
+
+With dirty rects on, the scene's marks are handed to the display
+before every frame (see `crane.engine.dirty_rects`), and only the
+parts of the screen that changed are cleared, redrawn and sent
+to the window.
 """
-from typing import Tuple
+import os
+from typing import Iterable, List, Optional, Tuple
 
 import pygame
 
 from crane import globals
+from crane.engine.dirty_rects import DirtyRectTracker, Mark
 
 
 class Display:
     _DEPTH = 32
 
-    def __init__(self, caption: str, size: tuple=globals.SCREEN_SIZE_P):
+    def __init__(
+        self,
+        caption: str,
+        size: tuple=globals.SCREEN_SIZE_P,
+        headless: bool=False,
+        dirty_rects: bool=False,
+        max_coverage: float=0.5,
+    ):
         """The window where everything in the game is drawn to.
         The `Display` class is also a context manager, so you can
         enter it and place rendering code inside `with` block.
@@ -21,11 +38,31 @@ class Display:
         Args:
             caption (str): the title of the window.
             size (tuple): the size of the window.
+            headless (bool): if `True`, no window is opened and everything
+                is drawn to an offscreen surface instead.
+            dirty_rects (bool): if `True`, frames that were marked with
+                `mark()` only redraw and update the parts that changed.
+            max_coverage (float): the fraction of the screen that can
+                change before the whole frame is redrawn anyway.
         """
-        self._surface = pygame.display.set_mode(size, pygame.RESIZABLE, self._DEPTH)
+        self._headless = headless
         self._clear_color = (255, 255, 255, 255)
 
-        pygame.display.set_caption(caption)
+        # The rects to redraw this frame, or `None` for all of it
+        self._tracker = DirtyRectTracker(max_coverage) if dirty_rects else None
+        self._marked = False
+        self._dirty: Optional[List[pygame.Rect]] = None
+
+        if headless:
+            # Keyboard polling etc. still needs the video system, so fall
+            # back to SDL's dummy driver if nothing was set up yet
+            if not pygame.display.get_init():
+                os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+                pygame.display.init()
+            self._surface = pygame.Surface(size, 0, self._DEPTH)
+        else:
+            self._surface = pygame.display.set_mode(size, pygame.RESIZABLE, self._DEPTH)
+            pygame.display.set_caption(caption)
 
     def __enter__(self) -> pygame.surface.Surface:
         """Starts the rendering process.
@@ -62,15 +99,79 @@ class Display:
     def size(self) -> Tuple[int, int]:
         """The size of the display as a tuple (w, h) of pixles
         """
+        if self._headless:
+            return self._surface.get_size()
         return pygame.display.get_window_size()
 
+    @property
+    def headless(self) -> bool:
+        """Whether the display draws offscreen instead of to a window.
+        """
+        return self._headless
+
+    @property
+    def dirty_rects(self) -> bool:
+        """Whether only the parts of the screen that changed are redrawn.
+        """
+        return self._tracker is not None
+
+    @property
+    def last_dirty_rects(self) -> Optional[List[pygame.Rect]]:
+        """The rects redrawn in the current/last frame, or `None`
+        if all of it was.
+        """
+        return self._dirty
+
+    def mark(self, marks: Optional[Iterable[Mark]]):
+        """Tells the display what the next frame is going to draw, so
+        it can work out what changed. Call right before entering.
+        Does nothing without dirty rects.
+
+        Args:
+            marks (Iterable[Mark]): the marks, or `None` to redraw
+                the whole frame.
+        """
+        if self._tracker:
+            self._dirty = self._tracker.track(self._surface.get_size(), marks)
+            self._marked = True
+
+    def invalidate(self):
+        """Redraws the whole next frame, e.g. after the window was
+        uncovered and lost what was on it.
+        """
+        if self._tracker:
+            self._tracker.reset()
+
     def clear(self):
         """Clears the surface by filling it with a uniform color.
+
+        When only some rects changed, the surface is clipped to them
+        for the rest of the frame and only they are cleared.
         """
-        self._surface.fill(self._clear_color)
+        if not self._marked:
+            self._dirty = None
+            self.invalidate() # drawn without marks, the next frame can't compare
+
+        if self._dirty is None:
+            self._surface.fill(self._clear_color)
+        else:
+            # Everything outside the rects is already on the screen
+            clip = self._dirty[0].unionall(self._dirty[1:]) if self._dirty else pygame.Rect(0, 0, 0, 0)
+            self._surface.set_clip(clip)
+            self._surface.fill(self._clear_color, clip)
 
     def finish(self):
         """Finishes the rendering of a single frame and updates
-        the window.
+        the window, only the dirty rects if there are any. Does
+        nothing when headless.
         """
-        pygame.display.flip()
+        self._marked = False
+        if self._dirty is not None:
+            self._surface.set_clip(None)
+
+        if self._headless:
+            return
+        if self._dirty is None:
+            pygame.display.flip()
+        elif self._dirty:
+            pygame.display.update(self._dirty)
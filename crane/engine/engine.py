@@ -3,29 +3,67 @@
 This class handles the timing of rendering and updating
 the game. The updating portion is done in a separate
 thread to avoid loading the main thread and dropping the FPS.
+
+The engine can optionally update the game in fixed-size steps,
+which keeps the physics stable when the machine is under load.
+
+It can also save power when nothing is going on. Once no keys
+have been touched and the scene has been idle (see
+`UpdateableSceneObject.is_idle()`) for a while, updates slow
+down and rendering stops, until the next key event.
 """
 import threading
 import time
-
 import pygame
 
 from crane.engine.display import Display
+from crane.engine.input import TickKeys, get_input
+from crane.engine.profiler import get_profiler, measure
+from crane.engine.replay import InputRecorder, Recording
+from crane.engine.scene.interpolation import pin_snapshots, set_alpha
 from crane.engine.scene.scene import Scene
 
 
 class Engine:
 
-    def __init__(self, display: Display, target_fps: int, target_ups: int):
+    def __init__(
+        self,
+        display: Display,
+        target_fps: int,
+        target_ups: int,
+        fixed_dt: float=None,
+        max_steps: int=5,
+        idle_delay: float=None,
+        idle_ups: float=5,
+        idle_fps: float=0,
+    ):
         """The Engine class, used to handle timing of updating/rendering.
 
         Timing is not exact, and the actual FPS/UPS may be lower
         than the given targets if the rendering or updating process
         is running slow.
 
+        If `fixed_dt` is given, the scene is always updated in steps of
+        exactly `fixed_dt` seconds. Time left over between steps is
+        carried to the next tick, and rendering blends between the last
+        two steps so motion stays smooth when the FPS and UPS differ.
+
         Args:
             display (Display): the game display.
             target_fps (int): the desired frames per second.
             target_ups (int): the desired updates per second.
+            fixed_dt (float): the size of a fixed update step in seconds,
+                or `None` to update with the measured tick time.
+            max_steps (int): the most fixed steps to run in a single tick.
+                Any time beyond that is dropped to let the engine catch up.
+            idle_delay (float): how long things have to be idle before
+                slowing down, in seconds, or `None` to never slow down.
+            idle_ups (float): the updates per second while idle. Time
+                isn't made up for, each idle update is a single step.
+            idle_fps (float): the frames per second while idle, or 0 to
+                only render when pygame sends an event (e.g. the window
+                was uncovered). Anything that only changes with the wall
+                clock, like the background, stands still.
         """
         self._display = display
 
@@ -36,13 +74,26 @@ class Engine:
         self._update_clock = pygame.time.Clock()
         self._render_clock = pygame.time.Clock()
 
+        self._fixed_dt = fixed_dt
+        self._max_steps = max_steps
+        self._accumulator = 0
+        self._last_tick_time = time.perf_counter()
+
         self._last_fps_print_time = 0
         self._last_ups_print_time = 0
 
         self._running = False
         self._update_thread: threading.Thread = None
 
+        self._idle_delay = idle_delay
+        self._idle_ups = idle_ups
+        self._idle_fps = idle_fps
+        self._idle = False
+        self._last_busy_time = time.perf_counter()
+        self._wake = threading.Event() # set to cut an idle wait short
+
         self._scene = None
+        self._recorder: InputRecorder = None
 
     # ============================== Properties ==============================
     @property
@@ -61,6 +112,17 @@ class Engine:
     def scene(self, scene: Scene):
         self._scene = scene
 
+    @property
+    def recorder(self) -> InputRecorder:
+        """Get/set the recorder that every update tick's input is
+        recorded to, or `None` to not record.
+        """
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder: InputRecorder):
+        self._recorder = recorder
+
     @property
     def ups(self) -> float:
         """The measured UPS in Hz.
@@ -93,6 +155,44 @@ class Engine:
     def target_fps(self, target_fps: float):
         self._target_fps = target_fps
 
+    @property
+    def idle(self) -> bool:
+        """Whether the engine is running slow to save power.
+        """
+        return self._idle
+
+    @property
+    def idle_delay(self) -> float:
+        """Get/set how long things have to be idle before slowing
+        down, in seconds, or `None` to never slow down.
+        """
+        return self._idle_delay
+
+    @idle_delay.setter
+    def idle_delay(self, idle_delay: float):
+        self._idle_delay = idle_delay
+        if idle_delay is None:
+            self._wake_up()
+
+    @property
+    def fixed_dt(self) -> float:
+        """The size of a fixed update step in seconds, or `None`
+        if fixed-step updating is disabled.
+        """
+        return self._fixed_dt
+
+    @property
+    def interpolation(self) -> float:
+        """How far the current moment is between the previous and the
+        latest fixed update step, in [0, 1].
+
+        Always 1 if fixed-step updating is disabled.
+        """
+        if not self._fixed_dt:
+            return 1
+        elapsed = self._accumulator + time.perf_counter() - self._last_tick_time
+        return min(max(elapsed / self._fixed_dt, 0), 1)
+
     # ============================== Public ==============================
     def start(self):
         """Starts the game engine. This method blocks
@@ -109,6 +209,73 @@ class Engine:
         self._run_update_loop()
         self._run_render_loop()
 
+    def run_frames(self, num_frames: int, dt: float=None) -> float:
+        """Synchronously updates and renders the scene a number of times,
+        as fast as possible. Each frame is exactly one update of `dt`
+        seconds followed by one render of the latest state, so runs are
+        repeatable. Meant for benchmarking, pair it with a headless display.
+
+        Only call when the engine is not running!
+
+        Args:
+            num_frames (int): the number of frames to run.
+            dt (float): the update step in seconds. Defaults to the fixed
+                step, or one update period if there is none.
+
+        Returns:
+            The time in seconds it took to run all frames.
+
+        Raises:
+            A `RuntimeError` if called while running.
+        """
+        if self._running:
+            raise RuntimeError('Can\'t run frames while the engine is running')
+        dt = dt or self._fixed_dt or 1 / self._target_ups
+
+        start_time = time.perf_counter()
+        for _ in range(num_frames):
+            pygame.event.pump()
+            self._update(dt)
+            self._render(alpha=1)
+        elapsed = time.perf_counter() - start_time
+
+        if elapsed > 0:
+            self._fps = self._ups = num_frames / elapsed
+        return elapsed
+
+    def replay(self, recording: Recording, render: bool=False) -> float:
+        """Synchronously plays back a recording as fast as possible.
+        Every recorded tick is one update with the recorded time step
+        and keys. Seed the game's random numbers with the recording's
+        seed before creating the scene!
+
+        Only call when the engine is not running!
+
+        Args:
+            recording (Recording): the recording.
+            render (bool): whether to render after every update.
+
+        Returns:
+            The time in seconds it took to play back.
+
+        Raises:
+            A `RuntimeError` if called while running.
+        """
+        if self._running:
+            raise RuntimeError('Can\'t replay while the engine is running')
+
+        start_time = time.perf_counter()
+        for dt, keys in recording.ticks():
+            self._update(dt, keys)
+            if render:
+                pygame.event.pump()
+                self._render(alpha=1)
+        elapsed = time.perf_counter() - start_time
+
+        if elapsed > 0:
+            self._ups = recording.num_ticks / elapsed
+        return elapsed
+
     def stop(self):
         """Stops the game engine. This method blocks
         until the update thread exits.
@@ -121,6 +288,7 @@ class Engine:
         if not self._running:
             raise RuntimeError('Bruh you really gotta read the docstring')
         self._running = False
+        self._wake.set()
         self._update_thread.join()
 
     # ============================== Private ==============================
@@ -135,10 +303,27 @@ class Engine:
         `update()` function.
         """
         while self._running:
+            if self._idle:
+                # Nothing's going on, check back now and then, or
+                # right away when a key goes down
+                self._wake.wait(1 / self._idle_ups)
+                self._wake.clear()
+
             delta = self._update_clock.tick(self._target_ups) # Returns ms
             self._ups = self._update_clock.get_fps()
 
-            self._update(delta / 1000)
+            if self._idle:
+                # One step per idle tick, nothing would happen in the rest
+                delta = min(delta, 1000 * (self._fixed_dt or 1 / self._target_ups))
+                if self._fixed_dt:
+                    self._accumulator = 0
+
+            if self._fixed_dt:
+                self._update_fixed(delta / 1000)
+            else:
+                self._update(delta / 1000)
+
+            self._check_idle()
 
             # Periodically print out UPS
             if time.perf_counter() - self._last_ups_print_time > 1:
@@ -150,6 +335,10 @@ class Engine:
         `render()` function.
         """
         while self._running:
+            if self._idle:
+                self._render_idle()
+                continue
+
             self._render_clock.tick(self._target_fps) # Returns ms
             self._fps = self._render_clock.get_fps()
 
@@ -161,34 +350,162 @@ class Engine:
                 self._last_fps_print_time = time.perf_counter()
                 # print('FPS:', self.fps) <- annoying
 
-    def _update(self, dt: float):
+    def _render_idle(self):
+        """Waits for pygame events while idle, and renders at the idle
+        frame rate or whenever an event came in.
+        """
+        self._fps = self._idle_fps
+        timeout = 1 / self._idle_fps if self._idle_fps else 0.25
+        event = pygame.event.wait(int(timeout * 1000))
+        if event.type != pygame.NOEVENT:
+            self._handle_event(event)
+            self._poll_events()
+        elif not self._idle_fps:
+            return
+
+        if self._running:
+            self._render()
+
+    def _check_idle(self):
+        """Checks whether the input and scene have been idle for long
+        enough to slow down. Called from the update thread after
+        every tick.
+        """
+        if self._idle_delay is None:
+            return
+
+        scene = self._scene
+        now = time.perf_counter()
+        if get_input().active or (scene and not scene.is_idle()):
+            self._last_busy_time = now
+            self._idle = False
+        elif now - self._last_busy_time > self._idle_delay:
+            self._idle = True
+
+    def _wake_up(self):
+        """Goes back to full speed right away. Safe to call from any thread.
+        """
+        self._last_busy_time = time.perf_counter()
+        self._idle = False
+        self._wake.set()
+
+    def _update(self, dt: float, keys: TickKeys=None):
         """Calls the update function on the scene,
         if it exists.
 
         Args:
             dt (float): the time in seconds since the last update.
+            keys (TickKeys): the keys to update with, or `None` to
+                use the key events polled since the last update.
+        """
+        input_state = get_input()
+        input_state.begin_tick(dt, keys)
+
+        scene = self._scene
+        if scene:
+            with measure('update', type(scene).__name__):
+                scene.update(dt)
+
+        if self._recorder:
+            self._recorder.record(dt, input_state.checked_keys)
+
+    def _update_fixed(self, dt: float):
+        """Updates the scene in as many fixed steps as fit in
+        the time accumulated so far.
+
+        Args:
+            dt (float): the time in seconds since the last tick.
         """
-        if self._scene:
-            self._scene.update(dt)
+        self._accumulator += dt
+
+        steps = 0
+        while self._accumulator >= self._fixed_dt and steps < self._max_steps:
+            self._update(self._fixed_dt)
+            self._accumulator -= self._fixed_dt
+            steps += 1
+
+        # Running behind, drop the extra time instead of spiraling
+        if steps == self._max_steps:
+            self._accumulator %= self._fixed_dt
+
+        self._last_tick_time = time.perf_counter()
 
-    def _render(self):
+    def _render(self, alpha: float=None):
         """Calls the render function on the scene,
         if it exists. Scene is rendered to display.
+
+        Args:
+            alpha (float): the interpolation factor to render with,
+                or `None` to use the current `interpolation`.
         """
-        try:
-            # Display is a context manager, all rendering done inside `with` block
-            with self.display as surface:
-                if self._scene:
-                    self._scene.render(surface)
-        except:
-            raise
+        set_alpha(self.interpolation if alpha is None else alpha)
+        scene = self._scene
+        profiler = get_profiler()
+        overlay = profiler and profiler.overlay_visible
+
+        # Marks and rendering have to see the same physics state
+        with pin_snapshots():
+            # Work out what changed, the overlay isn't marked so it redraws everything
+            if self.display.dirty_rects:
+                with measure('render', 'get_marks'):
+                    marks = scene.get_marks(self.display.surface) if scene and not overlay else None
+                self.display.mark(marks)
+
+            try:
+                # Display is a context manager, all rendering done inside `with` block
+                with self.display as surface:
+                    # Nothing changed, the clip would throw it all away anyway
+                    if scene and self.display.last_dirty_rects != []:
+                        with measure('render', type(scene).__name__):
+                            scene.render(surface)
+
+                    if overlay:
+                        profiler.render_overlay(surface)
+            except:
+                raise
 
     def _poll_events(self):
         """Processes events from pygame.
 
         Calls the `stop()` function if the
-        QUIT event is raised.
+        QUIT event is raised. Key events are queued for the
+        next update tick. When profiling, F3 toggles
+        the profiler overlay and F4 dumps the results.
         """
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.stop()
+            self._handle_event(event)
+
+    def _handle_event(self, event: pygame.event.Event):
+        """Processes a single event from pygame, see `_poll_events()`.
+        Key events also wake the engine up if it's idle.
+
+        Args:
+            event (Event): the event.
+        """
+        if event.type == pygame.QUIT:
+            self.stop()
+        elif event.type == pygame.KEYDOWN:
+            get_input().push_key_event(event.key, True)
+            self._wake_up()
+            self._handle_profiler_key(event.key)
+        elif event.type == pygame.KEYUP:
+            get_input().push_key_event(event.key, False)
+            self._wake_up()
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+            # The window lost what was on it, dirty rects alone won't bring it back
+            self._display.invalidate()
+
+    def _handle_profiler_key(self, key: int):
+        """Handles the profiler hotkeys, if profiling is on.
+
+        Args:
+            key (int): the pygame key code that was pressed.
+        """
+        profiler = get_profiler()
+        if not profiler:
+            return
+
+        if key == pygame.K_F3:
+            profiler.overlay_visible = not profiler.overlay_visible
+        elif key == pygame.K_F4:
+            profiler.dump()
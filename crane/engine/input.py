@@ -0,0 +1,151 @@
+"""This module contains the `InputState` class, which is
+how scene objects read the keyboard.
+
+The render thread pushes key events into the input state as pygame
+delivers them, and the engine applies everything queued up at the
+start of every update tick, along with advancing the game clock by
+the tick's `dt`. Ticks can also be fed keys from a recording instead.
+Scene objects only ever see the input state, so a recorded session
+plays back exactly the same way it was played.
+"""
+import collections
+from typing import Deque, FrozenSet, Set, Tuple
+
+
+# The keys held and the keys that went down during a tick, as a tuple
+# (held, pressed). This is all it takes to play a tick back.
+TickKeys = Tuple[FrozenSet[int], FrozenSet[int]]
+
+
+_INPUT: 'InputState' = None
+
+
+def get_input() -> 'InputState':
+    """Gets the shared input state.
+
+    Returns:
+        The input state.
+    """
+    global _INPUT
+    if _INPUT is None:
+        _INPUT = InputState()
+    return _INPUT
+
+
+class InputState:
+
+    def __init__(self):
+        """The keyboard state and game clock for the current update tick.
+
+        Only `push_key_event()` may be called from other threads, the
+        rest is for the update thread.
+        """
+        # Key events from the render thread as tuples (key, down).
+        # Deque appends/pops are atomic, so no lock needed
+        self._events: Deque[Tuple[int, bool]] = collections.deque()
+
+        self._held: Set[int] = set()
+        self._pressed: Set[int] = set()
+        self._time = 0
+        self._tick = 0
+
+        # Keys that were checked and found held/pressed during this tick
+        self._checked_held: Set[int] = set()
+        self._checked_pressed: Set[int] = set()
+
+    @property
+    def time(self) -> float:
+        """The game clock in seconds, which only moves when the game
+        is updated. Use it instead of the wall clock for anything that
+        affects gameplay.
+        """
+        return self._time
+
+    @property
+    def tick(self) -> int:
+        """The number of update ticks so far.
+        """
+        return self._tick
+
+    @property
+    def active(self) -> bool:
+        """Whether any key is held down, or went down during this tick.
+        """
+        return bool(self._held or self._pressed)
+
+    @property
+    def checked_keys(self) -> TickKeys:
+        """The keys found held by `is_pressed()` and found pressed by
+        `was_pressed()` during this tick. Keys that nothing checked
+        don't matter, so this is enough to play the tick back.
+        """
+        return frozenset(self._checked_held), frozenset(self._checked_pressed)
+
+    def push_key_event(self, key: int, down: bool):
+        """Queues a key event for the next update tick. Safe to call
+        from any thread.
+
+        Args:
+            key (int): the pygame key code.
+            down (bool): `True` for a key press, `False` for a release.
+        """
+        self._events.append((key, down))
+
+    def begin_tick(self, dt: float, keys: TickKeys=None):
+        """Starts a new update tick. Called by the engine.
+
+        Args:
+            dt (float): the tick's time step in seconds.
+            keys (TickKeys): the keys to use for this tick, or `None`
+                to apply the queued key events.
+        """
+        self._time += dt
+        self._tick += 1
+        if self._checked_held:
+            self._checked_held = set()
+        if self._checked_pressed:
+            self._checked_pressed = set()
+
+        if keys is not None:
+            self._held, self._pressed = set(keys[0]), set(keys[1])
+            return
+
+        if self._pressed:
+            self._pressed = set()
+        while self._events:
+            key, down = self._events.popleft()
+            if down:
+                self._held.add(key)
+                self._pressed.add(key)
+            else:
+                self._held.discard(key)
+
+    def is_pressed(self, key: int) -> bool:
+        """Checks whether a key is held down.
+
+        Args:
+            key (int): the pygame key code, e.g. `pygame.K_SPACE`.
+
+        Returns:
+            `True` if the key is held down.
+        """
+        if key in self._held:
+            self._checked_held.add(key)
+            return True
+        return False
+
+    def was_pressed(self, key: int) -> bool:
+        """Checks whether a key went down since the last tick, even
+        if it was already released again. Holding a key down only
+        counts once, so there's no need to debounce.
+
+        Args:
+            key (int): the pygame key code, e.g. `pygame.K_ESCAPE`.
+
+        Returns:
+            `True` if the key went down.
+        """
+        if key in self._pressed:
+            self._checked_pressed.add(key)
+            return True
+        return False
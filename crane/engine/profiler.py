@@ -0,0 +1,184 @@
+"""This module contains the opt-in frame profiler.
+
+When enabled, every update/render call made through a `Scene` or
+`SceneManager` is timed, along with the physics step of every
+`PhysicsScene`. Timings are kept in a rolling window per object
+class, and can be dumped to a JSON file or drawn as an overlay.
+
+The profiler is off by default, and costs next to nothing when off.
+"""
+import collections
+import contextlib
+import json
+import time
+from typing import Deque, Dict, Tuple
+
+import pygame
+
+from crane.helpers import draw_text
+
+
+_PROFILER: 'Profiler' = None
+_NOT_PROFILING = contextlib.nullcontext()
+
+
+def enable_profiler(path: str='profile.json', window: int=600) -> 'Profiler':
+    """Turns on profiling.
+
+    Args:
+        path (str): where to dump the results to.
+        window (int): how many of the latest samples to keep per object class.
+
+    Returns:
+        The profiler.
+    """
+    global _PROFILER
+    _PROFILER = Profiler(path, window)
+    return _PROFILER
+
+
+def disable_profiler():
+    """Turns off profiling and throws away the results.
+    """
+    global _PROFILER
+    _PROFILER = None
+
+
+def get_profiler() -> 'Profiler':
+    """Gets the profiler.
+
+    Returns:
+        The profiler, or `None` if profiling is off.
+    """
+    return _PROFILER
+
+
+def measure(phase: str, name: str):
+    """Times the code inside a `with` block, if profiling is on.
+
+    Args:
+        phase (str): what is being timed, like 'update' or 'render'.
+        name (str): what is being timed, like the object class name.
+
+    Returns:
+        A context manager.
+    """
+    if _PROFILER is None:
+        return _NOT_PROFILING
+    return _PROFILER.measure(phase, name)
+
+
+class _Measurement:
+
+    def __init__(self, samples: Deque[float]):
+        """Context manager that times its `with` block and
+        adds the duration to a list of samples.
+
+        Args:
+            samples (Deque[float]): where to put the duration.
+        """
+        self._samples = samples
+        self._start_time = 0
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._samples.append(time.perf_counter() - self._start_time)
+
+
+class Profiler:
+    _PERCENTILES = (50, 95, 99)
+    _OVERLAY_LINES = 12
+
+    def __init__(self, path: str='profile.json', window: int=600):
+        """Keeps rolling windows of timing samples per (phase, name).
+
+        Timings are inclusive, so a scene's time includes the time
+        of all of its children.
+
+        Args:
+            path (str): where to dump the results to.
+            window (int): how many of the latest samples to keep per (phase, name).
+        """
+        self._path = path
+        self._window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._overlay_visible = False
+
+    @property
+    def overlay_visible(self) -> bool:
+        """Get/set whether the overlay should be drawn.
+        """
+        return self._overlay_visible
+
+    @overlay_visible.setter
+    def overlay_visible(self, overlay_visible: bool):
+        self._overlay_visible = overlay_visible
+
+    def measure(self, phase: str, name: str) -> _Measurement:
+        """Times the code inside a `with` block.
+
+        Args:
+            phase (str): what is being timed, like 'update' or 'render'.
+            name (str): what is being timed, like the object class name.
+
+        Returns:
+            A context manager.
+        """
+        samples = self._samples.get((phase, name), None)
+        if samples is None:
+            samples = self._samples.setdefault((phase, name), collections.deque(maxlen=self._window))
+        return _Measurement(samples)
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        """Computes percentiles over the current window of samples.
+
+        Returns:
+            A dict like `{phase: {name: {'count': n, 'p50': ms, ...}}}`.
+            Times are in milliseconds.
+        """
+        stats = {}
+        for (phase, name), samples in list(self._samples.items()):
+            samples = sorted(samples)
+            if not samples:
+                continue
+
+            entry = {'count': len(samples)}
+            for p in self._PERCENTILES:
+                idx = min(len(samples) - 1, int(p / 100 * len(samples)))
+                entry[f'p{p}'] = samples[idx] * 1000
+            entry['max'] = samples[-1] * 1000
+            stats.setdefault(phase, {})[name] = entry
+        return stats
+
+    def dump(self, path: str=None):
+        """Dumps the current percentiles to a JSON file.
+
+        Args:
+            path (str): the file to write to, or `None` to use the
+                path the profiler was created with.
+        """
+        with open(path or self._path, 'w') as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def render_overlay(self, surface: pygame.surface.Surface):
+        """Draws the slowest entries (by p95) over the top of a surface.
+
+        Args:
+            surface (Surface): the surface to render to.
+        """
+        rows = [
+            (entry['p95'], f'{phase:>7} {name:<22} {entry["p50"]:6.2f} {entry["p95"]:6.2f} {entry["p99"]:6.2f}')
+            for phase, entries in self.stats().items()
+            for name, entry in entries.items()
+        ]
+        rows.sort(reverse=True)
+        lines = [f'{"":>7} {"ms":<22} {"p50":>6} {"p95":>6} {"p99":>6}']
+        lines += [line for _, line in rows[:self._OVERLAY_LINES]]
+
+        overlay = pygame.Surface((surface.get_width(), 16 * len(lines) + 8), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        surface.blit(overlay, (0, 0))
+        for i, line in enumerate(lines):
+            draw_text(surface, line, 'Courier New', 14, (255, 255, 0), (4, 4 + 16 * i), use_atlas=True)
@@ -0,0 +1,120 @@
+"""This module contains input recording and playback.
+
+A recording is the random seed a session started with, plus the
+time step and keys held/pressed on every update tick. Playing it back
+through the same update path reproduces the session exactly, as
+fast as the machine can go.
+
+Recordings are JSON lines. The first line is a header, and every
+other line is a run of identical ticks `[count, dt, [held...], [pressed...]]`,
+so idle stretches take up almost no space.
+"""
+import json
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Tuple
+
+from crane.engine.input import TickKeys
+
+
+_VERSION = 2
+
+
+class Recording(NamedTuple):
+    """A recorded session.
+
+    seed: the random seed the session started with.
+    runs: runs of identical ticks as tuples (count, dt, keys).
+    """
+    seed: int
+    runs: List[Tuple[int, float, TickKeys]]
+
+    @property
+    def num_ticks(self) -> int:
+        """The number of update ticks in the recording.
+        """
+        return sum(count for count, _, _ in self.runs)
+
+    def ticks(self) -> Iterator[Tuple[float, TickKeys]]:
+        """Iterates over every tick.
+
+        Returns:
+            An iterator of tuples (dt, keys).
+        """
+        for count, dt, keys in self.runs:
+            for _ in range(count):
+                yield dt, keys
+
+
+def load_recording(path: Path) -> Recording:
+    """Loads a recording from a file.
+
+    Args:
+        path (Path): the recording file.
+
+    Returns:
+        The recording.
+
+    Raises:
+        ValueError: if the file isn't a recording this version can play.
+    """
+    with open(path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get('version', None) != _VERSION:
+            raise ValueError(f'Unsupported recording version: {header.get("version", None)}')
+
+        runs = []
+        for line in f:
+            try:
+                count, dt, held, pressed = json.loads(line)
+            except ValueError:
+                break # half-written last line
+            runs.append((count, dt, (frozenset(held), frozenset(pressed))))
+
+    return Recording(header['seed'], runs)
+
+
+class InputRecorder:
+
+    def __init__(self, path: Path, seed: int):
+        """Records the input of every update tick to a file.
+
+        Args:
+            path (Path): the file to record to.
+            seed (int): the random seed the session started with.
+        """
+        self._file = open(path, 'w')
+        self._file.write(json.dumps({'version': _VERSION, 'seed': seed}) + '\n')
+
+        # The run of identical ticks that hasn't been written yet
+        self._run_count = 0
+        self._run_tick: Tuple[float, TickKeys] = None
+
+    def record(self, dt: float, keys: TickKeys):
+        """Records an update tick. Only call from the update thread.
+
+        Args:
+            dt (float): the tick's time step in seconds.
+            keys (TickKeys): the keys held/pressed during the tick.
+        """
+        tick = (dt, keys)
+        if tick == self._run_tick:
+            self._run_count += 1
+            return
+
+        self._write_run()
+        self._run_tick = tick
+        self._run_count = 1
+
+    def close(self):
+        """Writes whatever is left and closes the file.
+        """
+        self._write_run()
+        self._run_count = 0
+        self._file.close()
+
+    def _write_run(self):
+        """Writes the current run of ticks, if there is one.
+        """
+        if self._run_count:
+            dt, (held, pressed) = self._run_tick
+            self._file.write(json.dumps([self._run_count, dt, sorted(held), sorted(pressed)]) + '\n')
@@ -0,0 +1,191 @@
+"""This module contains the `BodyInterpolator` class, used
+to hand body transforms to the render thread and smooth out
+rendering when physics is stepped at a fixed rate.
+
+The engine decides how far between two physics steps the
+current frame is (the "alpha"), and renderable physics objects
+use it to blend the previous and current body transforms.
+"""
+import contextlib
+import itertools
+from typing import Optional, Tuple
+
+import Box2D
+
+from crane.engine.snapshot import (
+    EMPTY_WORLD_SNAPSHOT,
+    BodyShape,
+    BodyState,
+    SnapshotBuffer,
+    WorldSnapshot,
+)
+
+
+# How far between the previous and current physics step we are, in [0, 1].
+# Set by the engine right before rendering.
+_ALPHA = 1.0
+
+
+def get_alpha() -> float:
+    """Gets the interpolation factor used for rendering.
+
+    Returns:
+        The interpolation factor in [0, 1]. A value of 1
+        means the latest physics state is drawn as-is.
+    """
+    return _ALPHA
+
+
+def set_alpha(alpha: float):
+    """Sets the interpolation factor used for rendering.
+
+    Args:
+        alpha (float): the interpolation factor, clamped to [0, 1].
+    """
+    global _ALPHA
+    _ALPHA = min(max(alpha, 0), 1)
+
+
+# The frame pinned by `pin_snapshots()`, or `None` to read the latest snapshots
+_FRAME: Optional[int] = None
+_FRAMES = itertools.count()
+
+
+@contextlib.contextmanager
+def pin_snapshots():
+    """Context manager that pins the snapshots every interpolator
+    reads until the `with` block exits. Wrap a whole frame in it
+    (marks and rendering), so it all sees the same physics state
+    even if the update thread publishes a new one halfway through.
+    Only use it from the render thread.
+    """
+    global _FRAME
+    _FRAME = next(_FRAMES)
+    try:
+        yield
+    finally:
+        _FRAME = None
+
+
+class BodyInterpolator:
+
+    def __init__(self, world: Box2D.b2World):
+        """Captures a snapshot of the world's bodies after every
+        physics step, so that rendering can blend the previous and
+        latest transforms without touching the live world.
+
+        Args:
+            world (b2World): the world containing the bodies.
+        """
+        self._world = world
+        self._snapshots: SnapshotBuffer[WorldSnapshot] = SnapshotBuffer(EMPTY_WORLD_SNAPSHOT)
+
+        # The snapshots read in the pinned frame, as a tuple (frame, (previous, current))
+        self._pinned: Tuple[Optional[int], Tuple[WorldSnapshot, WorldSnapshot]] = (None, None)
+
+    def capture(self):
+        """Captures the state of every body and publishes it.
+
+        Call from the update thread right after stepping the world.
+        """
+        previous = self._snapshots.latest
+        shapes = previous.shapes
+        bodies = {}
+        new_shapes = {}
+        static_bodies = []
+
+        for body in self._world.bodies:
+            # Inactive bodies are parked (e.g. pooled), they don't get drawn
+            if not body.active:
+                continue
+
+            # Static bodies never move, no need to ask Box2D again
+            state = previous.bodies.get(body, None)
+            if body.type == Box2D.b2_staticBody:
+                static_bodies.append(body)
+            else:
+                state = None
+            if state is None:
+                state = BodyState(body.position[0], body.position[1], body.angle)
+            bodies[body] = state
+
+            # Shapes never change either, only read them for new bodies
+            if body not in shapes:
+                new_shapes[body] = tuple(
+                    tuple((v[0], v[1]) for v in fixture.shape.vertices)
+                    for fixture in body.fixtures
+                    if isinstance(fixture.shape, Box2D.b2PolygonShape) and not fixture.sensor
+                )
+
+        # Only copy the shapes when something was added, otherwise share them
+        if new_shapes:
+            shapes = {
+                body: shape
+                for body, shape in {**shapes, **new_shapes}.items()
+                if body in bodies
+            }
+        elif len(shapes) != len(bodies):
+            shapes = {body: shapes[body] for body in bodies}
+
+        # Share the static bodies too unless they changed
+        static_bodies = tuple(static_bodies)
+        if static_bodies == previous.static_bodies:
+            static_bodies = previous.static_bodies
+
+        self._snapshots.publish(WorldSnapshot(bodies, shapes, static_bodies))
+
+    def static_bodies(self) -> Tuple[Box2D.b2Body, ...]:
+        """Gets the bodies that never move from the latest snapshot.
+
+        Returns:
+            The static bodies, in world order.
+        """
+        return self._read()[1].static_bodies
+
+    def shape(self, body: Box2D.b2Body) -> BodyShape:
+        """Gets the local fixture polygons of a body from the latest snapshot.
+
+        Args:
+            body (b2Body): the body.
+
+        Returns:
+            The polygons, or `None` if the body was not captured.
+        """
+        return self._read()[1].shapes.get(body, None)
+
+    def transform(self, body: Box2D.b2Body) -> Optional[BodyState]:
+        """Gets the interpolated transform of a body.
+
+        Args:
+            body (b2Body): the body.
+
+        Returns:
+            The transform in meters/radians, or `None` if the
+            body was not captured.
+        """
+        previous, current = self._read()
+
+        state = current.bodies.get(body, None)
+        before = previous.bodies.get(body, None)
+        if state is None or before is None or before is state:
+            return state
+
+        alpha = get_alpha()
+        return BodyState(
+            before.x + (state.x - before.x) * alpha,
+            before.y + (state.y - before.y) * alpha,
+            before.angle + (state.angle - before.angle) * alpha,
+        )
+
+    def _read(self) -> Tuple[WorldSnapshot, WorldSnapshot]:
+        """Reads the two most recent snapshots, or the ones read
+        earlier in the pinned frame.
+        """
+        if _FRAME is None:
+            return self._snapshots.read()
+
+        frame, pair = self._pinned
+        if frame != _FRAME:
+            pair = self._snapshots.read()
+            self._pinned = (_FRAME, pair)
+        return pair
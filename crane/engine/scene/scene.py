@@ -1,14 +1,21 @@
 """This module contains a variety of specialized
 scene objects.
 """
-from typing import List
+import contextlib
+from typing import Dict, List, Optional, Tuple
 
 import Box2D
 import pygame
 
+from crane.engine.dirty_rects import Mark, get_full_mark
+from crane.engine.profiler import measure
+from crane.engine.world_state import restore_world, save_world
+from crane.engine.scene.interpolation import BodyInterpolator
 from crane.engine.scene.scene_object import (
+    PhysicsObject,
     RenderableSceneObject,
     SceneObject,
+    StaticBodyLayer,
     UpdateableSceneObject,
 )
 
@@ -21,16 +28,34 @@ class Scene(UpdateableSceneObject, RenderableSceneObject):
 
         When this object is updated, the child objects are updated.
         When this object is rendered, the child objects are rendered.
+
+        Children added or removed while the scene is updating are
+        only added/removed once the update is done.
         """
         super(Scene, self).__init__()
 
-        # Contains all the child objects
-        self._children: List[SceneObject] = []
+        # Contains all the child objects. Dicts are used as ordered sets,
+        # so children stay in the order they were added and removal is O(1)
+        self._children: Dict[SceneObject, None] = {}
+        self._updateable_children: Dict[UpdateableSceneObject, None] = {}
+        self._renderable_children: Dict[RenderableSceneObject, None] = {}
+
+        # Read-only copy of the renderable children for the render thread.
+        # Replaced (never modified) whenever the children change.
+        self._render_children: Tuple[RenderableSceneObject, ...] = ()
+
+        # Changes made while updating, as tuples (added, object)
+        self._pending_changes: List[Tuple[bool, SceneObject]] = []
+        self._defer_depth = 0
 
     def add(self, object: SceneObject):
         """Adds a child object to this scene.
         """
-        self._children.append(object)
+        if self._defer_depth:
+            self._pending_changes.append((True, object))
+        else:
+            self._add_child(object)
+            self._publish_children()
 
     def remove(self, object: SceneObject):
         """Removes a child object from this scene.
@@ -38,7 +63,62 @@ class Scene(UpdateableSceneObject, RenderableSceneObject):
         Will raise an exception if the object was not
         previously added!
         """
-        self._children.remove(object)
+        if object not in self._children and (True, object) not in self._pending_changes:
+            raise ValueError('Object is not in the scene')
+
+        if self._defer_depth:
+            self._pending_changes.append((False, object))
+        else:
+            self._remove_child(object)
+            self._publish_children()
+
+    @contextlib.contextmanager
+    def _deferring_changes(self):
+        """Context manager that holds off adding/removing children
+        until the `with` block exits, so the children can be iterated
+        safely inside it. Can be nested.
+        """
+        self._defer_depth += 1
+        try:
+            yield
+        finally:
+            self._defer_depth -= 1
+            if not self._defer_depth and self._pending_changes:
+                self._apply_pending_changes()
+
+    def _apply_pending_changes(self):
+        """Adds/removes the children that changed while updating.
+        """
+        changes, self._pending_changes = self._pending_changes, []
+        for added, object in changes:
+            if added:
+                self._add_child(object)
+            else:
+                self._remove_child(object)
+        self._publish_children()
+
+    def _add_child(self, object: SceneObject):
+        """Adds a child object right away.
+        """
+        self._children[object] = None
+        if isinstance(object, UpdateableSceneObject):
+            self._updateable_children[object] = None
+        if isinstance(object, RenderableSceneObject):
+            self._renderable_children[object] = None
+
+    def _remove_child(self, object: SceneObject):
+        """Removes a child object right away. Does nothing
+        if the object is already gone.
+        """
+        self._children.pop(object, None)
+        self._updateable_children.pop(object, None)
+        self._renderable_children.pop(object, None)
+
+    def _publish_children(self):
+        """Hands a fresh copy of the renderable children
+        over to the render thread.
+        """
+        self._render_children = tuple(self._renderable_children)
 
     def update(self, dt: float):
         """Updates all the objects in this scene.
@@ -46,10 +126,18 @@ class Scene(UpdateableSceneObject, RenderableSceneObject):
         Args:
             dt (float): time since last update.
         """
-        for child in self._children:
-            # Not all children can be updated
-            if isinstance(child, UpdateableSceneObject):
-                child.update(dt)
+        with self._deferring_changes():
+            for child in self._updateable_children:
+                with measure('update', type(child).__name__):
+                    child.update(dt)
+
+    def is_idle(self) -> bool:
+        """Checks whether every child in this scene is idle.
+
+        Returns:
+            `True` if the scene is idle.
+        """
+        return all(child.is_idle() for child in self._updateable_children)
 
     def render(self, surface: pygame.surface.Surface):
         """Renders all the objects in this scene.
@@ -57,11 +145,28 @@ class Scene(UpdateableSceneObject, RenderableSceneObject):
         Args:
             surface (Surface): the surface to draw on.
         """
-        for child in self._children:
-            # Not all children can be rendered
-            if isinstance(child, RenderableSceneObject):
+        for child in self._render_children:
+            with measure('render', type(child).__name__):
                 child.render(surface)
 
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[List[Mark]]:
+        """Collects the marks of all the objects in this scene.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, or `None` if any child can't tell what it's
+            going to draw.
+        """
+        marks = []
+        for child in self._render_children:
+            child_marks = child.get_marks(surface)
+            if child_marks is None:
+                return None
+            marks.extend(child_marks)
+        return marks
+
 
 class SceneManager(UpdateableSceneObject, RenderableSceneObject):
 
@@ -73,6 +178,10 @@ class SceneManager(UpdateableSceneObject, RenderableSceneObject):
         super(SceneManager, self).__init__()
         self._current_scene: Scene = None
 
+        # The scene picked by `get_marks()` for the next frame, so
+        # a scene switch can't land between marking and rendering
+        self._frame_scene: Optional[Scene] = None
+
     @property
     def current_scene(self) -> Scene:
         """Get/set the scene that is being updated/rendered.
@@ -92,8 +201,19 @@ class SceneManager(UpdateableSceneObject, RenderableSceneObject):
         Args:
             dt (float): time since last update.
         """
-        if self.current_scene:
-            self.current_scene.update(dt)
+        scene = self.current_scene
+        if scene:
+            with measure('update', type(scene).__name__):
+                scene.update(dt)
+
+    def is_idle(self) -> bool:
+        """Checks whether the current scene is idle.
+
+        Returns:
+            `True` if the current scene is idle, or there isn't one.
+        """
+        scene = self.current_scene
+        return scene.is_idle() if scene else True
 
     def render(self, surface: pygame.surface.Surface):
         """Renders the current scene, if it exists.
@@ -101,8 +221,32 @@ class SceneManager(UpdateableSceneObject, RenderableSceneObject):
         Args:
             surface (Surface): the surface to draw the scene to.
         """
-        if self.current_scene:
-            self.current_scene.render(surface)
+        scene, self._frame_scene = self._frame_scene, None
+        if scene is None:
+            scene = self.current_scene
+        if scene:
+            with measure('render', type(scene).__name__):
+                scene.render(surface)
+
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[List[Mark]]:
+        """Gets the marks of the current scene. Switching scenes
+        redraws everything.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, or `None` if the current scene can't tell
+            what it's going to draw.
+        """
+        scene = self._frame_scene = self.current_scene
+        if not scene:
+            return [get_full_mark(surface, None)]
+
+        marks = scene.get_marks(surface)
+        if marks is None:
+            return None
+        return [get_full_mark(surface, scene)] + list(marks)
 
 
 class PhysicsScene(Scene):
@@ -111,12 +255,88 @@ class PhysicsScene(Scene):
         """A special scene with physics capabilities.
 
         Contains a Box2D world to which bodies can be added.
+        Static bodies in the world are drawn automatically.
 
         Args:
             gravity (float): Gravitation acceleration in m/s^2. Defaults to -9.81.
         """
         super(PhysicsScene, self).__init__()
         self._world = Box2D.b2World(gravity=(0, gravity), doSleep=True)
+        self._interpolator = BodyInterpolator(self._world)
+        self._capturing = True
+
+        # Static bodies are drawn once into a layer, underneath everything else
+        self.add(StaticBodyLayer(self._world))
+
+    def add(self, object: SceneObject):
+        """Adds a child object to this scene.
+
+        Physics objects are hooked up to the scene's interpolator
+        so their bodies are drawn smoothly between steps.
+        """
+        if isinstance(object, PhysicsObject):
+            object.interpolator = self._interpolator
+        super().add(object)
+
+    @property
+    def world(self) -> Box2D.b2World:
+        """Gets the Box2D world of the scene.
+        """
+        return self._world
+
+    @property
+    def capturing(self) -> bool:
+        """Get/set whether body transforms are handed to the render
+        thread after every update. Turn it off to simulate headless
+        without anything ever being drawn, it's most of the update cost.
+        """
+        return self._capturing
+
+    @capturing.setter
+    def capturing(self, capturing: bool):
+        self._capturing = capturing
+
+    def save_state(self) -> bytes:
+        """Saves the state of the whole world, plus any scene state
+        added by subclasses, as a compact blob. Only call this
+        between updates, from the update thread.
+
+        Returns:
+            The state as bytes.
+        """
+        return save_world(self._world, self._save_extra_state())
+
+    def restore_state(self, state: bytes):
+        """Puts the world back the way it was when the state was saved.
+        Only call this between updates, from the update thread.
+
+        No bodies are created or destroyed, the state can only be
+        restored into the scene it came from.
+
+        Args:
+            state (bytes): the state from `save_state()`.
+
+        Raises:
+            ValueError: if the state doesn't match the world.
+        """
+        extra = restore_world(self._world, state)
+        self._restore_extra_state(extra)
+
+    def _save_extra_state(self) -> bytes:
+        """Saves any scene state that isn't in the world.
+        Override along with `_restore_extra_state()`.
+
+        Returns:
+            The extra state as bytes.
+        """
+        return b''
+
+    def _restore_extra_state(self, state: bytes):
+        """Restores the scene state saved by `_save_extra_state()`.
+
+        Args:
+            state (bytes): the extra state.
+        """
 
     def update(self, dt: float):
         """Updates the scene, and steps the world by `dt`.
@@ -124,5 +344,27 @@ class PhysicsScene(Scene):
         Args:
             dt (float): time in seconds since last update.
         """
-        self._world.Step(dt, 10, 10)
+        with measure('physics', 'b2World.Step'):
+            self._world.Step(dt, 10, 10)
+        self._on_step()
         super().update(dt)
+
+        # Hand the new body transforms over to the render thread
+        if self._capturing:
+            self._interpolator.capture()
+
+    def is_idle(self) -> bool:
+        """Checks whether every child is idle and every body in
+        the world is asleep (static bodies don't count).
+
+        Returns:
+            `True` if the scene is idle.
+        """
+        if not super().is_idle():
+            return False
+        return not any(body.awake for body in self._world.bodies if body.type != Box2D.b2_staticBody)
+
+    def _on_step(self):
+        """Called right after every physics step, before the
+        children are updated. Handy for acting on contacts.
+        """
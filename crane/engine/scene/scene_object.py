@@ -4,11 +4,17 @@ Derive from one of these classes to implement
 game stuff.
 """
 import abc
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import Box2D
 import pygame
 from pygame import gfxdraw
 
+from crane.engine.camera import PolygonBatch, get_camera
+from crane.engine.dirty_rects import Mark, Rect, get_bounding_rect, get_full_mark
+from crane.engine.scene.interpolation import BodyInterpolator
+from crane.engine.snapshot import BodyShape, BodyState
+from crane.engine.sprite_cache import SpriteCache, get_sprite_cache
 from crane.globals import PIXELS_PER_METER
 
 
@@ -44,6 +50,18 @@ class UpdateableSceneObject(SceneObject):
                 was called.
         """
 
+    def is_idle(self) -> bool:
+        """Checks whether the object is sitting still, i.e. nothing
+        would change if it wasn't updated for a while. The engine
+        uses this to slow down and save power.
+
+        Called from the update thread, between updates.
+
+        Returns:
+            `True` if the object is idle. Defaults to `False`, to be safe.
+        """
+        return False
+
 
 class RenderableSceneObject(SceneObject):
 
@@ -62,6 +80,22 @@ class RenderableSceneObject(SceneObject):
             surface (Surface): the surface to render to.
         """
 
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[Iterable[Mark]]:
+        """Describes what the next `render()` is going to draw, so
+        only the parts of the screen that changed get redrawn. See
+        `crane.engine.dirty_rects`.
+
+        Only call this method from the main thread, right before rendering!
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks as tuples (rect, token), or `None` if the object
+            can't tell, which redraws the whole frame. Defaults to `None`.
+        """
+        return None
+
 
 class PhysicsObject(UpdateableSceneObject, RenderableSceneObject):
 
@@ -77,6 +111,58 @@ class PhysicsObject(UpdateableSceneObject, RenderableSceneObject):
         """
         super(PhysicsObject, self).__init__()
         self._world = world
+        self._interpolator: BodyInterpolator = None
+        self._camera = get_camera()
+
+        # Packed polygons of groups of bodies that have been drawn before
+        self._polygon_batches: Dict[Tuple[Box2D.b2Body, ...], PolygonBatch] = {}
+
+    @property
+    def interpolator(self) -> BodyInterpolator:
+        """Get/set the interpolator used to smooth out body transforms
+        when rendering. Set by the `PhysicsScene` this object is added to.
+        """
+        return self._interpolator
+
+    @interpolator.setter
+    def interpolator(self, interpolator: BodyInterpolator):
+        self._interpolator = interpolator
+
+    def get_body_transform(self, body: Box2D.b2Body) -> Optional[BodyState]:
+        """Gets the transform of a body to use for rendering.
+
+        When this object belongs to a `PhysicsScene`, the transform comes
+        from the snapshot published by the update thread instead of
+        the live body.
+
+        Args:
+            body (b2Body): the body.
+
+        Returns:
+            The transform in meters/radians, or `None` if the body
+            hasn't been captured in a snapshot yet.
+        """
+        if self._interpolator:
+            return self._interpolator.transform(body)
+        return BodyState(body.position[0], body.position[1], body.angle)
+
+    def get_body_shape(self, body: Box2D.b2Body) -> Optional[BodyShape]:
+        """Gets the local fixture polygons of a body to use for rendering.
+
+        Args:
+            body (b2Body): the body.
+
+        Returns:
+            The polygons, or `None` if the body hasn't been captured
+            in a snapshot yet.
+        """
+        if self._interpolator:
+            return self._interpolator.shape(body)
+        return tuple(
+            tuple((v[0], v[1]) for v in fixture.shape.vertices)
+            for fixture in body.fixtures
+            if not fixture.sensor
+        )
 
     def update(self, dt: float):
         """Updates the physics object.
@@ -88,6 +174,16 @@ class PhysicsObject(UpdateableSceneObject, RenderableSceneObject):
             dt (float): the time in seconds since the last update.
         """
 
+    def is_idle(self) -> bool:
+        """Checks whether the object is sitting still. The physics
+        scene already checks whether its bodies are asleep, so
+        physics objects are idle unless they say otherwise.
+
+        Returns:
+            `True` if the object is idle.
+        """
+        return True
+
     def render_body(self, surface: pygame.surface.Surface, body: Box2D.b2Body, color=(255, 255, 255)):
         """Renders all polygons comprising the given body as a solid color
 
@@ -96,42 +192,145 @@ class PhysicsObject(UpdateableSceneObject, RenderableSceneObject):
             body (b2Body): the body to render.
             color (tuple): The RGB color to use to render the body. Defaults to (255, 255, 255).
         """
-        # A body can have multiple fixtures, so we need to draw all of 'em
-        for fixture in body.fixtures:
+        self.render_bodies(surface, (body,), (color,))
+
+    def render_bodies(self, surface: pygame.surface.Surface, bodies: Sequence[Box2D.b2Body], colors: Sequence[tuple]):
+        """Renders all polygons of a bunch of bodies, each as a solid color.
+
+        The vertices of all bodies are transformed onto the screen in one go,
+        so prefer this over calling `render_body()` for each body.
+
+        Args:
+            surface (Surface): the surface to render to.
+            bodies (Sequence[b2Body]): the bodies to render.
+            colors (Sequence[tuple]): the RGB color to use for each body.
+        """
+        transforms = [self.get_body_transform(body) for body in bodies]
 
-            # Need a list of vertices to draw the polygon
-            shape = fixture.shape
-            vertices = []
-            for v in shape.vertices:
+        # Bodies that haven't made it into a snapshot yet can't be drawn
+        if None in transforms:
+            bodies, colors, transforms = self._drop_missing(bodies, colors, transforms)
+            if not bodies:
+                return
 
-                # `shape.vertices` is static, need to apply the body transform to get
-                # the correct vertices
-                v = Box2D.b2Vec2(v[0], v[1])
-                v = body.transform * v * PIXELS_PER_METER
+        batch = self._get_polygon_batch(tuple(bodies))
+        if batch is None:
+            return
 
-                # Flip vertices vertically, since pygame coordinates are flipped
-                vertices.append((v[0], surface.get_size()[1] - v[1]))
+        # Tolist once, slicing Python lists is cheaper than slicing arrays
+        points = self._camera.project(batch, transforms, surface.get_height()).tolist()
+        for i, start, end in batch.polygon_slices:
+            vertices = points[start:end]
 
             # Draw twice to properly anti-alias
-            gfxdraw.aapolygon(surface, vertices, color)
-            gfxdraw.filled_polygon(surface, vertices, color)
+            gfxdraw.aapolygon(surface, vertices, colors[i])
+            gfxdraw.filled_polygon(surface, vertices, colors[i])
+
+    def _get_polygon_batch(self, bodies: Tuple[Box2D.b2Body, ...]) -> Optional[PolygonBatch]:
+        """Gets the (cached) polygons of a bunch of bodies packed together.
+
+        Args:
+            bodies (Tuple[b2Body, ...]): the bodies.
+
+        Returns:
+            The batch, or `None` if the shape of a body isn't known yet.
+        """
+        batch = self._polygon_batches.get(bodies, None)
+        if batch is None:
+            shapes = [self.get_body_shape(body) for body in bodies]
+            if None in shapes:
+                return None
+            batch = PolygonBatch(shapes)
+            self._polygon_batches[bodies] = batch
+        return batch
+
+    def get_bodies_rect(self, surface: pygame.surface.Surface, bodies: Sequence[Box2D.b2Body]) -> Optional[Rect]:
+        """Gets the screen area covered by a bunch of bodies when drawn
+        with `render_bodies()`, a bit bigger to fit the anti-aliasing.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+            bodies (Sequence[b2Body]): the bodies.
+
+        Returns:
+            The rect, or `None` if none of the bodies can be drawn yet.
+        """
+        kept = [(body, self.get_body_transform(body)) for body in bodies]
+        kept = [(body, transform) for body, transform in kept if transform is not None]
+        if not kept:
+            return None
+
+        bodies, transforms = zip(*kept)
+        batch = self._get_polygon_batch(bodies)
+        if batch is None:
+            return None
+        return get_bounding_rect(self._camera.project(batch, transforms, surface.get_height()), padding=1)
+
+    @staticmethod
+    def _drop_missing(bodies: Sequence[Box2D.b2Body], colors: Sequence[tuple], transforms: Sequence[BodyState]):
+        """Filters out bodies that have no transform.
+
+        Returns:
+            A tuple (bodies, colors, transforms) of lists.
+        """
+        kept = [i for i, transform in enumerate(transforms) if transform is not None]
+        return (
+            [bodies[i] for i in kept],
+            [colors[i] for i in kept],
+            [transforms[i] for i in kept],
+        )
 
 
 class TexturedPhysicsObject(PhysicsObject):
 
-    def __init__(self, world: Box2D.b2World, image: pygame.surface.Surface, scale=1, angle=0):
+    def __init__(self, world: Box2D.b2World, image: pygame.surface.Surface, scale=1, angle=0, sprite_cache: SpriteCache=None):
         """A physics object that has a single texture drawn over it.
 
+        Scaled/rotated copies of the texture come from a sprite cache,
+        so the texture isn't transformed again every frame.
+
         Args:
             world (b2World): the physics world to add the object to.
             image (Surface): the texture to use in rendering.
             scale (int): the scale to apply to the texture.
             angle (int): the angle offset in degrees to apply to the texture.
+            sprite_cache (SpriteCache): the cache to get transformed textures
+                from, or `None` to use the shared one.
         """
         super(TexturedPhysicsObject, self).__init__(world)
         self._image = image
         self._angle = angle
-        self._scale = (scale * PIXELS_PER_METER, scale * PIXELS_PER_METER)
+        self._scale = (round(scale * PIXELS_PER_METER), round(scale * PIXELS_PER_METER))
+        self._sprite_cache = sprite_cache or get_sprite_cache()
+
+        # Last texture drawn for each body as tuples (angle, texture),
+        # reused as long as the body doesn't rotate (e.g. while asleep)
+        self._last_sprites: Dict[Box2D.b2Body, Tuple[float, pygame.surface.Surface]] = {}
+
+    @property
+    def image(self) -> pygame.surface.Surface:
+        """Get/set the texture drawn over the bodies.
+        """
+        return self._image
+
+    @image.setter
+    def image(self, image: pygame.surface.Surface):
+        if image is not self._image:
+            self._image = image
+            self._last_sprites.clear()
+
+    @property
+    def scale(self) -> float:
+        """Get/set the scale applied to the texture.
+        """
+        return self._scale[0] / PIXELS_PER_METER
+
+    @scale.setter
+    def scale(self, scale: float):
+        size = (round(scale * PIXELS_PER_METER), round(scale * PIXELS_PER_METER))
+        if size != self._scale:
+            self._scale = size
+            self._last_sprites.clear()
 
     def render_body(self, surface: pygame.surface.Surface, body: Box2D.b2Body):
         """Renders a single body using the texture given.
@@ -140,17 +339,134 @@ class TexturedPhysicsObject(PhysicsObject):
             surface (Surface): the surface to render to.
             body (b2Body): the body object to render the texture over.
         """
-        pos, angle = body.position, body.angle + self._angle
-        pos = pos[0] * PIXELS_PER_METER, pos[1] * PIXELS_PER_METER
+        sprite = self._get_sprite(surface, body)
+        if sprite is not None:
+            surface.blit(*sprite)
+
+    def get_body_mark(self, surface: pygame.surface.Surface, body: Box2D.b2Body) -> Optional[Mark]:
+        """Gets the mark of a body drawn with `render_body()`.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+            body (b2Body): the body.
+
+        Returns:
+            The mark, or `None` if the body can't be drawn yet.
+        """
+        sprite = self._get_sprite(surface, body)
+        if sprite is None:
+            return None
+
+        # Blitting truncates the coords, a pixel each way covers that
+        image, (x, y) = sprite
+        return ((int(x) - 1, int(y) - 1, image.get_width() + 2, image.get_height() + 2), (image, x, y))
+
+    def _get_sprite(self, surface: pygame.surface.Surface, body: Box2D.b2Body) -> Optional[Tuple[pygame.surface.Surface, Tuple[float, float]]]:
+        """Gets the texture to draw over a body and where to draw it.
+
+        Args:
+            surface (Surface): the surface to render to.
+            body (b2Body): the body.
+
+        Returns:
+            A tuple (image, coords), or `None` if the body hasn't been
+            captured in a snapshot yet.
+        """
+        transform = self.get_body_transform(body)
+        if transform is None:
+            return None
+
+        x, y, angle = transform
+        angle += self._angle
+        pos = self._camera.to_screen(x, y, surface.get_height())
 
         # Rotate/scale image to match the body orientation
-        image = self._image
-        image = pygame.transform.smoothscale(image, self._scale)
-        image = pygame.transform.rotate(image, angle * 180 / 3.14159)
+        last_sprite = self._last_sprites.get(body, None)
+        if last_sprite is not None and last_sprite[0] == angle:
+            image = last_sprite[1]
+        else:
+            image = self._sprite_cache.get_rotated(self._image, self._scale, angle * 180 / 3.14159)
+            self._last_sprites[body] = (angle, image)
 
-        # Need to flip the y-axis since pygame coordinates are flipped
         coords = (
             pos[0] - image.get_width() / 2,
-            surface.get_height() - pos[1] - image.get_height() / 2
+            pos[1] - image.get_height() / 2
         )
-        surface.blit(image, coords)
+        return image, coords
+
+
+class StaticBodyLayer(PhysicsObject):
+
+    def __init__(self, world: Box2D.b2World, color=(255, 255, 255)):
+        """Draws all the static bodies of a world, which never move.
+
+        Each body is drawn once into a cached piece of layer, cropped to
+        the area it covers, and the pieces get blitted every frame. The
+        layer is only redrawn when the surface size or the set of static
+        bodies changes.
+
+        Args:
+            world (b2World): the world containing the static bodies.
+            color (tuple): the RGB color to draw the bodies with.
+        """
+        super(StaticBodyLayer, self).__init__(world)
+        self._color = color
+
+        # Pieces of the layer as tuples (surface, pos)
+        self._layer: List[Tuple[pygame.surface.Surface, Tuple[int, int]]] = []
+        self._layer_key = None
+
+    def render(self, surface: pygame.surface.Surface):
+        """Blits the static bodies onto a surface, redrawing
+        them first if needed.
+
+        Args:
+            surface (Surface): the surface to render to.
+        """
+        bodies = self._get_static_bodies()
+        key = (surface.get_size(), bodies)
+        if key != self._layer_key:
+            self._draw_layer(surface.get_size(), bodies)
+            self._layer_key = key
+
+        surface.blits(self._layer, doreturn=False)
+
+    def get_marks(self, surface: pygame.surface.Surface) -> List[Mark]:
+        """The layer only changes along with the static bodies,
+        and redraws everything when it does.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks.
+        """
+        return [get_full_mark(surface, ('static', self._get_static_bodies()))]
+
+    def _get_static_bodies(self) -> Tuple[Box2D.b2Body, ...]:
+        """Gets the static bodies to draw.
+        """
+        if self._interpolator:
+            return self._interpolator.static_bodies()
+        return tuple(body for body in self._world.bodies if body.type == Box2D.b2_staticBody)
+
+    def _draw_layer(self, size: Tuple[int, int], bodies: Tuple[Box2D.b2Body, ...]):
+        """Draws the static bodies into new layer pieces.
+
+        Args:
+            size (Tuple[int, int]): the size of the surface the layer goes on.
+            bodies (Tuple[b2Body, ...]): the static bodies.
+        """
+        self._layer = []
+        if not bodies:
+            return
+
+        canvas = pygame.Surface(size, pygame.SRCALPHA)
+        for body in bodies:
+            canvas.fill((0, 0, 0, 0))
+            self.render_bodies(canvas, (body,), (self._color,))
+
+            # Crop to just the body, blitting empty space isn't free
+            rect = canvas.get_bounding_rect()
+            if rect.width and rect.height:
+                self._layer.append((canvas.subsurface(rect).copy(), rect.topleft))
@@ -0,0 +1,86 @@
+"""This module contains the snapshot types handed from the
+update thread to the render thread.
+
+The update thread builds a new, immutable snapshot once per
+tick and publishes it into a `SnapshotBuffer`. The render thread
+only ever reads published snapshots, so it never sees the game
+state halfway through an update.
+"""
+from typing import Dict, Generic, NamedTuple, Tuple, TypeVar
+
+import Box2D
+
+
+T = TypeVar('T')
+
+
+class SnapshotBuffer(Generic[T]):
+
+    def __init__(self, initial: T=None):
+        """A double buffer holding the two most recently
+        published snapshots.
+
+        Publishing swaps in a new (previous, current) pair with a
+        single assignment, which is atomic under the GIL, so no locks
+        are needed as long as the snapshots themselves are never
+        modified after being published.
+
+        Args:
+            initial (T): the snapshot to start with.
+        """
+        self._pair: Tuple[T, T] = (initial, initial)
+
+    def publish(self, snapshot: T):
+        """Publishes a new snapshot. Only call from the update thread!
+
+        Args:
+            snapshot (T): the snapshot. Must not be modified afterwards.
+        """
+        self._pair = (self._pair[1], snapshot)
+
+    def read(self) -> Tuple[T, T]:
+        """Reads the two most recent snapshots.
+
+        Returns:
+            A tuple (previous, current) of snapshots.
+        """
+        return self._pair
+
+    @property
+    def latest(self) -> T:
+        """The most recently published snapshot.
+        """
+        return self._pair[1]
+
+
+class BodyState(NamedTuple):
+    """The transform of a body at the end of a tick.
+
+    x: the x position in meters.
+    y: the y position in meters.
+    angle: the angle in radians.
+    """
+    x: float
+    y: float
+    angle: float
+
+
+# Local polygon vertices of each fixture of a body
+BodyShape = Tuple[Tuple[Tuple[float, float], ...], ...]
+
+
+class WorldSnapshot(NamedTuple):
+    """Everything needed to draw the bodies of a world,
+    captured at the end of a tick.
+
+    bodies: the state of every body in the world.
+    shapes: the local fixture polygons of every body in the world.
+        Sensor fixtures are left out, since they aren't drawn.
+    static_bodies: the bodies that never move, in world order.
+    """
+    bodies: Dict[Box2D.b2Body, BodyState]
+    shapes: Dict[Box2D.b2Body, BodyShape]
+    static_bodies: Tuple[Box2D.b2Body, ...]
+
+
+EMPTY_WORLD_SNAPSHOT = WorldSnapshot({}, {}, ())
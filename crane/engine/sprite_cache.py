@@ -0,0 +1,117 @@
+"""This module contains the `SpriteCache` class, which keeps
+scaled and rotated copies of textures around so they don't
+have to be transformed again every frame.
+"""
+import collections
+from typing import Dict, Tuple
+
+import pygame
+
+
+class SpriteCache:
+
+    def __init__(self, angle_step: float=3, max_bytes: int=32 * 1024 * 1024):
+        """A cache of scaled and rotated textures.
+
+        Each texture is scaled once per size. Rotations are rounded to
+        the nearest multiple of `angle_step` degrees, and the least
+        recently used ones are thrown away when the rotated textures
+        take up more than `max_bytes`.
+
+        Only use from the render thread!
+
+        Args:
+            angle_step (float): the rotation step in degrees.
+            max_bytes (int): the most memory rotated textures can use.
+        """
+        self._angle_step = angle_step
+        self._num_angles = max(1, round(360 / angle_step))
+        self._max_bytes = max_bytes
+        self._bytes = 0
+
+        self._scaled: Dict[Tuple[pygame.surface.Surface, Tuple[int, int]], pygame.surface.Surface] = {}
+        self._rotated: Dict[tuple, pygame.surface.Surface] = collections.OrderedDict()
+
+    @property
+    def angle_step(self) -> float:
+        """The rotation step in degrees.
+        """
+        return self._angle_step
+
+    @property
+    def size_bytes(self) -> int:
+        """How much memory the rotated textures currently use.
+        """
+        return self._bytes
+
+    def get_scaled(self, image: pygame.surface.Surface, size: Tuple[int, int]) -> pygame.surface.Surface:
+        """Gets a texture scaled to a size.
+
+        Args:
+            image (Surface): the original texture.
+            size (Tuple[int, int]): the size as a tuple (w, h) of pixels.
+
+        Returns:
+            The scaled texture.
+        """
+        key = (image, size)
+        scaled = self._scaled.get(key, None)
+        if scaled is None:
+            scaled = pygame.transform.smoothscale(image, size)
+            self._scaled[key] = scaled
+        return scaled
+
+    def get_rotated(self, image: pygame.surface.Surface, size: Tuple[int, int], angle: float) -> pygame.surface.Surface:
+        """Gets a texture scaled to a size and rotated by roughly an angle.
+
+        Args:
+            image (Surface): the original texture.
+            size (Tuple[int, int]): the size as a tuple (w, h) of pixels.
+            angle (float): the counter-clockwise angle in degrees.
+
+        Returns:
+            The scaled and rotated texture.
+        """
+        step = round(angle / self._angle_step) % self._num_angles
+        key = (image, size, step)
+
+        rotated = self._rotated.get(key, None)
+        if rotated is not None:
+            self._rotated.move_to_end(key)
+            return rotated
+
+        rotated = pygame.transform.rotate(self.get_scaled(image, size), step * self._angle_step)
+        self._rotated[key] = rotated
+        self._bytes += self._get_num_bytes(rotated)
+
+        # Throw away the least recently used rotations, but keep the one just made
+        while self._bytes > self._max_bytes and len(self._rotated) > 1:
+            _, evicted = self._rotated.popitem(last=False)
+            self._bytes -= self._get_num_bytes(evicted)
+
+        return rotated
+
+    def clear(self):
+        """Throws away everything in the cache.
+        """
+        self._scaled.clear()
+        self._rotated.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _get_num_bytes(surface: pygame.surface.Surface) -> int:
+        """Estimates how much memory a surface uses.
+        """
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+_SPRITE_CACHE = SpriteCache()
+
+
+def get_sprite_cache() -> SpriteCache:
+    """Gets the sprite cache shared by all textured objects.
+
+    Returns:
+        The shared sprite cache.
+    """
+    return _SPRITE_CACHE
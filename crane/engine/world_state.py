@@ -0,0 +1,129 @@
+"""This module saves and restores the state of a Box2D world
+as a compact binary blob.
+
+Only what changes while simulating is saved: the transform,
+velocity and flags of every body, and the motor/limit settings
+of revolute joints. The bodies and joints themselves have to
+exist already, so a blob can only be restored into the world
+it came from (or one built exactly the same way).
+
+Contacts aren't saved, Box2D rebuilds them on the next step.
+"""
+import struct
+
+import Box2D
+import numpy as np
+
+
+_MAGIC = b'CRW1'
+_HEADER = struct.Struct('<4sIII') # magic, body count, joint count, extra length
+
+# Box2D works in single precision, so float32 loses nothing
+_BODY_DTYPE = np.dtype([
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('angle', '<f4'),
+    ('vx', '<f4'),
+    ('vy', '<f4'),
+    ('w', '<f4'),
+    ('flags', 'u1'),
+])
+_JOINT_DTYPE = np.dtype([
+    ('motor_speed', '<f4'),
+    ('lower', '<f4'),
+    ('upper', '<f4'),
+    ('flags', 'u1'),
+])
+
+_AWAKE = 1
+_ACTIVE = 2
+_MOTOR_ENABLED = 1
+_LIMIT_ENABLED = 2
+
+
+def save_world(world: Box2D.b2World, extra: bytes=b'') -> bytes:
+    """Saves the state of every body and joint in a world.
+
+    Args:
+        world (b2World): the world.
+        extra (bytes): anything else to store along with the world,
+            handed back by `restore_world()`.
+
+    Returns:
+        The state as bytes.
+    """
+    bodies = world.bodies
+    body_states = np.empty(len(bodies), dtype=_BODY_DTYPE)
+    for i, body in enumerate(bodies):
+        position = body.position
+        velocity = body.linearVelocity
+        body_states[i] = (
+            position[0],
+            position[1],
+            body.angle,
+            velocity[0],
+            velocity[1],
+            body.angularVelocity,
+            (_AWAKE if body.awake else 0) | (_ACTIVE if body.active else 0),
+        )
+
+    joints = world.joints
+    joint_states = np.zeros(len(joints), dtype=_JOINT_DTYPE)
+    for i, joint in enumerate(joints):
+        if isinstance(joint, Box2D.b2RevoluteJoint):
+            joint_states[i] = (
+                joint.motorSpeed,
+                joint.lowerLimit,
+                joint.upperLimit,
+                (_MOTOR_ENABLED if joint.motorEnabled else 0) | (_LIMIT_ENABLED if joint.limitEnabled else 0),
+            )
+
+    header = _HEADER.pack(_MAGIC, len(bodies), len(joints), len(extra))
+    return b''.join((header, body_states.tobytes(), joint_states.tobytes(), extra))
+
+
+def restore_world(world: Box2D.b2World, state: bytes) -> bytes:
+    """Restores the state of every body and joint in a world.
+
+    Args:
+        world (b2World): the world the state was saved from.
+        state (bytes): the state from `save_world()`.
+
+    Returns:
+        The extra bytes that were saved with the world.
+
+    Raises:
+        ValueError: if the state doesn't match the world.
+    """
+    magic, num_bodies, num_joints, extra_len = _HEADER.unpack_from(state)
+    bodies = world.bodies
+    joints = world.joints
+    if magic != _MAGIC or num_bodies != len(bodies) or num_joints != len(joints):
+        raise ValueError('State does not match the world')
+
+    offset = _HEADER.size
+    body_states = np.frombuffer(state, dtype=_BODY_DTYPE, count=num_bodies, offset=offset)
+    offset += body_states.nbytes
+    joint_states = np.frombuffer(state, dtype=_JOINT_DTYPE, count=num_joints, offset=offset)
+    offset += joint_states.nbytes
+
+    # Changing joints wakes their bodies up too
+    for joint, (motor_speed, lower, upper, flags) in zip(joints, joint_states.tolist()):
+        if isinstance(joint, Box2D.b2RevoluteJoint):
+            joint.motorSpeed = motor_speed
+            joint.SetLimits(lower, upper)
+            joint.motorEnabled = bool(flags & _MOTOR_ENABLED)
+            joint.limitEnabled = bool(flags & _LIMIT_ENABLED)
+
+    body_states = body_states.tolist()
+    for body, (x, y, angle, vx, vy, w, flags) in zip(bodies, body_states):
+        body.active = bool(flags & _ACTIVE)
+        body.transform = ((x, y), angle)
+        body.linearVelocity = (vx, vy)
+        body.angularVelocity = w
+
+    # Moving a body can wake up the ones touching it, so sleep comes last
+    for body, body_state in zip(bodies, body_states):
+        body.awake = bool(body_state[-1] & _AWAKE)
+
+    return bytes(state[offset:offset + extra_len])
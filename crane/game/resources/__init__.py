@@ -8,11 +8,16 @@ import os
 from pathlib import Path
 import random
 import sys
-import time
-from typing import List
+from typing import List, Tuple
 
 import pygame
 
+from crane.game.resources.background_loader import BackgroundLoader
+from crane.game.resources.catalog import PrizeCatalog
+from crane.game.resources.history import EMPTY_HISTORY_SUMMARY, HistorySummary, PlayHistory
+from crane.game.resources.journal import Journal, replay, write_atomic
+from crane.game.resources.stats import PrizeStats
+
 
 # PyInstaller creates a temp folder and stores path in _MEIPASS
 try:
@@ -21,15 +26,24 @@ except BaseException as e:
     _RESOURCE_DIR = Path(__file__).parent
 
 _CONFIG_PATH = _RESOURCE_DIR / 'config'
+_JOURNAL_PATH = _RESOURCE_DIR / 'config.journal'
+_HISTORY_PATH = _RESOURCE_DIR / 'history.sqlite3'
+_PILES_PATH = _RESOURCE_DIR / 'piles.json'
+_PAYOUTS_PATH = _RESOURCE_DIR / 'payouts.json'
+_HISTORY: PlayHistory = None # optional, see `enable_history()`
+_SAVING = True # turned off for benchmarks etc.
+_RANDOM = random.Random() # for anything that affects gameplay, see `seed_random()`
 ICON = pygame.image.load(_RESOURCE_DIR / 'icon.ico')
 
 
 # Prize resources
 _PRIZE_IMAGE_DIR = _RESOURCE_DIR / 'prizes'
-_PRIZE_NAMES = sorted([
+_CATALOG_PATH = _RESOURCE_DIR / 'catalog.json'
+_CATALOG = PrizeCatalog.load(_CATALOG_PATH, [
     Path(name).stem
     for name in os.listdir(_PRIZE_IMAGE_DIR)
 ])
+_PRIZE_NAMES = _CATALOG.names
 _PRIZE_IMAGES = {}
 _SPEND_PRICE = 0.25 # back in my day...
 
@@ -40,10 +54,9 @@ _BACKGROUND_PATHS = [
     _BACKGROUND_DIR / path
     for path in os.listdir(_BACKGROUND_DIR)
 ]
-_BACKGROUND_LAST_CHANGE = time.time()
 _BACKGROUND_CHANGE_INTERVAL = 15
-_BACKGROUND_PATH = random.choice(_BACKGROUND_PATHS)
-_BACKGROUNDS = {}
+_BACKGROUND_FADE_TIME = 1
+_BACKGROUNDS = BackgroundLoader(_BACKGROUND_PATHS, _BACKGROUND_CHANGE_INTERVAL, _BACKGROUND_FADE_TIME)
 
 
 def get_prize_names() -> List[str]:
@@ -52,6 +65,49 @@ def get_prize_names() -> List[str]:
     return _PRIZE_NAMES
 
 
+def get_catalog() -> PrizeCatalog:
+    """Gets the prize catalog, with the price, rarity, size
+    and shape of every prize.
+
+    Returns:
+        The catalog.
+    """
+    return _CATALOG
+
+
+def sample_prize_name(rng: random.Random=None) -> str:
+    """Picks a random prize name, weighted by rarity.
+
+    Args:
+        rng (Random): the random number generator to use, or
+            `None` for the game's (see `get_random()`).
+
+    Returns:
+        The prize name.
+    """
+    return _CATALOG.sample(rng or _RANDOM)
+
+
+def get_random() -> random.Random:
+    """Gets the random number generator for anything that affects
+    gameplay. Only use it from the update thread, so a session can
+    be replayed from its seed.
+
+    Returns:
+        The random number generator.
+    """
+    return _RANDOM
+
+
+def seed_random(seed: int):
+    """Seeds the game's random number generator.
+
+    Args:
+        seed (int): the seed.
+    """
+    _RANDOM.seed(seed)
+
+
 def get_prize_path(name: str) -> Path:
     """Returns the path to a prize image.
 
@@ -71,14 +127,28 @@ def increment_prize(name: str):
     Args:
         name (str): the name of the prize
     """
-    _CONFIG.setdefault('prizes', {}).setdefault(name, 0)
-    _CONFIG['prizes'][name] += 1
+    _STATS.increment_prize(name)
+    _record_event({'type': 'prize', 'name': name})
+    if _HISTORY and _SAVING:
+        _HISTORY.record_win(name)
+
+
+def _record_event(event: dict):
+    """Hands a config change to the journal, which writes
+    it to disk in the background.
+
+    Args:
+        event (dict): the change, see `journal.apply_event()`.
+    """
+    if _SAVING:
+        _JOURNAL.append(event)
 
 
 def _load_config() -> dict:
     """Loads the configuration file as a dictionary, or
     returns a default dict if it doesn't exist/can't be
-    parsed.
+    parsed. Changes in the journal that didn't make it
+    into the file yet are replayed on top.
 
     Returns:
         The configuration dictionary
@@ -86,9 +156,9 @@ def _load_config() -> dict:
     try:
         # config file stored as JSON
         with open(_CONFIG_PATH, 'r') as f:
-            return json.load(f)
+            config = json.load(f)
     except:
-        return {
+        config = {
             'prizes': {
                 name: 0
                 for name in _PRIZE_NAMES
@@ -96,16 +166,104 @@ def _load_config() -> dict:
             'spent': 0,
         }
 
+    replay(config, _JOURNAL_PATH)
+    return config
+
 
 def save_config():
     """Saves the configuration to disk.
+
+    Changes are saved as they happen, so this only waits
+    for the journal to catch up and compacts it.
+    """
+    if _SAVING:
+        _JOURNAL.sync()
+    if _HISTORY:
+        _HISTORY.close()
+
+
+def enable_history(path: Path=None):
+    """Turns on recording every play to a SQLite database.
+
+    Args:
+        path (Path): the database file, or `None` for the default.
+    """
+    global _HISTORY
+    if not _HISTORY:
+        _HISTORY = PlayHistory(path or _HISTORY_PATH)
+
+
+def is_history_enabled() -> bool:
+    """Checks whether plays are being recorded, see `enable_history()`.
+
+    Returns:
+        `True` if the history is on.
+    """
+    return _HISTORY is not None
+
+
+def get_history_summary() -> HistorySummary:
+    """Gets aggregates over the play history. The aggregates
+    are precomputed in the background, so this is cheap.
+
+    Returns:
+        The summary, which is empty if the history is off.
+    """
+    return _HISTORY.summary if _HISTORY else EMPTY_HISTORY_SUMMARY
+
+
+def load_piles() -> List[dict]:
+    """Loads the pre-settled prize piles, see `crane_scene.pile`.
+
+    Returns:
+        A list of piles, or an empty list if there aren't any.
     """
     try:
-        # config file stored as JSON
-        with open(_CONFIG_PATH, 'w') as f:
-            json.dump(_CONFIG, f)
+        with open(_PILES_PATH, 'r') as f:
+            return json.load(f)
+    except:
+        return []
+
+
+def save_piles(piles: List[dict]):
+    """Saves the pre-settled prize piles.
+
+    Args:
+        piles (List[dict]): the piles.
+    """
+    if _SAVING:
+        write_atomic(_PILES_PATH, piles)
+
+
+def load_payouts() -> dict:
+    """Loads the cached results of simulated plays, see `crane.sim.payout`.
+
+    Returns:
+        The results by cache key, or an empty dict if there aren't any.
+    """
+    try:
+        with open(_PAYOUTS_PATH, 'r') as f:
+            return json.load(f)
     except:
-        raise
+        return {}
+
+
+def save_payouts(payouts: dict):
+    """Saves the cached results of simulated plays.
+
+    Args:
+        payouts (dict): the results by cache key.
+    """
+    if _SAVING:
+        write_atomic(_PAYOUTS_PATH, payouts)
+
+
+def disable_saving():
+    """Stops any further changes from being saved to disk.
+    Use for benchmarks and simulations.
+    """
+    global _SAVING
+    _SAVING = False
 
 
 def get_total_prizes() -> int:
@@ -115,10 +273,7 @@ def get_total_prizes() -> int:
     Returns:
         The total number of prizes won.
     """
-    count = 0
-    for _, n in _CONFIG['prizes'].items():
-        count += n
-    return count
+    return _STATS.total_prizes
 
 
 def get_prize_count(name: str) -> int:
@@ -131,8 +286,7 @@ def get_prize_count(name: str) -> int:
     Returns:
         The number of prizes won.
     """
-    _CONFIG.setdefault('prizes', {}).setdefault(name, 0)
-    return _CONFIG['prizes'][name]
+    return _STATS.get_count(name)
 
 
 def get_unique_prizes() -> int:
@@ -142,11 +296,7 @@ def get_unique_prizes() -> int:
     Returns:
         The number of unique prizes won.
     """
-    # Kind of a dumb way of doing it
-    return len([
-        _ for _, n in _CONFIG['prizes'].items()
-        if n > 0
-    ])
+    return _STATS.unique_prizes
 
 
 def get_prize_image(name: str) -> pygame.surface.Surface:
@@ -176,11 +326,7 @@ def get_prize_price(name: str) -> float:
     Returns:
         The "dollar equivalent" of the prize.
     """
-    # Dumb way of doing it, but I'm too lazy to write if-else statements :)
-    return {
-        'Kelly': 69,
-        'Mitch': 69,
-    }.setdefault(name, 1)
+    return _CATALOG.get_price(name)
 
 
 def get_total_spent() -> float:
@@ -189,7 +335,7 @@ def get_total_spent() -> float:
     Returns:
         The total amount spent.
     """
-    return _CONFIG.setdefault('spent', 0)
+    return _STATS.total_spent
 
 
 def get_total_won() -> float:
@@ -198,21 +344,40 @@ def get_total_won() -> float:
     Returns:
         The total price of prizes won.
     """
-    total = 0
-    for name, count in _CONFIG['prizes'].items():
-        total += count * get_prize_price(name)
+    return _STATS.total_won
+
+
+def get_stats_version() -> int:
+    """Gets a number that goes up every time the prize/money
+    stats change. Handy for skipping redraws when nothing changed.
+
+    Returns:
+        The stats version.
+    """
+    return _STATS.version
+
+def get_spend_price() -> float:
+    """Gets the cost to play the game once.
+
+    Returns:
+        The cost to play.
+    """
+    return _SPEND_PRICE
 
-    return total
 
 def use_money():
     """Increments the amount spent in the config
     by the cost to play the game.
     """
-    _CONFIG.setdefault('spent', 0)
-    _CONFIG['spent'] += _SPEND_PRICE
+    _STATS.use_money(_SPEND_PRICE)
+    _record_event({'type': 'spend', 'amount': _SPEND_PRICE})
+    if _HISTORY and _SAVING:
+        _HISTORY.start_play(_SPEND_PRICE)
 
 
 _CONFIG = _load_config()
+_STATS = PrizeStats(_CONFIG, _CATALOG)
+_JOURNAL = Journal(_CONFIG, _CONFIG_PATH, _JOURNAL_PATH)
 def get_config() -> dict:
     """Gets the configuration dictionary.
 
@@ -221,29 +386,43 @@ def get_config() -> dict:
     """
     return _CONFIG
 
-def get_background() -> pygame.surface.Surface:
-    """Gets the current background. The image returned
-    changes over time.
+def prefetch_background(size: Tuple[int, int]):
+    """Gets the backgrounds ready for a surface size, waiting
+    until the current one is loaded. Call before rendering starts
+    so the first frames aren't missing a background.
+
+    Args:
+        size (Tuple[int, int]): the size of the surface as a tuple (w, h).
+    """
+    _BACKGROUNDS.prefetch(size, block=True)
+
+
+def get_background(size: Tuple[int, int]) -> pygame.surface.Surface:
+    """Gets the current background, scaled to the height of
+    a surface. The image returned changes over time.
+
+    Images are loaded on a background thread, so this never
+    blocks. Until the right one is ready, the last image is
+    returned instead.
+
+    Args:
+        size (Tuple[int, int]): the size of the surface as a tuple (w, h).
 
     Returns:
-        The background image as a pygame Surface.
+        The background image as a pygame Surface, or `None` if
+        nothing has been loaded yet.
     """
-    global _BACKGROUND_LAST_CHANGE, _BACKGROUND_PATH
+    return _BACKGROUNDS.get(size)
 
-    # Check if it's time to change the background
-    if time.time() - _BACKGROUND_LAST_CHANGE > _BACKGROUND_CHANGE_INTERVAL:
-        _BACKGROUND_LAST_CHANGE = time.time()
 
-        # Avoid getting the same image twice in a row
-        new_idx = random.choice(_BACKGROUND_PATHS)
-        while new_idx == _BACKGROUND_PATH:
-            new_idx = random.choice(_BACKGROUND_PATHS)
-        _BACKGROUND_PATH = new_idx
+def get_background_layers(size: Tuple[int, int]) -> List[Tuple[pygame.surface.Surface, int]]:
+    """Gets the background images to draw, which crossfade for
+    a moment whenever the background changes.
 
-    # Cache the images to avoid reading them from disk every time
-    image = _BACKGROUNDS.get(_BACKGROUND_PATH, None)
-    if not image:
-        image = pygame.image.load(_BACKGROUND_PATH)
-        _BACKGROUNDS[_BACKGROUND_PATH] = image
+    Args:
+        size (Tuple[int, int]): the size of the surface as a tuple (w, h).
 
-    return image
+    Returns:
+        A list of tuples (image, alpha) to blit in order.
+    """
+    return _BACKGROUNDS.get_layers(size)
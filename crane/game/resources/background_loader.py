@@ -0,0 +1,198 @@
+"""This module contains the `BackgroundLoader` class, which
+decodes and scales background images on a worker thread so
+the render thread never has to.
+"""
+import collections
+from pathlib import Path
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import pygame
+
+
+# Cached in place of an image that couldn't be loaded, so it isn't asked for again
+_FAILED = object()
+
+
+class BackgroundLoader:
+
+    def __init__(self, paths: List[Path], change_interval: float=15, fade_time: float=1, cache_size: int=6):
+        """Cycles through background images, preparing each one
+        ahead of time.
+
+        Images are decoded and scaled to the height of the surface on
+        a worker thread, and cached per (path, surface size). The next
+        background is prepared while the current one is shown, and is
+        only swapped in once it's ready. The render thread only ever
+        picks up finished images.
+
+        Args:
+            paths (List[Path]): the background images to cycle through.
+            change_interval (float): how long to show each background, in seconds.
+            fade_time (float): how long to crossfade between backgrounds,
+                in seconds. Use 0 to switch instantly.
+            cache_size (int): the most scaled images to keep around.
+        """
+        self._paths = paths
+        self._change_interval = change_interval
+        self._fade_time = fade_time
+        self._cache_size = cache_size
+
+        # Scaled images (or `_FAILED`) keyed by (path, size), shared with the worker thread
+        self._cache: Dict[Tuple[Path, Tuple[int, int]], object] = collections.OrderedDict()
+        self._pending: Set[Tuple[Path, Tuple[int, int]]] = set()
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread: threading.Thread = None
+
+        # Only touched by the render thread
+        self._current_path = random.choice(paths)
+        self._next_path = self._choose_next_path()
+        self._last_change = time.time()
+        self._shown: pygame.surface.Surface = None
+        self._previous: pygame.surface.Surface = None
+
+    def prefetch(self, size: Tuple[int, int], block: bool=False):
+        """Starts preparing the current and next backgrounds for a surface size.
+
+        Args:
+            size (Tuple[int, int]): the size of the surface as a tuple (w, h).
+            block (bool): whether to wait until the current background is ready.
+        """
+        if block:
+            self._store(self._current_path, size, self._load(self._current_path, size))
+        self._request(self._current_path, size)
+        self._request(self._next_path, size)
+
+    def get(self, size: Tuple[int, int]) -> Optional[pygame.surface.Surface]:
+        """Gets the current background, scaled to the height of a surface.
+
+        Never decodes or scales anything. If the background isn't ready
+        for this size yet, the last one shown is returned instead.
+
+        Args:
+            size (Tuple[int, int]): the size of the surface as a tuple (w, h).
+
+        Returns:
+            The background, or `None` if nothing is ready yet.
+        """
+        now = time.time()
+        current = self._lookup(self._current_path, size)
+
+        # Don't wait forever on a background that couldn't be loaded
+        if self._has_failed(self._next_path, size):
+            self._next_path = self._choose_next_path()
+
+        # Only swap once the next background is ready, so there's never a hitch
+        next_image = self._lookup(self._next_path, size)
+        if now - self._last_change > self._change_interval and next_image is not None:
+            self._previous = current or self._shown
+            self._current_path = self._next_path
+            self._next_path = self._choose_next_path()
+            self._last_change = now
+            current = next_image
+
+        self._request(self._current_path, size)
+        self._request(self._next_path, size)
+
+        if current is not None:
+            self._shown = current
+        return self._shown
+
+    def get_layers(self, size: Tuple[int, int]) -> List[Tuple[pygame.surface.Surface, int]]:
+        """Gets what to draw for the background, crossfading between
+        the previous and the current one after a change.
+
+        Args:
+            size (Tuple[int, int]): the size of the surface as a tuple (w, h).
+
+        Returns:
+            A list of tuples (image, alpha) to blit in order.
+        """
+        current = self.get(size)
+        if current is None:
+            return []
+
+        fade = 1 if self._fade_time <= 0 else (time.time() - self._last_change) / self._fade_time
+        if fade >= 1 or self._previous is None or self._previous is current:
+            self._previous = None
+            return [(current, 255)]
+        return [(self._previous, 255), (current, int(255 * fade))]
+
+    def _choose_next_path(self) -> Path:
+        """Picks a random background, avoiding the current one.
+        """
+        if len(self._paths) < 2:
+            return self._current_path
+        path = random.choice(self._paths)
+        while path == self._current_path:
+            path = random.choice(self._paths)
+        return path
+
+    def _lookup(self, path: Path, size: Tuple[int, int]) -> Optional[pygame.surface.Surface]:
+        """Gets a scaled image from the cache, if it's there.
+        """
+        key = (path, tuple(size))
+        with self._lock:
+            image = self._cache.get(key, None)
+            if image is not None:
+                self._cache.move_to_end(key)
+        return None if image is _FAILED else image
+
+    def _has_failed(self, path: Path, size: Tuple[int, int]) -> bool:
+        """Checks whether an image couldn't be loaded.
+        """
+        with self._lock:
+            return self._cache.get((path, tuple(size)), None) is _FAILED
+
+    def _request(self, path: Path, size: Tuple[int, int]):
+        """Asks the worker thread to prepare an image, unless
+        it's already prepared or on its way.
+        """
+        key = (path, tuple(size))
+        with self._lock:
+            if key in self._cache or key in self._pending:
+                return
+            self._pending.add(key)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._requests.put(key)
+
+    def _store(self, path: Path, size: Tuple[int, int], image: object):
+        """Puts a scaled image (or `_FAILED`) in the cache, throwing
+        out the least recently used ones if it's full.
+        """
+        key = (path, tuple(size))
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            self._pending.discard(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _run(self):
+        """The worker loop. Prepares requested images one at a time.
+        """
+        while True:
+            path, size = self._requests.get()
+            try:
+                image = self._load(path, size)
+            except Exception:
+                # Remember the failure, the old background just stays up
+                image = _FAILED
+            self._store(path, size, image)
+
+    @staticmethod
+    def _load(path: Path, size: Tuple[int, int]) -> pygame.surface.Surface:
+        """Decodes an image and scales it to the height of a surface,
+        keeping the aspect ratio.
+        """
+        image = pygame.image.load(path)
+        height = size[1]
+        width = round(height * image.get_width() / image.get_height())
+        return pygame.transform.smoothscale(image, (width, height))
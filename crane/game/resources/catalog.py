@@ -0,0 +1,201 @@
+"""This module contains the `PrizeCatalog` class, which holds
+the metadata of every prize (price, rarity, size, shape).
+
+The catalog is loaded once from a JSON file into arrays indexed
+by prize, so totals over all prizes are a single dot product and
+picking a random prize is O(1) no matter how many there are.
+"""
+import hashlib
+import json
+import math
+from pathlib import Path
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class PrizeCatalog:
+    DEFAULT_PRICE = 1
+    DEFAULT_WEIGHT = 1
+    DEFAULT_SCALE = 2
+    _HULL_SIDES = 6
+
+    def __init__(self, entries: Sequence[dict]):
+        """The metadata of every prize.
+
+        Each entry is a dict with the keys:
+            name (str): the prize name, which matches its image.
+            price (float): the "dollar equivalent" of the prize.
+            weight (float): how likely the prize is to be spawned,
+                relative to the others.
+            scale (float): the size of the prize in meters.
+            hull (list): the vertices [x, y] of the collision polygon in
+                meters, or `None` for a hexagon that fits the scale.
+
+        Args:
+            entries (Sequence[dict]): the prize entries.
+        """
+        self._names: List[str] = [entry['name'] for entry in entries]
+        self._indices: Dict[str, int] = {name: i for i, name in enumerate(self._names)}
+
+        self._prices = np.array([entry.get('price', self.DEFAULT_PRICE) for entry in entries], dtype=np.float64)
+        self._weights = np.array([entry.get('weight', self.DEFAULT_WEIGHT) for entry in entries], dtype=np.float64)
+        self._scales = np.array([entry.get('scale', self.DEFAULT_SCALE) for entry in entries], dtype=np.float64)
+        self._hulls: List[List[Tuple[float, float]]] = [
+            [tuple(v) for v in entry['hull']] if entry.get('hull') else self._get_default_hull(scale)
+            for entry, scale in zip(entries, self._scales)
+        ]
+
+        self._alias_probs, self._aliases = self._build_alias_table(self._weights)
+
+    @classmethod
+    def load(cls, path: Path, names: Sequence[str]=()) -> 'PrizeCatalog':
+        """Loads a catalog from a JSON file containing a list of entries.
+
+        Args:
+            path (Path): the catalog file.
+            names (Sequence[str]): prize names that must be in the catalog.
+                Any missing from the file get the default metadata.
+
+        Returns:
+            The catalog, sorted by prize name.
+        """
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = []
+
+        entries = {entry['name']: entry for entry in entries}
+        for name in names:
+            entries.setdefault(name, {'name': name})
+        return cls([entries[name] for name in sorted(entries)])
+
+    @property
+    def names(self) -> List[str]:
+        """The prize names, in catalog order.
+        """
+        return self._names
+
+    @property
+    def prices(self) -> np.ndarray:
+        """The price of each prize, in catalog order.
+        """
+        return self._prices
+
+    @property
+    def gameplay_digest(self) -> str:
+        """A hash of everything that changes how the game plays out,
+        which is the names, rarities, sizes and shapes, but not the prices.
+        """
+        data = [self._names, self._weights.tolist(), self._scales.tolist(), self._hulls]
+        return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def index(self, name: str) -> Optional[int]:
+        """Gets the position of a prize in the catalog.
+
+        Args:
+            name (str): the prize name.
+
+        Returns:
+            The index, or `None` if the prize isn't in the catalog.
+        """
+        return self._indices.get(name, None)
+
+    def get_price(self, name: str) -> float:
+        """Gets the "dollar equivalent" of a prize.
+
+        Args:
+            name (str): the prize name.
+
+        Returns:
+            The price, or the default price for unknown prizes.
+        """
+        i = self._indices.get(name, None)
+        return self.DEFAULT_PRICE if i is None else float(self._prices[i])
+
+    def get_scale(self, name: str) -> float:
+        """Gets the size of a prize in meters.
+
+        Args:
+            name (str): the prize name.
+
+        Returns:
+            The scale, or the default scale for unknown prizes.
+        """
+        i = self._indices.get(name, None)
+        return self.DEFAULT_SCALE if i is None else float(self._scales[i])
+
+    def get_hull(self, name: str) -> List[Tuple[float, float]]:
+        """Gets the vertices of the collision polygon of a prize.
+
+        Args:
+            name (str): the prize name.
+
+        Returns:
+            A list of coordinates (x, y) in meters.
+        """
+        i = self._indices.get(name, None)
+        return self._get_default_hull(self.DEFAULT_SCALE) if i is None else self._hulls[i]
+
+    def sample(self, rng: random.Random=random) -> str:
+        """Picks a random prize, weighted by rarity, in O(1).
+
+        Uses Vose's alias method: pick a column at random, then either
+        keep it or take its alias with a precomputed probability.
+
+        Args:
+            rng (Random): the random number generator to use.
+
+        Returns:
+            The prize name.
+        """
+        i = rng.randrange(len(self._names))
+        if rng.random() >= self._alias_probs[i]:
+            i = self._aliases[i]
+        return self._names[i]
+
+    def _get_default_hull(self, scale: float) -> List[Tuple[float, float]]:
+        """Gets a regular hexagon that fits a prize of the given scale.
+        """
+        c = 2 * math.pi / self._HULL_SIDES
+        radius = scale / 2
+        return [
+            (radius * math.cos(c * i), radius * math.sin(c * i))
+            for i in range(self._HULL_SIDES)
+        ]
+
+    @staticmethod
+    def _build_alias_table(weights: np.ndarray) -> Tuple[List[float], List[int]]:
+        """Builds the alias table for weighted sampling.
+
+        Returns:
+            A tuple (probabilities, aliases) of lists.
+        """
+        n = len(weights)
+        if n == 0 or weights.sum() <= 0:
+            return [1.0] * n, list(range(n))
+
+        scaled = list(weights * n / weights.sum())
+        probs = [1.0] * n
+        aliases = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            probs[s] = scaled[s]
+            aliases[s] = l
+
+            # The large column gives away what the small one was missing
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+
+        # Whatever is left over is 1 up to rounding errors
+        for i in small + large:
+            probs[i] = 1.0
+        return probs, aliases
@@ -0,0 +1,284 @@
+"""This module contains the `PlayHistory` class, an optional
+SQLite-backed record of every play, for tuning payouts.
+
+Plays and wins are written by a background thread, which also
+keeps aggregate tables up to date. The game only ever reads a
+summary of those aggregates that the writer thread hands over,
+so no queries run on the update or render threads.
+"""
+import logging
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS plays (
+    session INTEGER NOT NULL,
+    play INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (session, play)
+);
+CREATE INDEX IF NOT EXISTS plays_started_at ON plays (started_at);
+
+CREATE TABLE IF NOT EXISTS wins (
+    session INTEGER NOT NULL,
+    play INTEGER,
+    won_at REAL NOT NULL,
+    prize TEXT NOT NULL,
+    time_to_win REAL
+);
+CREATE INDEX IF NOT EXISTS wins_prize ON wins (prize);
+CREATE INDEX IF NOT EXISTS wins_play ON wins (session, play);
+CREATE INDEX IF NOT EXISTS wins_won_at ON wins (won_at);
+
+CREATE TABLE IF NOT EXISTS prize_stats (
+    prize TEXT PRIMARY KEY,
+    wins INTEGER NOT NULL DEFAULT 0,
+    timed_wins INTEGER NOT NULL DEFAULT 0,
+    total_time_to_win REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS hourly_stats (
+    hour INTEGER PRIMARY KEY,
+    plays INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    spent REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS session_stats (
+    session INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    plays INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    spent REAL NOT NULL DEFAULT 0
+);
+'''
+
+
+class HistorySummary(NamedTuple):
+    """Aggregates over the whole play history.
+
+    version: goes up every time the summary changes.
+    plays: the number of plays.
+    wins: the number of prizes won.
+    spent: the total amount spent.
+    prizes: tuples (wins, average time to win in seconds) by prize name,
+        as a read-only mapping.
+    session: the tuple (plays, wins, spent) for the current session.
+    """
+    version: int
+    plays: int
+    wins: int
+    spent: float
+    prizes: Mapping[str, Tuple[int, float]]
+    session: Tuple[int, int, float]
+
+    @property
+    def win_rate(self) -> float:
+        """Prizes won per play, over the whole history.
+        """
+        return self.wins / self.plays if self.plays else 0
+
+
+EMPTY_HISTORY_SUMMARY = HistorySummary(0, 0, 0, 0, MappingProxyType({}), (0, 0, 0))
+
+
+class PlayHistory:
+    _CLOSE = 'close'
+
+    def __init__(self, path: Path, flush_interval: float=1):
+        """Records plays and wins to a SQLite database in the background.
+
+        A play starts when money is spent, and any prizes won before the
+        next play are counted towards it. If the database fails, the error
+        is logged and nothing more is recorded for the rest of the session.
+
+        Args:
+            path (Path): the database file.
+            flush_interval (float): how long to collect records before
+                inserting them in one transaction, in seconds.
+        """
+        self._path = path
+        self._flush_interval = flush_interval
+
+        self._session = int(time.time() * 1000)
+        self._play = 0
+        self._play_start_time: float = None
+
+        self._summary = EMPTY_HISTORY_SUMMARY
+        self._failed = False
+        self._records = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def summary(self) -> HistorySummary:
+        """The latest aggregates. Cheap, safe to read from any thread.
+        """
+        return self._summary
+
+    @property
+    def failed(self) -> bool:
+        """Whether the database failed and recording stopped.
+        """
+        return self._failed
+
+    def start_play(self, cost: float):
+        """Records the start of a play. Never blocks.
+
+        Args:
+            cost (float): how much the play cost.
+        """
+        if self._failed:
+            return
+        self._play += 1
+        self._play_start_time = time.time()
+        self._records.put(('play', (self._session, self._play, self._play_start_time, cost)))
+
+    def record_win(self, prize: str):
+        """Records a prize being won during the current play. Never blocks.
+
+        Args:
+            prize (str): the prize name.
+        """
+        if self._failed:
+            return
+        now = time.time()
+        play = self._play or None
+        time_to_win = None if self._play_start_time is None else now - self._play_start_time
+        self._records.put(('win', (self._session, play, now, prize, time_to_win)))
+
+    def close(self, timeout: float=5):
+        """Writes everything still queued and closes the database.
+
+        Args:
+            timeout (float): the longest to wait, in seconds.
+        """
+        self._records.put((self._CLOSE, None))
+        self._thread.join(timeout)
+
+    def _run(self):
+        """The writer thread. Stops recording if the database fails.
+        """
+        try:
+            db = sqlite3.connect(self._path)
+        except sqlite3.Error:
+            self._fail()
+            return
+
+        try:
+            self._write(db)
+        except sqlite3.Error:
+            self._fail()
+        finally:
+            db.close()
+
+    def _fail(self):
+        """Logs a database error and stops recording. Only call
+        from the writer thread, while handling the error.
+        """
+        logging.getLogger(__name__).exception('Play history failed, not recording plays anymore: %s', self._path)
+        self._failed = True
+
+        # Nobody is going to write these
+        while True:
+            try:
+                self._records.get_nowait()
+            except queue.Empty:
+                break
+
+    def _write(self, db: sqlite3.Connection):
+        """The writer loop.
+        """
+        db.executescript(_SCHEMA)
+        with db:
+            db.execute(
+                'INSERT OR IGNORE INTO session_stats (session, started_at) VALUES (?, ?)',
+                (self._session, time.time()),
+            )
+        self._refresh_summary(db)
+
+        closing = False
+        while not closing:
+            batch = [self._records.get()]
+
+            # Give more records a moment to arrive so they share a transaction
+            deadline = time.time() + self._flush_interval
+            while batch[-1][0] != self._CLOSE:
+                try:
+                    batch.append(self._records.get(timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+
+            with db:
+                for kind, record in batch:
+                    if kind == 'play':
+                        self._insert_play(db, *record)
+                    elif kind == 'win':
+                        self._insert_win(db, *record)
+                    else:
+                        closing = True
+            self._refresh_summary(db)
+
+    @staticmethod
+    def _insert_play(db: sqlite3.Connection, session: int, play: int, started_at: float, cost: float):
+        """Inserts a play and updates the aggregates.
+        """
+        db.execute('INSERT INTO plays VALUES (?, ?, ?, ?)', (session, play, started_at, cost))
+        db.execute(
+            '''INSERT INTO hourly_stats (hour, plays, spent) VALUES (?, 1, ?)
+            ON CONFLICT (hour) DO UPDATE SET plays = plays + 1, spent = spent + excluded.spent''',
+            (int(started_at // 3600), cost),
+        )
+        db.execute(
+            'UPDATE session_stats SET plays = plays + 1, spent = spent + ? WHERE session = ?',
+            (cost, session),
+        )
+
+    @staticmethod
+    def _insert_win(db: sqlite3.Connection, session: int, play: int, won_at: float, prize: str, time_to_win: float):
+        """Inserts a win and updates the aggregates.
+        """
+        db.execute('INSERT INTO wins VALUES (?, ?, ?, ?, ?)', (session, play, won_at, prize, time_to_win))
+        db.execute(
+            '''INSERT INTO prize_stats (prize, wins, timed_wins, total_time_to_win) VALUES (?, 1, ?, ?)
+            ON CONFLICT (prize) DO UPDATE SET
+                wins = wins + 1,
+                timed_wins = timed_wins + excluded.timed_wins,
+                total_time_to_win = total_time_to_win + excluded.total_time_to_win''',
+            (prize, int(time_to_win is not None), time_to_win or 0),
+        )
+        db.execute(
+            '''INSERT INTO hourly_stats (hour, wins) VALUES (?, 1)
+            ON CONFLICT (hour) DO UPDATE SET wins = wins + 1''',
+            (int(won_at // 3600),),
+        )
+        db.execute('UPDATE session_stats SET wins = wins + 1 WHERE session = ?', (session,))
+
+    def _refresh_summary(self, db: sqlite3.Connection):
+        """Reads the aggregate tables into a new summary and swaps it in.
+        """
+        plays, spent = db.execute('SELECT COALESCE(SUM(plays), 0), COALESCE(SUM(spent), 0) FROM session_stats').fetchone()
+        prizes = {
+            prize: (wins, total_time / timed_wins if timed_wins else 0)
+            for prize, wins, timed_wins, total_time in db.execute(
+                'SELECT prize, wins, timed_wins, total_time_to_win FROM prize_stats'
+            )
+        }
+        session = db.execute(
+            'SELECT plays, wins, spent FROM session_stats WHERE session = ?',
+            (self._session,),
+        ).fetchone() or (0, 0, 0)
+
+        self._summary = HistorySummary(
+            version=self._summary.version + 1,
+            plays=plays,
+            wins=sum(wins for wins, _ in prizes.values()),
+            spent=spent,
+            prizes=MappingProxyType(prizes),
+            session=tuple(session),
+        )
@@ -0,0 +1,198 @@
+"""This module contains the `Journal` class, which makes the
+config crash-safe.
+
+Every change to the config is appended to a journal file by
+a background thread, so a crash or power cut loses at most a
+moment of play. Every now and then the journal is compacted
+into the config snapshot, which is always replaced atomically.
+"""
+import copy
+import json
+import os
+from pathlib import Path
+import queue
+import threading
+import time
+
+
+def apply_event(config: dict, event: dict):
+    """Applies a single journal event to a config dict.
+
+    Args:
+        config (dict): the config, updated in place.
+        event (dict): the event.
+    """
+    if event['type'] == 'prize':
+        prizes = config.setdefault('prizes', {})
+        prizes[event['name']] = prizes.get(event['name'], 0) + 1
+    elif event['type'] == 'spend':
+        config['spent'] = config.get('spent', 0) + event['amount']
+
+
+def write_atomic(path: Path, data: dict):
+    """Writes a dict as JSON so that the file either has the old
+    contents or the new ones, even if the power goes out halfway.
+
+    Args:
+        path (Path): the file to write.
+        data (dict): the data to write.
+    """
+    tmp_path = Path(str(path) + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def replay(config: dict, journal_path: Path) -> int:
+    """Applies the events in a journal that aren't in a config yet.
+
+    Events are numbered, and the config remembers the number of the
+    last event it includes (`journal_seq`), so events are never
+    applied twice. A half-written last line from a crash is cut off
+    the file, so new events don't get appended onto the end of it.
+
+    Args:
+        config (dict): the config loaded from the snapshot, updated in place.
+        journal_path (Path): the journal file.
+
+    Returns:
+        The number of the last event applied.
+    """
+    seq = config.get('journal_seq', 0)
+    try:
+        with open(journal_path, 'r+b') as f:
+            end = 0 # just past the last good line
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+                if event['seq'] > seq:
+                    apply_event(config, event)
+                    seq = event['seq']
+
+            if end < f.seek(0, os.SEEK_END):
+                f.truncate(end)
+    except FileNotFoundError:
+        pass
+
+    config['journal_seq'] = seq
+    return seq
+
+
+class Journal:
+    _SYNC = object()
+
+    def __init__(self, config: dict, snapshot_path: Path, journal_path: Path, flush_interval: float=0.5, compact_interval: float=60):
+        """Appends config changes to a journal file in the background.
+
+        `append()` only puts the event in a queue, so it never blocks on
+        disk I/O. The writer thread writes events in batches with one
+        fsync per batch, and keeps its own copy of the config which it
+        regularly writes to the snapshot file before emptying the journal.
+
+        Args:
+            config (dict): the config, already replayed. It's copied, the
+                journal never touches the original.
+            snapshot_path (Path): the config snapshot file.
+            journal_path (Path): the journal file.
+            flush_interval (float): how long to collect events before
+                writing them, in seconds.
+            compact_interval (float): how often to compact the journal
+                into the snapshot, in seconds.
+        """
+        self._state = copy.deepcopy(config)
+        self._seq = self._state.get('journal_seq', 0)
+        self._snapshot_path = snapshot_path
+        self._journal_path = journal_path
+        self._flush_interval = flush_interval
+        self._compact_interval = compact_interval
+
+        self._events = queue.Queue()
+        self._thread: threading.Thread = None
+
+    def append(self, event: dict):
+        """Queues an event to be written. Never blocks.
+
+        Only call from one thread at a time (the update thread).
+
+        Args:
+            event (dict): the event, see `apply_event()`.
+        """
+        self._seq += 1
+        self._events.put({**event, 'seq': self._seq})
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def sync(self, timeout: float=5):
+        """Blocks until every queued event is written and
+        compacted into the snapshot.
+
+        Args:
+            timeout (float): the longest to wait, in seconds.
+        """
+        if self._thread is None:
+            # Nothing was ever appended, just write the snapshot
+            write_atomic(self._snapshot_path, self._state)
+            return
+
+        done = threading.Event()
+        self._events.put((self._SYNC, done))
+        done.wait(timeout)
+
+    def _run(self):
+        """The writer loop.
+        """
+        last_compact_time = time.time()
+        dirty = False
+
+        with open(self._journal_path, 'a') as journal:
+            while True:
+                batch = [self._events.get()]
+
+                # Give more events a moment to arrive so they share an fsync
+                deadline = time.time() + self._flush_interval
+                while True:
+                    try:
+                        batch.append(self._events.get(timeout=max(0, deadline - time.time())))
+                    except queue.Empty:
+                        break
+
+                sync_requests = [item[1] for item in batch if isinstance(item, tuple)]
+                events = [item for item in batch if not isinstance(item, tuple)]
+
+                if events:
+                    journal.write(''.join(json.dumps(event) + '\n' for event in events))
+                    journal.flush()
+                    os.fsync(journal.fileno())
+
+                    for event in events:
+                        apply_event(self._state, event)
+                        self._state['journal_seq'] = event['seq']
+                    dirty = True
+
+                if dirty and (sync_requests or time.time() - last_compact_time > self._compact_interval):
+                    self._compact(journal)
+                    last_compact_time = time.time()
+                    dirty = False
+
+                for done in sync_requests:
+                    done.set()
+
+    def _compact(self, journal):
+        """Writes the snapshot and empties the journal.
+
+        If we crash between the two, the events left in the journal
+        are already in the snapshot and get skipped on replay.
+        """
+        write_atomic(self._snapshot_path, self._state)
+        journal.truncate(0)
+        journal.flush()
+        os.fsync(journal.fileno())
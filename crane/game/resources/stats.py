@@ -0,0 +1,118 @@
+"""This module contains the `PrizeStats` class, which keeps
+running totals of the prizes won and money spent.
+"""
+import numpy as np
+
+from crane.game.resources.catalog import PrizeCatalog
+
+
+class PrizeStats:
+
+    def __init__(self, config: dict, catalog: PrizeCatalog):
+        """Running totals over the prize counts and money spent in
+        a config dict. Every change goes through this object, which
+        keeps the totals and the config in sync in O(1).
+
+        The `version` goes up on every change, so anything showing the
+        stats can tell when they need redrawing.
+
+        Counts are also kept in an array in catalog order, so the total
+        price of prizes won is one dot product with the catalog prices.
+
+        Args:
+            config (dict): the config dict, updated in place.
+            catalog (PrizeCatalog): the prize catalog, for prices.
+        """
+        self._config = config
+        self._catalog = catalog
+        self._version = 0
+
+        prizes = config.setdefault('prizes', {})
+        config.setdefault('spent', 0)
+
+        self._counts = np.zeros(len(catalog), dtype=np.int64)
+        self._uncataloged_won = 0 # prizes in old configs that aren't in the catalog anymore
+        for name, n in prizes.items():
+            i = catalog.index(name)
+            if i is None:
+                self._uncataloged_won += n * catalog.get_price(name)
+            else:
+                self._counts[i] = n
+
+        self._total_prizes = sum(prizes.values())
+        self._unique_prizes = sum(1 for n in prizes.values() if n > 0)
+        self._total_won: float = None # computed on demand, see `total_won`
+
+    @property
+    def version(self) -> int:
+        """A number that goes up every time the stats change.
+        """
+        return self._version
+
+    @property
+    def total_prizes(self) -> int:
+        """The number of prizes won across all types.
+        """
+        return self._total_prizes
+
+    @property
+    def unique_prizes(self) -> int:
+        """The number of types of prizes won at least once.
+        """
+        return self._unique_prizes
+
+    @property
+    def total_won(self) -> float:
+        """The total price of prizes won.
+        """
+        if self._total_won is None:
+            self._total_won = float(self._counts @ self._catalog.prices) + self._uncataloged_won
+        return self._total_won
+
+    @property
+    def total_spent(self) -> float:
+        """The total amount spent playing.
+        """
+        return self._config['spent']
+
+    def get_count(self, name: str) -> int:
+        """Gets the number of prizes won of a given type.
+
+        Args:
+            name (str): the prize name.
+
+        Returns:
+            The number of prizes won.
+        """
+        return self._config['prizes'].get(name, 0)
+
+    def increment_prize(self, name: str):
+        """Records a prize being won.
+
+        Args:
+            name (str): the prize name.
+        """
+        prizes = self._config['prizes']
+        count = prizes.get(name, 0) + 1
+        prizes[name] = count
+
+        i = self._catalog.index(name)
+        if i is None:
+            self._uncataloged_won += self._catalog.get_price(name)
+        else:
+            self._counts[i] += 1
+
+        self._total_prizes += 1
+        if count == 1:
+            self._unique_prizes += 1
+        self._total_won = None
+        self._version += 1
+
+    def use_money(self, amount: float):
+        """Records money being spent.
+
+        Args:
+            amount (float): the amount spent.
+        """
+        self._config['spent'] += amount
+        self._version += 1
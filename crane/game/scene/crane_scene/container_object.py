@@ -1,11 +1,15 @@
 import enum
+from typing import Callable, List, Tuple
 
 import Box2D
 import pygame
 
+from crane.engine.dirty_rects import Mark
+from crane.engine.input import InputState, get_input
 from crane.engine.scene.scene_object import PhysicsObject
 from crane import globals
 from crane.game.resources import use_money
+from crane.game.scene.crane_scene.params import CraneParams
 
 
 class CraneState(enum.Enum):
@@ -29,8 +33,18 @@ class CraneState(enum.Enum):
 class ContainerObject(PhysicsObject):
     _ROPE_COLOR = (135, 86, 56)
     _CLASP_COLOR = (85, 86, 82)
-
-    def __init__(self, world: Box2D.b2World, center=globals.SCREEN_CENTER_M, dimensions=(20, 20)):
+    _SETTLE_SPEED = 0.05 # m/s or rad/s, slower than this counts as hanging still
+    _SETTLE_TIME = 1 # seconds to hang still before the crane is put to sleep
+
+    def __init__(
+        self,
+        world: Box2D.b2World,
+        center=globals.SCREEN_CENTER_M,
+        dimensions=(20, 20),
+        params: CraneParams=None,
+        input_state: InputState=None,
+        spend: Callable[[], None]=None,
+    ):
         """A controllable physics object that has all of the claw stuff.
 
         I was lazy while writing this, so this class does too much :'(
@@ -39,10 +53,22 @@ class ContainerObject(PhysicsObject):
             world (b2World): the world to add objects to.
             center (tuple): center of the claw machine.
             dimensions (tuple): size of the claw machine as a tuple (w, h).
+            params (CraneParams): the physics parameters, or `None`
+                for the defaults.
+            input_state (InputState): where to read the controls from,
+                or `None` for the keyboard.
+            spend (Callable[[], None]): called to pay for every play, or
+                `None` to take it out of the player's stats.
         """
         super(ContainerObject, self).__init__(world)
+        params = params or CraneParams()
+        self._params = params
+        self._input = input_state or get_input()
+        self._spend = spend or use_money
 
         self._crane_state = CraneState.Ready
+        self._still_time = 0 # how long the crane has been hanging still
+        self._center = center
         self._dimensions = dimensions
 
         # ------------------- Add big box -------------------
@@ -53,6 +79,7 @@ class ContainerObject(PhysicsObject):
         self._support_thickness = 0.25
         drop_zone_width = 4
         drop_separator_height = self._dimensions[1] / 4
+        self._drop_zone_width = drop_zone_width
 
         bl = world.CreateStaticBody(position=(cx - hw + self._boundary_thickness, cy))
         bl.CreatePolygonFixture(box=(self._boundary_thickness, hh), friction=0.9)
@@ -66,20 +93,24 @@ class ContainerObject(PhysicsObject):
         bs.CreatePolygonFixture(box=(self._boundary_thickness, drop_separator_height), friction=0.9)
         self._box_bodies = [bl, br, bt, bb, bs]
 
+        # Sensor under the drop chute, anything that touches it has been won
+        dz = world.CreateStaticBody(position=(cx - hw + drop_zone_width / 2, cy - hh - 1))
+        self._drop_zone = dz.CreatePolygonFixture(box=(drop_zone_width / 2, 0.5), isSensor=True)
+
         # ------------------- Add rope -------------------
         # Adapted from PyBox2D examples
         support_size = (self._support_thickness, self._support_thickness)
         self._support = world.CreateKinematicBody(position=(cx, cy + hh - self._boundary_thickness * 2 - support_size[1]))
         self._support.CreatePolygonFixture(box=support_size, friction=0.5)
 
-        rope_len = 2
-        rope_elems = 20
+        rope_len = params.rope_length
+        rope_elems = params.rope_segments
         rope_thickness = 0.125
         rope_elem_len = rope_len / rope_elems
         shape = Box2D.b2PolygonShape(box=(rope_thickness, rope_elem_len))
         fd = Box2D.b2FixtureDef(
             shape=shape,
-            friction=0.9,
+            friction=params.rope_friction,
             density=1,
             categoryBits=0x0001,
             maskBits=(0xFFFF & ~0x0002),
@@ -92,7 +123,7 @@ class ContainerObject(PhysicsObject):
             body = self._world.CreateDynamicBody(
                 position=(cx, y - i * rope_elem_len * 2),
                 fixtures=fd,
-                angularDamping=1000, # high number keeps rope somewhat steady
+                angularDamping=params.rope_damping, # high number keeps rope somewhat steady
             )
 
             self._world.CreateRevoluteJoint(
@@ -116,11 +147,11 @@ class ContainerObject(PhysicsObject):
         arm_rb_verts = [(arm_w, -arm_h/2), (arm_w-arm_t, -arm_h/2), (0, -arm_h)]
 
         self._arm_left = world.CreateDynamicBody(position=(cx, arm_y), angularDamping=10)
-        self._arm_left.CreatePolygonFixture(vertices=arm_lt_verts, friction=0.5, density=1)
-        self._arm_left.CreatePolygonFixture(vertices=arm_lb_verts, friction=0.5, density=1)
+        self._arm_left.CreatePolygonFixture(vertices=arm_lt_verts, friction=params.claw_friction, density=1)
+        self._arm_left.CreatePolygonFixture(vertices=arm_lb_verts, friction=params.claw_friction, density=1)
         self._arm_right = world.CreateDynamicBody(position=(cx, arm_y), angularDamping=10)
-        self._arm_right.CreatePolygonFixture(vertices=arm_rt_verts, friction=0.5, density=1)
-        self._arm_right.CreatePolygonFixture(vertices=arm_rb_verts, friction=0.5, density=1)
+        self._arm_right.CreatePolygonFixture(vertices=arm_rt_verts, friction=params.claw_friction, density=1)
+        self._arm_right.CreatePolygonFixture(vertices=arm_rb_verts, friction=params.claw_friction, density=1)
 
         self._world.CreateRevoluteJoint(
             bodyA=body,
@@ -137,23 +168,161 @@ class ContainerObject(PhysicsObject):
 
         self._claw_bodies = [self._arm_left, self._arm_right]
 
+        # Where all the moving parts start, for resetting the crane
+        self._initial_transforms = [
+            (body, tuple(body.position), body.angle)
+            for body in [self._support] + self._rope_bodies + self._claw_bodies
+        ]
+
+        # Everything to draw, in order, and the color of each body.
+        # The big box is static, so the physics scene draws it for us
+        self._render_bodies = self._rope_bodies + self._claw_bodies + [self._support]
+        self._render_colors = (
+            [self._ROPE_COLOR] * len(self._rope_bodies)
+            + [self._CLASP_COLOR] * len(self._claw_bodies)
+            + [(255, 255, 255)]
+        )
+
+    @property
+    def crane_state(self) -> CraneState:
+        """Get/set the state of the crane.
+        """
+        return self._crane_state
+
+    @crane_state.setter
+    def crane_state(self, crane_state: CraneState):
+        self._crane_state = crane_state
+
+    @property
+    def still_time(self) -> float:
+        """Get/set how long the crane has been hanging still, in seconds.
+        """
+        return self._still_time
+
+    @still_time.setter
+    def still_time(self, still_time: float):
+        self._still_time = still_time
+
+    @property
+    def center(self) -> tuple:
+        """Gets the center of the claw machine as a tuple (x, y) in meters.
+        """
+        return self._center
+
+    @property
+    def dimensions(self) -> tuple:
+        """Gets the size of the claw machine as a tuple (w, h) in meters.
+        """
+        return self._dimensions
+
+    @property
+    def params(self) -> CraneParams:
+        """Gets the physics parameters.
+        """
+        return self._params
+
+    @property
+    def support(self) -> Box2D.b2Body:
+        """Gets the body the rope hangs from, which is what moves
+        the claw around.
+        """
+        return self._support
+
+    @property
+    def arms(self) -> Tuple[Box2D.b2Body, Box2D.b2Body]:
+        """Gets the claw arm bodies as a tuple (left, right).
+        """
+        return self._arm_left, self._arm_right
+
+    @property
+    def drop_zone(self) -> Box2D.b2Fixture:
+        """Gets the sensor fixture under the drop chute.
+        """
+        return self._drop_zone
+
+    def in_play_area(self, position: tuple) -> bool:
+        """Checks whether a point is inside the machine, and not in
+        the drop chute.
+
+        Args:
+            position (tuple): the point as a tuple (x, y) in meters.
+
+        Returns:
+            `True` if the point is in the play area.
+        """
+        x, y = position
+        cx, cy = self._center
+        hw, hh = self._dimensions[0] / 2, self._dimensions[1] / 2
+        return cx - hw + self._drop_zone_width < x < cx + hw and cy - hh < y < cy + hh
+
+    def reset(self):
+        """Moves the crane back to where it started, without
+        creating any new bodies.
+        """
+        self._crane_state = CraneState.Ready
+        self._still_time = 0
+        for body, position, angle in self._initial_transforms:
+            body.transform = (position, angle)
+            body.linearVelocity = (0, 0)
+            body.angularVelocity = 0
+            body.awake = True
+
+    def is_idle(self) -> bool:
+        """Checks whether the crane is waiting at the top, not moving.
+
+        Returns:
+            `True` if the crane is idle.
+        """
+        return self._crane_state == CraneState.Ready and self._support.linearVelocity.lengthSquared == 0
+
     def update(self, dt: float):
         """Updates the object. Handles movement of the claw.
 
         Args:
             dt (float): time since last update.
         """
-        self._update_support()
+        driving = self._update_support()
+        self._settle(dt, driving)
+
+    def _settle(self, dt: float, driving: bool):
+        """Puts the rope and claw to sleep once they've been hanging
+        still at the top for a while.
 
-    def _update_support(self):
-        """Handles moving the claw using the keyboard.
+        The bottom of the rope jitters a tiny bit forever, just over
+        Box2D's sleep tolerance, which would keep the crane (and the
+        engine, see `is_idle()`) awake for good.
+
+        Args:
+            dt (float): time since last update.
+            driving (bool): whether the crane is being moved or the claw opened.
+        """
+        bodies = self._render_bodies
+        speed = self._SETTLE_SPEED
+        if driving or self._crane_state != CraneState.Ready or any(
+            body.linearVelocity.lengthSquared > speed ** 2 or abs(body.angularVelocity) > speed
+            for body in bodies
+        ):
+            self._still_time = 0
+            return
+
+        self._still_time += dt
+        if self._still_time >= self._SETTLE_TIME:
+            for body in bodies:
+                body.awake = False
+
+    def _update_support(self) -> bool:
+        """Handles moving the claw using the keyboard (or whatever
+        input state it was given).
+
+        Returns:
+            Whether the crane is being moved or the claw opened.
         """
-        vx_mag = 3
+        vx_mag = self._params.move_speed
         vy_mag = 3
-        torque_mag = 8
+        torque_mag = self._params.claw_torque
 
         pos = self._support.position
-        keys = pygame.key.get_pressed()
+        input_state = self._input
 
         # Range of motion for support
         min_x = globals.SCREEN_CENTER_M[0] - self._dimensions[0] / 2 + self._boundary_thickness * 2 + self._support_thickness
@@ -165,6 +334,7 @@ class ContainerObject(PhysicsObject):
         # and which keys can be used.
         torque = 0
         vx, vy = 0, 0
+        was_ready = self._crane_state == CraneState.Ready
 
         # Vertical movement
         if self._crane_state == CraneState.Dropping:
@@ -183,26 +353,31 @@ class ContainerObject(PhysicsObject):
                 self._crane_state = CraneState.Ready
 
         elif self._crane_state == CraneState.Ready:
-            if keys[pygame.K_d] and pos[0] < max_x:
+            if input_state.is_pressed(pygame.K_d) and pos[0] < max_x:
                 vx = vx_mag
-            elif keys[pygame.K_a] and pos[0] > min_x:
+            elif input_state.is_pressed(pygame.K_a) and pos[0] > min_x:
                 vx = -vx_mag
 
-            if keys[pygame.K_SPACE]:
+            if input_state.is_pressed(pygame.K_SPACE):
                 torque = torque_mag
 
         # Horizontal movement
-        if keys[pygame.K_s] and self._crane_state == CraneState.Ready:
+        if input_state.is_pressed(pygame.K_s) and self._crane_state == CraneState.Ready:
             self._crane_state = CraneState.Dropping
-            use_money()
+            self._spend()
 
-        elif keys[pygame.K_w] and self._crane_state in [CraneState.Dropping, CraneState.Grabbing]:
+        elif input_state.is_pressed(pygame.K_w) and self._crane_state in [CraneState.Dropping, CraneState.Grabbing]:
             self._crane_state = CraneState.Rising
 
         # Apply torque and set velocity of the support
         self._support.linearVelocity = vx, vy
-        self._arm_left.ApplyTorque(-torque, True)
-        self._arm_right.ApplyTorque(torque, True)
+        # Applying any torque wakes the arms up, even 0, which keeps them
+        # awake for the whole grab. Only a crane waiting at the top may sleep
+        if torque or not was_ready or self._crane_state != CraneState.Ready:
+            self._arm_left.ApplyTorque(-torque, True)
+            self._arm_right.ApplyTorque(torque, True)
+
+        return bool(vx or vy or torque)
 
     def render(self, surface: pygame.surface.Surface):
         """Renders all the components of this object.
@@ -210,34 +385,52 @@ class ContainerObject(PhysicsObject):
         Args:
             surface (Surface): the surface to render to.
         """
-        # Big box
-        for body in self._box_bodies:
-            self.render_body(surface, body)
+        # Rope, claw and support box all get transformed in one go
+        self.render_bodies(surface, self._render_bodies, self._render_colors)
 
-        # Rope
-        for body in self._rope_bodies:
-            self.render_body(surface, body, self._ROPE_COLOR)
+        # Line connecting support to top of big box
+        pygame.draw.rect(
+            surface,
+            (255, 255, 255),
+            self._get_line_rect(surface)
+        )
 
-        # Claw
-        for body in self._claw_bodies:
-            self.render_body(surface, body, self._CLASP_COLOR)
+    def get_marks(self, surface: pygame.surface.Surface) -> List[Mark]:
+        """Gets the area covered by the rope, claw, support and the line
+        above it, which changes whenever any of them moves.
 
-        # Support box
-        self.render_body(surface, self._support)
+        Args:
+            surface (Surface): the surface that will be rendered to.
 
-        # Line connecting support to top of big box
+        Returns:
+            The marks.
+        """
+        rect = self.get_bodies_rect(surface, self._render_bodies)
+        if rect is None:
+            return []
+
+        x, y, w, h = self._get_line_rect(surface)
+        rect = pygame.Rect(rect).union((int(x), int(y), int(w) + 2, int(h) + 2))
+        token = tuple(self.get_body_transform(body) for body in self._render_bodies)
+        return [(tuple(rect), token)]
+
+    def _get_line_rect(self, surface: pygame.surface.Surface) -> tuple:
+        """Gets the line connecting the support to the top of the big box.
+
+        Args:
+            surface (Surface): the surface to render to.
+
+        Returns:
+            The rect as a tuple (x, y, w, h) of pixels.
+        """
+        support_x, support_y, _ = self.get_body_transform(self._support)
         verts = [
-            self._support.position[0] - self._support_thickness / 2,
+            support_x - self._support_thickness / 2,
             surface.get_height() / globals.PIXELS_PER_METER - (globals.SCREEN_CENTER_M[1] + self._dimensions[1] / 2),
             self._support_thickness,
-            globals.SCREEN_CENTER_M[1] + self._dimensions[1] / 2 - self._support.position[1],
+            globals.SCREEN_CENTER_M[1] + self._dimensions[1] / 2 - support_y,
         ]
-        verts = [
+        return tuple(
             vert * globals.PIXELS_PER_METER
             for vert in verts
-        ]
-        pygame.draw.rect(
-            surface,
-            (255, 255, 255),
-            tuple(verts)
         )
@@ -1,52 +1,232 @@
+import random
+import struct
+from typing import Callable, List, Optional
+
+import numpy as np
 import pygame
 
+from crane.engine.dirty_rects import Mark
+from crane.engine.input import InputState
 from crane.engine.scene.scene import PhysicsScene
 from crane.game.resources import (
+    get_catalog,
+    get_history_summary,
     get_prize_names,
+    get_stats_version,
     get_total_prizes,
     get_total_spent,
     get_total_won,
     get_unique_prizes,
     increment_prize,
+    is_history_enabled,
 )
-from crane.game.scene.crane_scene.container_object import ContainerObject
+from crane.game.scene.crane_scene.container_object import ContainerObject, CraneState
+from crane.game.scene.crane_scene.drop_zone import DropZoneListener
+from crane.game.scene.crane_scene.params import CraneParams
+from crane.game.scene.crane_scene.pile import get_pile_library
 from crane.game.scene.crane_scene.prize_adder import PrizeAdder
 from crane.game.scene.crane_scene.prize_object import PrizeObject
-from crane.helpers import draw_text
+from crane.game.scene.crane_scene.prize_pool import PrizePool
+from crane.helpers import render_text
 
 
 class CraneScene(PhysicsScene):
+    _EXTRA_STATE_HEADER = struct.Struct('<Bdid') # crane state, still time, prizes left to add, countdown
 
-    def __init__(self, num_prizes=30):
+    def __init__(
+        self,
+        num_prizes=30,
+        params: CraneParams=None,
+        input_state: InputState=None,
+        rng: random.Random=None,
+        spend: Callable[[], None]=None,
+        win: Callable[[str], None]=None,
+    ):
         """A physics scene containing the crane and prizes.
+
+        Args:
+            num_prizes (int): how many prizes to fill the machine with.
+            params (CraneParams): the physics parameters, or `None`
+                for the defaults.
+            input_state (InputState): where the crane reads its controls
+                from, or `None` for the keyboard.
+            rng (Random): the random number generator for prizes and
+                piles, or `None` for the game's.
+            spend (Callable[[], None]): called to pay for every play, or
+                `None` to take it out of the player's stats.
+            win (Callable[[str], None]): called with the name of every
+                prize won, or `None` to add it to the player's stats.
         """
         super(CraneScene, self).__init__()
+        self._num_prizes = num_prizes
+        self._params = params or CraneParams()
+        self._rng = rng
+        self._win = win or increment_prize
+
+        # Names of the prizes won during the last update
+        self._won_prizes: List[str] = []
 
-        # Add prizes
-        prize_adder = PrizeAdder(self)
-        prize_adder.add_prizes(num_prizes)
-        self.add(prize_adder)
+        # Add prizes, with enough bodies up front for a full machine
+        self._prize_pool = PrizePool(self._world, num_prizes, rng, params)
+        self._prize_adder = PrizeAdder(self, self._prize_pool)
+        self.add(self._prize_adder)
+        self._fill()
 
         # Add crane
-        self.add(ContainerObject(self._world))
+        self._container = ContainerObject(self._world, params=params, input_state=input_state, spend=spend)
+        self.add(self._container)
 
-    def update(self, dt: float):
-        """Updates the crane scene and its children.
+        # Watch the drop chute for prizes falling out
+        self._drop_zone_listener = DropZoneListener(self._container.drop_zone)
+        self._world.contactListener = self._drop_zone_listener
+
+        # Stats text shown at the top of the screen, as tuples (text, pos).
+        # Built on the update thread and replaced as a whole every tick.
+        self._stat_text = ()
+        self._stat_version = None
+
+        # The stats text picked by `get_marks()` for the next frame
+        self._frame_stat_text: tuple = None
+
+    @property
+    def container(self) -> ContainerObject:
+        """Gets the crane machine.
+        """
+        return self._container
+
+    @property
+    def prizes(self) -> List[PrizeObject]:
+        """Gets the prizes in the machine, in the order they were added.
+        """
+        return [object for object in self._children if isinstance(object, PrizeObject)]
+
+    @property
+    def won_prizes(self) -> List[str]:
+        """Gets the names of the prizes won during the last update.
+        """
+        return self._won_prizes
+
+    def reset(self):
+        """Puts the crane back and refills the machine with new prizes.
+
+        All the bodies get reused, so nothing is allocated in Box2D
+        as long as the new prizes have the same hulls as the old ones.
+        """
+        for object in list(self._children):
+            if isinstance(object, PrizeObject):
+                self.remove(object)
+                self._prize_pool.release(object)
+
+        self._container.reset()
+        self._prize_adder.cancel()
+        self._fill()
+
+    def _fill(self):
+        """Fills the machine with prizes. A pre-settled pile is loaded
+        if there is one, with new prizes picked for its bodies, and any
+        prizes missing from it get dropped in.
+        """
+        pile = get_pile_library().choose(self._num_prizes, self._params, self._rng)
+        with self._deferring_changes():
+            for hull, x, y, angle, awake in pile:
+                prize = self._prize_pool.acquire_hull(hull)
+                prize.place((x, y), angle, awake)
+                self.add(prize)
+
+        self._prize_adder.add_prizes(self._num_prizes - len(pile))
+
+    def _get_all_prizes(self) -> List[PrizeObject]:
+        """Gets every prize with a body in the world, parked or
+        not, in world order.
+        """
+        return [body.userData for body in self._world.bodies if isinstance(body.userData, PrizeObject)]
+
+    def _save_extra_state(self) -> bytes:
+        """Saves the crane state, the prizes still to be dropped
+        in and which prize each body is.
+        """
+        catalog = get_catalog()
+        num_prizes, countdown = self._prize_adder.state
+        header = self._EXTRA_STATE_HEADER.pack(self._container.crane_state.value, self._container.still_time, num_prizes, countdown)
+        names = np.array([catalog.index(prize.prize_name) for prize in self._get_all_prizes()], dtype='<i2')
+        return header + names.tobytes()
+
+    def _restore_extra_state(self, state: bytes):
+        """Restores the state saved by `_save_extra_state()`. Prizes
+        whose bodies are active go back in the scene, and the rest
+        go back in the pool.
+        """
+        crane_state, still_time, num_prizes, countdown = self._EXTRA_STATE_HEADER.unpack_from(state)
+        self._container.crane_state = CraneState(crane_state)
+        self._container.still_time = still_time
+        self._prize_adder.state = (num_prizes, countdown)
+
+        names = get_catalog().names
+        indices = np.frombuffer(state, dtype='<i2', offset=self._EXTRA_STATE_HEADER.size).tolist()
+        for prize, i in zip(self._get_all_prizes(), indices):
+            prize.prize_name = names[i]
+            if prize.body.active and prize not in self._children:
+                self._prize_pool.claim(prize)
+                self.add(prize)
+            elif not prize.body.active and prize in self._children:
+                self.remove(prize)
+                self._prize_pool.release(prize)
+
+        # Anything that touched the drop zone is from before the restore
+        self._drop_zone_listener.pop_entered()
+
+    def _on_step(self):
+        """Removes any prizes that fell into the drop zone during
+        the last physics step and increments the prize count.
+        """
+        for body in self._drop_zone_listener.pop_entered():
+            # If a prize falls down the chute, we have a winner!
+            prize = body.userData
+            if isinstance(prize, PrizeObject) and prize in self._children:
+                self._win(prize.prize_name)
+                self._won_prizes.append(prize.prize_name)
+                self.remove(prize)
+                self._prize_pool.release(prize)
 
-        Removes any prizes that go off-screen and increments
-        the prize count.
+    def update(self, dt: float):
+        """Updates the crane scene and its children, then
+        refreshes the stats text.
 
         Args:
             dt (float): the time in seconds since the last update
         """
+        if self._won_prizes:
+            self._won_prizes = []
         super().update(dt)
 
-        for object in self._children:
-            # If a prize falls off the screen, we have a winner!
-            if isinstance(object, PrizeObject) and object._body.position[1] < 0:
-                increment_prize(object._prize_name)
-                self.remove(object)
+        # Only rebuild the text when the stats actually changed
+        version = (get_stats_version(), get_history_summary().version)
+        if version != self._stat_version:
+            self._stat_version = version
+            self._stat_text = self._get_stat_text()
+
+    def _get_stat_text(self) -> tuple:
+        """Builds the stats text shown at the top of the screen.
 
+        Returns:
+            A tuple of (text, pos) tuples.
+        """
+        spent = get_total_spent()
+        won = get_total_won()
+        ratio = 1 if spent == 0 else won / spent
+
+        text = (
+            (f'Unique Pokemon: {get_unique_prizes()} / {len(get_prize_names())}', (10, 0)),
+            (f'Total Pokemon: {get_total_prizes()}', (10, 40)),
+            (f'Spent: ${spent:.2f}', (300, 0)),
+            (f'Won: ${won:.2f}', (300, 40)),
+            (f'Ratio: {ratio:.2f}', (300, 80)),
+        )
+
+        # Only the play history knows how many plays there were
+        if is_history_enabled():
+            text += ((f'Win Rate: {get_history_summary().win_rate:.0%}', (10, 80)),)
+        return text
 
     def _draw_stat_text(self, surface: pygame.surface.Surface, text: str, pos: tuple):
         """Draws the given text onto a surface.
@@ -56,13 +236,23 @@ class CraneScene(PhysicsScene):
             text (str): the text to show.
             pos (Tuple[int, int]): the position to draw the text at.
         """
-        draw_text(
-            surface,
+        surface.blit(self._render_stat_text(text), pos)
+
+    def _render_stat_text(self, text: str) -> pygame.surface.Surface:
+        """Renders the given text, or gets it from the cache.
+
+        Args:
+            text (str): the text to show.
+
+        Returns:
+            The text as a pygame Surface.
+        """
+        return render_text(
             text=text,
             font_name='Comic Sans MS',
             size=20,
             color=(255, 255, 255),
-            pos=pos,
+            use_atlas=True, # the numbers keep changing
         )
 
     def render(self, surface: pygame.surface.Surface):
@@ -75,33 +265,28 @@ class CraneScene(PhysicsScene):
         """
         super().render(surface)
 
-        spent = get_total_spent()
-        won = get_total_won()
-        ratio = 1 if spent == 0 else won / spent
+        # Bunch of text, as marked if `get_marks()` ran this frame
+        stat_text, self._frame_stat_text = self._frame_stat_text, None
+        if stat_text is None:
+            stat_text = self._stat_text
+        for text, pos in stat_text:
+            self._draw_stat_text(surface, text=text, pos=pos)
 
-        # Bunch of text
-        self._draw_stat_text(
-            surface,
-            text=f'Unique Pokemon: {get_unique_prizes()} / {len(get_prize_names())}',
-            pos=(10, 0),
-        )
-        self._draw_stat_text(
-            surface,
-            text=f'Total Pokemon: {get_total_prizes()}',
-            pos=(10, 40),
-        )
-        self._draw_stat_text(
-            surface,
-            text=f'Spent: ${get_total_spent():.2f}',
-            pos=(300, 0),
-        )
-        self._draw_stat_text(
-            surface,
-            text=f'Won: ${get_total_won():.2f}',
-            pos=(300, 40),
-        )
-        self._draw_stat_text(
-            surface,
-            text=f'Ratio: {ratio:.2f}',
-            pos=(300, 80),
-        )
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[List[Mark]]:
+        """Gets the marks of the children and the stats text.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, or `None` if a child can't tell what it's
+            going to draw.
+        """
+        stat_text = self._frame_stat_text = self._stat_text
+        marks = super().get_marks(surface)
+        if marks is None:
+            return None
+
+        for text, pos in stat_text:
+            marks.append((pos + self._render_stat_text(text).get_size(), text))
+        return marks
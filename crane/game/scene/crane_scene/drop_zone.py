@@ -0,0 +1,45 @@
+from typing import Dict, List
+
+import Box2D
+
+
+class DropZoneListener(Box2D.b2ContactListener):
+
+    def __init__(self, sensor: Box2D.b2Fixture):
+        """Contact listener that keeps track of the bodies that
+        touched the drop zone sensor during a physics step.
+
+        Box2D doesn't allow bodies to be destroyed while it's
+        stepping, so bodies are only queued here and handed out
+        by `pop_entered()` once the step is done.
+
+        Args:
+            sensor (b2Fixture): the drop zone sensor fixture.
+        """
+        super(DropZoneListener, self).__init__()
+        self._sensor = sensor
+
+        # Dict used as an ordered set, a body can touch the sensor
+        # with several fixtures (or several times) in a step
+        self._entered: Dict[Box2D.b2Body, None] = {}
+
+    def BeginContact(self, contact: Box2D.b2Contact):
+        """Called by Box2D when two fixtures start touching.
+        """
+        if contact.fixtureA == self._sensor:
+            self._entered[contact.fixtureB.body] = None
+        elif contact.fixtureB == self._sensor:
+            self._entered[contact.fixtureA.body] = None
+
+    def pop_entered(self) -> List[Box2D.b2Body]:
+        """Gets the bodies that entered the drop zone since the
+        last call, and forgets about them.
+
+        Returns:
+            The bodies, in the order they entered.
+        """
+        if not self._entered:
+            return []
+
+        entered, self._entered = list(self._entered), {}
+        return entered
@@ -0,0 +1,26 @@
+from typing import NamedTuple
+
+
+class CraneParams(NamedTuple):
+    """Physics parameters of the crane machine. The defaults are
+    what the game plays with, other values are for tuning.
+
+    claw_torque: torque applied to each claw arm, in N*m.
+    claw_friction: friction of the claw arms.
+    move_speed: speed of the support when moving, in m/s.
+    rope_length: length of the rope, in meters.
+    rope_segments: how many bodies the rope is made of.
+    rope_friction: friction of the rope.
+    rope_damping: angular damping of the rope, high numbers keep it steady.
+    prize_friction: friction of the prizes.
+    prize_density: density of the prizes, in kg/m^2.
+    """
+    claw_torque: float = 8
+    claw_friction: float = 0.5
+    move_speed: float = 3
+    rope_length: float = 2
+    rope_segments: int = 20
+    rope_friction: float = 0.9
+    rope_damping: float = 1000
+    prize_friction: float = 0.9
+    prize_density: float = 0.1
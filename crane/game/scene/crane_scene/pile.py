@@ -0,0 +1,222 @@
+"""This module contains pre-settled prize piles.
+
+Dropping prizes into an empty machine takes seconds of heavy
+contact solving before the pile settles. Instead, piles are
+settled ahead of time (offline, or on a background thread) and
+saved as body transforms, and a new machine just gets a random
+pile loaded straight into its world.
+
+Piles only keep the shape of each prize, not which prize it was, so
+loading one picks the prizes by rarity like dropping them in would.
+Piles are settled with a given set of physics parameters, and only
+used by machines with the same ones.
+
+Run this module to settle piles offline:
+
+    python -m crane.game.scene.crane_scene.pile --piles 8 --prizes 30
+"""
+import argparse
+import random
+import threading
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+import Box2D
+
+from crane.game.resources import get_catalog, get_random, load_piles, save_piles
+from crane.game.scene.crane_scene.container_object import ContainerObject
+from crane.game.scene.crane_scene.params import CraneParams
+from crane.game.scene.crane_scene.prize_pool import Hull, PrizePool
+
+
+class PilePrize(NamedTuple):
+    """A prize in a settled pile.
+
+    hull: the vertices (x, y) of the collision polygon in meters.
+    x, y: the position in meters.
+    angle: the angle in radians.
+    awake: whether the body was still moving.
+    """
+    hull: Hull
+    x: float
+    y: float
+    angle: float
+    awake: bool
+
+
+Pile = Tuple[PilePrize, ...]
+
+
+_LIBRARY: 'PileLibrary' = None
+
+
+def get_pile_library() -> 'PileLibrary':
+    """Gets the shared pile library, loading it on first use.
+
+    Returns:
+        The pile library.
+    """
+    global _LIBRARY
+    if _LIBRARY is None:
+        _LIBRARY = PileLibrary()
+    return _LIBRARY
+
+
+def settle_pile(num_prizes: int, params: CraneParams=None, dt: float=1/60, interval: float=0.05, max_time: float=30, gravity: float=-9.81, rng: random.Random=None) -> Pile:
+    """Drops prizes into an empty machine, in a world of its own,
+    and waits for them to settle.
+
+    Prizes are dropped the same way `PrizeAdder` does it, and the
+    world is stepped until every prize is asleep.
+
+    Args:
+        num_prizes (int): how many prizes to drop.
+        params (CraneParams): the physics parameters, or `None`
+            for the defaults.
+        dt (float): the physics step in seconds.
+        interval (float): how long to wait between prizes, in seconds.
+        max_time (float): the longest to simulate, in seconds.
+        gravity (float): gravitational acceleration in m/s^2.
+        rng (Random): the random number generator for the prizes, or
+            `None` for a new one. Never the game's, since piles are
+            settled on other threads.
+
+    Returns:
+        The settled pile. Prizes that ended up outside the play area
+        (e.g. down the drop chute) are left out.
+    """
+    world = Box2D.b2World(gravity=(0, gravity), doSleep=True)
+    container = ContainerObject(world, params=params)
+    pool = PrizePool(world, rng=rng or random.Random(), params=params)
+
+    prizes = []
+    countdown = 0
+    for _ in range(int(max_time / dt)):
+        if len(prizes) < num_prizes:
+            countdown -= dt
+            if countdown <= 0:
+                prizes.append(pool.acquire())
+                countdown = interval
+        elif not any(prize.body.awake for prize in prizes):
+            break
+
+        world.Step(dt, 10, 10)
+
+    return tuple(
+        PilePrize(PrizePool.get_hull(prize.prize_name), prize.body.position[0], prize.body.position[1], prize.body.angle, prize.body.awake)
+        for prize in prizes
+        if container.in_play_area(prize.body.position)
+    )
+
+
+class PileLibrary:
+
+    def __init__(self, target_count: int=8):
+        """The saved piles, by the number of prizes and the physics
+        parameters they were settled with.
+
+        When background settling is on, asking for a setup with
+        fewer than `target_count` piles settles more on a background
+        thread, and saves them for next time.
+
+        Args:
+            target_count (int): how many piles to keep of each setup.
+        """
+        self._target_count = target_count
+        self._background = False
+        self._settling: Dict[Tuple[int, CraneParams], threading.Thread] = {}
+
+        # Piles by (number of prizes, params). Lists are only ever appended to.
+        # Piles with shapes no prize has anymore are left out.
+        self._piles: Dict[Tuple[int, CraneParams], List[Pile]] = {}
+        hulls = {PrizePool.get_hull(name) for name in get_catalog().names}
+        for entry in load_piles():
+            if 'params' not in entry:
+                continue # settled before piles kept their params
+            pile = tuple(
+                PilePrize(tuple(tuple(v) for v in hull), x, y, angle, awake)
+                for hull, x, y, angle, awake in entry['prizes']
+            )
+            if all(prize.hull in hulls for prize in pile):
+                key = (entry['num_prizes'], CraneParams(**entry['params']))
+                self._piles.setdefault(key, []).append(pile)
+
+    @property
+    def background(self) -> bool:
+        """Get/set whether missing piles are settled on a background thread.
+        """
+        return self._background
+
+    @background.setter
+    def background(self, background: bool):
+        self._background = background
+
+    def choose(self, num_prizes: int, params: CraneParams=None, rng: random.Random=None) -> Pile:
+        """Picks a random settled pile.
+
+        Args:
+            num_prizes (int): the number of prizes the pile was settled with.
+            params (CraneParams): the physics parameters the pile was
+                settled with, or `None` for the defaults.
+            rng (Random): the random number generator to use, or
+                `None` for the game's.
+
+        Returns:
+            The pile, or an empty tuple if there aren't any yet.
+        """
+        key = (num_prizes, params or CraneParams())
+        piles = self._piles.get(key, [])
+        if len(piles) < self._target_count and self._background:
+            self._settle_in_background(*key)
+
+        return (rng or get_random()).choice(piles) if piles else ()
+
+    def add(self, num_prizes: int, params: CraneParams, pile: Pile):
+        """Adds a settled pile to the library and saves the library.
+
+        Args:
+            num_prizes (int): the number of prizes the pile was settled with.
+            params (CraneParams): the physics parameters the pile was
+                settled with, or `None` for the defaults.
+            pile (Pile): the pile.
+        """
+        self._piles.setdefault((num_prizes, params or CraneParams()), []).append(pile)
+        save_piles([
+            {'num_prizes': n, 'params': p._asdict(), 'prizes': [list(prize) for prize in pile]}
+            for (n, p), piles in list(self._piles.items())
+            for pile in list(piles)
+        ])
+
+    def _settle_in_background(self, num_prizes: int, params: CraneParams):
+        """Starts settling piles of a given setup on a background
+        thread, unless that's already happening.
+        """
+        key = (num_prizes, params)
+        thread = self._settling.get(key, None)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=self._run, args=key, daemon=True)
+            self._settling[key] = thread
+            thread.start()
+
+    def _run(self, num_prizes: int, params: CraneParams):
+        """The settling loop.
+        """
+        while len(self._piles.get((num_prizes, params), [])) < self._target_count:
+            self.add(num_prizes, params, settle_pile(num_prizes, params))
+
+            # Let the update/render threads catch up
+            time.sleep(0.5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Settles prize piles ahead of time.')
+    parser.add_argument('--piles', type=int, default=8, help='how many piles to settle')
+    parser.add_argument('--prizes', type=int, default=30, help='how many prizes per pile')
+    args = parser.parse_args()
+
+    library = get_pile_library()
+    for i in range(args.piles):
+        start_time = time.time()
+        pile = settle_pile(args.prizes)
+        library.add(args.prizes, None, pile)
+        print(f'Settled pile {i + 1}/{args.piles}: {len(pile)} prizes in {time.time() - start_time:.2f}s')
@@ -1,19 +1,23 @@
+from typing import Tuple
+
 from crane.engine.scene.scene import PhysicsScene
 from crane.engine.scene.scene_object import UpdateableSceneObject
-from crane.game.scene.crane_scene.prize_object import PrizeObject
+from crane.game.scene.crane_scene.prize_pool import PrizePool
 
 
 class PrizeAdder(UpdateableSceneObject):
 
-    def __init__(self, scene: PhysicsScene):
+    def __init__(self, scene: PhysicsScene, pool: PrizePool):
         """An invisible scene object that adds prizes to the game
         over time.
 
         Args:
             scene (PhysicsScene): the scene to add the prizes to.
+            pool (PrizePool): where to get the prizes from.
         """
         super(PrizeAdder, self).__init__()
         self._scene = scene
+        self._pool = pool
 
         self._num_prizes = 0 # number of prizes left to add
 
@@ -21,14 +25,41 @@ class PrizeAdder(UpdateableSceneObject):
         self._countdown = 0 # time since last prize added
         self._running = False
 
+    @property
+    def state(self) -> Tuple[int, float]:
+        """Get/set the prizes left to add and the time until
+        the next one, as a tuple (num_prizes, countdown).
+        """
+        return self._num_prizes, self._countdown
+
+    @state.setter
+    def state(self, state: Tuple[int, float]):
+        self._num_prizes, self._countdown = state
+        self._running = self._num_prizes > 0
+
     def add_prizes(self, num_prizes: int):
         """Adds the given number of prizes to the scene.
 
         Args:
             num_prizes (int): the number of prizes.
         """
-        self._running = True
         self._num_prizes += num_prizes
+        self._running = self._num_prizes > 0
+
+    def cancel(self):
+        """Stops adding any prizes that haven't been added yet.
+        """
+        self._running = False
+        self._num_prizes = 0
+        self._countdown = 0
+
+    def is_idle(self) -> bool:
+        """Checks whether there are no prizes left to add.
+
+        Returns:
+            `True` if the adder is idle.
+        """
+        return not self._running
 
     def update(self, dt: float):
         """Handles adding prizes over time.
@@ -42,7 +73,7 @@ class PrizeAdder(UpdateableSceneObject):
             # Add prize if we waited long enough
             if self._countdown <= 0:
                 self._num_prizes -= 1
-                self._scene.add(PrizeObject(self._scene._world))
+                self._scene.add(self._pool.acquire())
                 self._countdown = self._interval
 
             # Stop adding prizes if there's none left
@@ -1,47 +1,124 @@
-import math
 import random
-from typing import List, Tuple
+from typing import List
 
 import Box2D
 import pygame
 
 from crane import globals
+from crane.engine.dirty_rects import Mark
 from crane.engine.scene.scene_object import TexturedPhysicsObject
-from crane.game.resources import get_prize_image, get_prize_names, get_prize_path
+from crane.game.resources import get_catalog, get_prize_image, get_prize_path, get_random, sample_prize_name
 
 
 class PrizeObject(TexturedPhysicsObject):
 
-    def __init__(self, world: Box2D.b2World, prize_name: str=None):
+    def __init__(self, world: Box2D.b2World, prize_name: str=None, rng: random.Random=None, friction: float=0.9, density: float=0.1):
         """One of the prizes that goes in the crane machine.
 
         Adds a polygon body to the world at roughly the center of
-        the screen.
+        the screen. The size and shape come from the prize catalog.
 
         Args:
             world (b2World): the world to add bodies into
             prize_name (str): the name of the prize to add, or `None`
-                for a random one.
+                for a random one, weighted by rarity.
+            rng (Random): the random number generator for the prize
+                and spawn point, or `None` for the game's.
+            friction (float): friction of the body.
+            density (float): density of the body, in kg/m^2.
         """
-        self._prize_name = prize_name or random.choice(get_prize_names())
-        super(PrizeObject, self).__init__(world, get_prize_image(self._prize_name), scale=2)
+        self._rng = rng or get_random()
+        self._prize_name = prize_name or sample_prize_name(self._rng)
+        catalog = get_catalog()
+        super(PrizeObject, self).__init__(world, get_prize_image(self._prize_name), scale=catalog.get_scale(self._prize_name))
 
         # Add a polygon body to the world
-        cx, cy = globals.SCREEN_CENTER_M
-        self._body = world.CreateDynamicBody(position=(cx + 3 * random.random(), cy))
-        self._body.CreatePolygonFixture(vertices=self._get_polygon_vertices(), density=0.1, friction=0.9)
+        self._body = world.CreateDynamicBody(position=self._get_spawn_position())
+        self._body.CreatePolygonFixture(vertices=catalog.get_hull(self._prize_name), density=density, friction=friction)
+        self._body.userData = self # so contact listeners can find the prize
+
+        # New contacts wake bodies up, so bodies placed asleep
+        # get put back to sleep once their contacts exist
+        self._sleep_after_step = False
+
+    @property
+    def prize_name(self) -> str:
+        """Get/set the name of the prize. Setting it swaps the texture,
+        but not the body's fixtures.
+        """
+        return self._prize_name
+
+    @prize_name.setter
+    def prize_name(self, prize_name: str):
+        if prize_name != self._prize_name:
+            self._prize_name = prize_name
+            self.image = get_prize_image(prize_name)
+            self.scale = get_catalog().get_scale(prize_name)
+
+    @property
+    def body(self) -> Box2D.b2Body:
+        """Gets the body of the prize.
+        """
+        return self._body
+
+    def respawn(self, prize_name: str):
+        """Reuses this object for another prize, and moves the body back
+        to the spawn point. Doesn't touch the body's fixtures, so only
+        use it for prizes with the same hull.
+
+        Args:
+            prize_name (str): the name of the new prize.
+        """
+        self.prize_name = prize_name
+        self.place(self._get_spawn_position())
+
+    def place(self, position: tuple, angle: float=0, awake: bool=True):
+        """Puts the body at a given spot, at rest.
+
+        Args:
+            position (tuple): the position as a tuple (x, y) in meters.
+            angle (float): the angle in radians.
+            awake (bool): whether the body should be simulated right
+                away, or sleep until something touches it.
+        """
+        self._body.transform = (position, angle)
+        self._body.linearVelocity = (0, 0)
+        self._body.angularVelocity = 0
+        self._body.active = True
+        self._body.awake = True
+        self._sleep_after_step = not awake
+
+    def update(self, dt: float):
+        """Puts the body back to sleep if it was placed asleep.
 
-    def _get_polygon_vertices(self, num_sides=6, radius=1) -> List[Tuple[float, float]]:
-        """Returns vertices for a regular polygon.
+        Args:
+            dt (float): time since last update.
+        """
+        if self._sleep_after_step:
+            self._sleep_after_step = False
+            self._body.awake = False
+
+    def is_idle(self) -> bool:
+        """Checks whether the prize isn't waiting to be put back to sleep.
+
+        Returns:
+            `True` if the prize is idle.
+        """
+        return not self._sleep_after_step
+
+    def deactivate(self):
+        """Takes the body out of the simulation, without destroying it.
+        """
+        self._body.active = False
+
+    def _get_spawn_position(self) -> tuple:
+        """Returns a spawn position near the center of the screen.
 
         Returns:
-            A list of coordinates (x, y)
+            The position as a tuple (x, y)
         """
-        c = 2 * math.pi / num_sides
-        return [
-            (radius * math.cos(c * i), radius * math.sin(c * i))
-            for i in range(num_sides)
-        ]
+        cx, cy = globals.SCREEN_CENTER_M
+        return (cx + 3 * self._rng.random(), cy)
 
     def render(self, surface: pygame.surface.Surface):
         """Renders the body to the surface with the appropriate texture.
@@ -51,6 +128,18 @@ class PrizeObject(TexturedPhysicsObject):
         """
         self.render_body(surface, self._body)
 
+    def get_marks(self, surface: pygame.surface.Surface) -> List[Mark]:
+        """Gets where the texture is going to be drawn.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, empty if the prize isn't drawn yet.
+        """
+        mark = self.get_body_mark(surface, self._body)
+        return [] if mark is None else [mark]
+
     def _get_image(self, name: str) -> pygame.surface.Surface:
         """Gets an image corresponding to the given pokemon name.
 
@@ -62,5 +151,5 @@ class PrizeObject(TexturedPhysicsObject):
             The image as a pygame Surface.
         """
         if not name:
-            name = random.choice(get_prize_names())
+            name = sample_prize_name(self._rng)
         return pygame.image.load(get_prize_path(name))
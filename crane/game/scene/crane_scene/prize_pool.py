@@ -0,0 +1,126 @@
+import random
+from typing import Dict, List, Tuple
+
+import Box2D
+
+from crane.game.resources import get_catalog, get_random, sample_prize_name
+from crane.game.scene.crane_scene.params import CraneParams
+from crane.game.scene.crane_scene.prize_object import PrizeObject
+
+
+# The vertices (x, y) of a collision polygon in meters, which prizes are pooled by
+Hull = Tuple[Tuple[float, float], ...]
+
+
+class PrizePool:
+    _MAX_SAMPLES = 100
+
+    def __init__(self, world: Box2D.b2World, size: int=0, rng: random.Random=None, params: CraneParams=None):
+        """Keeps prize bodies around after they're won or reset,
+        so they can be reused instead of creating new ones.
+
+        Parked prizes have their bodies deactivated, which takes them
+        out of the simulation completely. Prizes with the same hull
+        can stand in for each other, so a parked prize gets reused
+        for whichever prize is spawned next.
+
+        Args:
+            world (b2World): the world to add bodies into.
+            size (int): how many prizes to create up front.
+            rng (Random): the random number generator for picking prizes
+                and spawn points, or `None` for the game's.
+            params (CraneParams): the physics parameters for new
+                prizes, or `None` for the defaults.
+        """
+        self._world = world
+        self._rng = rng or get_random()
+        self._params = params or CraneParams()
+
+        # Parked prizes by hull
+        self._free: Dict[Hull, List[PrizeObject]] = {}
+
+        for _ in range(size):
+            self.release(self._create(None))
+
+    def acquire(self, prize_name: str=None) -> PrizeObject:
+        """Gets a prize at the spawn point, reusing a parked one if possible.
+
+        Args:
+            prize_name (str): the name of the prize, or `None`
+                for a random one, weighted by rarity.
+
+        Returns:
+            The prize.
+        """
+        prize_name = prize_name or sample_prize_name(self._rng)
+        free = self._free.get(self.get_hull(prize_name), None)
+        if not free:
+            return self._create(prize_name)
+
+        prize = free.pop()
+        prize.respawn(prize_name)
+        return prize
+
+    def acquire_hull(self, hull: Hull) -> PrizeObject:
+        """Gets a random prize with a given hull at the spawn point,
+        e.g. for a body in a settled pile. The prize is picked by
+        rarity, out of the ones with that hull.
+
+        Args:
+            hull (Hull): the hull.
+
+        Returns:
+            The prize.
+        """
+        # Same odds as sampling until the hull matches, but capped for rare hulls
+        for _ in range(self._MAX_SAMPLES):
+            prize_name = sample_prize_name(self._rng)
+            if self.get_hull(prize_name) == hull:
+                return self.acquire(prize_name)
+
+        names = [name for name in get_catalog().names if self.get_hull(name) == hull]
+        return self.acquire(self._rng.choice(names) if names else None)
+
+    def release(self, prize: PrizeObject):
+        """Parks a prize so it can be reused. It should already
+        be removed from its scene.
+
+        Args:
+            prize (PrizeObject): the prize.
+        """
+        prize.deactivate()
+        self._free.setdefault(self.get_hull(prize.prize_name), []).append(prize)
+
+    def claim(self, prize: PrizeObject):
+        """Takes a particular prize out of the pool, if it's parked,
+        without moving it.
+
+        Args:
+            prize (PrizeObject): the prize.
+        """
+        free = self._free.get(self.get_hull(prize.prize_name), [])
+        if prize in free:
+            free.remove(prize)
+
+    def _create(self, prize_name: str) -> PrizeObject:
+        """Creates a brand new prize.
+        """
+        return PrizeObject(
+            self._world,
+            prize_name,
+            self._rng,
+            friction=self._params.prize_friction,
+            density=self._params.prize_density,
+        )
+
+    @staticmethod
+    def get_hull(prize_name: str) -> Hull:
+        """Gets the hull of a prize, which prizes are pooled by.
+
+        Args:
+            prize_name (str): the name of the prize.
+
+        Returns:
+            The hull.
+        """
+        return tuple(get_catalog().get_hull(prize_name))
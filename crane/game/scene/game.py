@@ -2,12 +2,15 @@
 handles all of the crane/progress stuff.
 """
 import enum
-import time
+from typing import List, Optional, Tuple
 
 import pygame
 
+from crane.engine.dirty_rects import Mark, get_full_mark
+from crane.engine.input import get_input
 from crane.engine.scene.scene import SceneManager
-from crane.game.resources import get_background
+from crane import globals
+from crane.game.resources import get_background_layers, prefetch_background
 from crane.game.scene.crane_scene.crane_scene import CraneScene
 from crane.game.scene.progress_scene.progress_scene import ProgressScene
 
@@ -29,12 +32,21 @@ class Game(SceneManager):
         arcade (game) scene, and the progress (pokemon) scene.
         """
         super(Game, self).__init__()
+        prefetch_background(globals.SCREEN_SIZE_P)
 
         self._crane_scene = CraneScene()
         self._progress_scene = ProgressScene()
         self.current_scene = self._crane_scene
 
-        self._toggle_press_time = 0 # Used to prevent rapid switching between states
+        # Background layers picked by `get_marks()` for the next frame, so
+        # the crossfade doesn't move on between marking and rendering
+        self._background_layers: List[Tuple[pygame.surface.Surface, int]] = None
+
+    @property
+    def crane_scene(self) -> CraneScene:
+        """Gets the crane scene.
+        """
+        return self._crane_scene
 
     def update(self, dt: float):
         """Handles switching between the different scenes,
@@ -44,22 +56,18 @@ class Game(SceneManager):
             dt (float): the time in seconds since the last update.
         """
         super().update(dt)
-        current_time = time.time()
-
-        keys = pygame.key.get_pressed()
+        input_state = get_input()
 
         # Toggle game state
-        if keys[pygame.K_ESCAPE] and current_time - self._toggle_press_time > 0.25:
-            self._toggle_press_time = current_time
+        if input_state.was_pressed(pygame.K_ESCAPE):
             if self.current_scene == self._progress_scene:
                 self.current_scene = self._crane_scene
             else:
                 self.current_scene = self._progress_scene
 
         # Reset crane machine
-        elif keys[pygame.K_r] and current_time - self._toggle_press_time > 0.25:
-            self._toggle_press_time = current_time
-            self._crane_scene = CraneScene()
+        elif input_state.was_pressed(pygame.K_r):
+            self._crane_scene.reset()
             self.current_scene = self._crane_scene
 
     def render(self, surface: pygame.surface.Surface):
@@ -68,11 +76,31 @@ class Game(SceneManager):
         Args:
             surface (Surface): the surface to render to.
         """
-        # Draw background image
-        image = get_background()
-        height = surface.get_height()
-        width = height * image.get_width() / image.get_height()
-        image = pygame.transform.smoothscale(image, (width, height))
-        surface.blit(image, (0, 0))
+        # Draw background image, already scaled on the loader thread
+        layers, self._background_layers = self._background_layers, None
+        if layers is None:
+            layers = get_background_layers(surface.get_size())
+        for image, alpha in layers:
+            image.set_alpha(None if alpha >= 255 else alpha)
+            surface.blit(image, (0, 0))
 
         super().render(surface)
+
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[List[Mark]]:
+        """Gets the marks of the current scene, plus the background,
+        which redraws everything when it changes or crossfades.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, or `None` if the current scene can't tell
+            what it's going to draw.
+        """
+        marks = super().get_marks(surface)
+        if marks is None:
+            return None
+
+        self._background_layers = get_background_layers(surface.get_size())
+        token = tuple(self._background_layers)
+        return [get_full_mark(surface, token)] + marks
@@ -1,10 +1,12 @@
 import math
-import time
+from typing import List, Optional
 
 import pygame
 
+from crane.engine.dirty_rects import Mark, get_full_mark
+from crane.engine.input import get_input
 from crane.engine.scene.scene import Scene
-from crane.game.resources import get_prize_count, get_prize_image, get_prize_names
+from crane.game.resources import get_history_summary, get_prize_count, get_prize_image, get_prize_names, is_history_enabled
 from crane.helpers import draw_text
 
 
@@ -24,7 +26,9 @@ class ProgressScene(Scene):
         self._page = 0
         self._num_pages = math.ceil(len(get_prize_names()) / (self.ROWS * self.COLUMNS))
 
-        self._key_press_time = 0
+        # What the render thread draws, as a tuple (page, counts, history).
+        # Built on the update thread and replaced as a whole every tick.
+        self._view = (self._page, self._get_counts(), get_history_summary())
 
     def update(self, dt: float):
         """Updates which page is currently being shown
@@ -35,15 +39,41 @@ class ProgressScene(Scene):
         """
         super().update(dt)
 
-        # Navigate pages, and prevent the keys from being repeated too fast
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_a] and time.time() - self._key_press_time > 0.25:
-            self._key_press_time = time.time()
+        # Navigate pages, one page per key press
+        input_state = get_input()
+        if input_state.was_pressed(pygame.K_a):
             self._page = max(self._page - 1, 0)
-        elif keys[pygame.K_d] and time.time() - self._key_press_time > 0.25:
-            self._key_press_time = time.time()
+        elif input_state.was_pressed(pygame.K_d):
             self._page = min(self._page + 1, self._num_pages - 1)
 
+        self._view = (self._page, self._get_counts(), get_history_summary())
+
+    def _get_counts(self) -> tuple:
+        """Gets the win count of every prize.
+
+        Returns:
+            A tuple of counts, in the same order as the prize names.
+        """
+        return tuple(get_prize_count(name) for name in get_prize_names())
+
+    def get_marks(self, surface: pygame.surface.Surface) -> Optional[List[Mark]]:
+        """The whole page is redrawn whenever the page or any
+        of the numbers on it change.
+
+        Args:
+            surface (Surface): the surface that will be rendered to.
+
+        Returns:
+            The marks, or `None` if a child can't tell what it's
+            going to draw.
+        """
+        marks = super().get_marks(surface)
+        if marks is None:
+            return None
+
+        page, counts, history = self._view
+        return marks + [get_full_mark(surface, (page, counts, history.version))]
+
     def render(self, surface: pygame.surface.Surface):
         """Renders all the pokemon stuff to the surface.
 
@@ -51,9 +81,10 @@ class ProgressScene(Scene):
             surface (Surface): the surface to render to.
         """
         super().render(surface)
+        page, counts, history = self._view
 
         r, c = 0, 0
-        start_idx = self._page * self.COLUMNS * self.ROWS
+        start_idx = page * self.COLUMNS * self.ROWS
         end_idx = start_idx + self.COLUMNS * self.ROWS
 
         # Add one cell for each type of pokemon
@@ -70,7 +101,7 @@ class ProgressScene(Scene):
             c += 1
 
             prize_name = names[i]
-            count = get_prize_count(prize_name)
+            count = counts[i]
             image = get_prize_image(prize_name)
 
             image = pygame.transform.smoothscale(image, (self.CELL_SIZE, self.CELL_SIZE))
@@ -80,4 +111,6 @@ class ProgressScene(Scene):
             draw_text(surface, prize_name, 'Comic Sans MS', 20, (255, 255, 255), (x, y + self.CELL_SIZE))
             draw_text(surface, f'{count}', 'Comic Sans MS', 20, (255, 255, 255), (x, y + self.CELL_SIZE + 20))
 
-        draw_text(surface, f'Page {self._page + 1} / {self._num_pages}', 'Comic Sans MS', 20, (255, 255, 255), (0, 0))
+        draw_text(surface, f'Page {page + 1} / {self._num_pages}', 'Comic Sans MS', 20, (255, 255, 255), (0, 0))
+        if is_history_enabled():
+            draw_text(surface, f'Plays: {history.plays}  Win Rate: {history.win_rate:.0%}', 'Comic Sans MS', 20, (255, 255, 255), (0, 20))
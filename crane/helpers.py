@@ -1,8 +1,13 @@
+import collections
+from typing import Dict, Tuple
+
 import pygame
 
 
 pygame.font.init()
-_FONTS = {} # cache of loaded fonts
+_FONTS: Dict[Tuple[str, int], pygame.font.Font] = {} # cache of loaded fonts
+_TEXT_CACHE_SIZE = 256
+_TEXT_CACHE: Dict[tuple, pygame.surface.Surface] = collections.OrderedDict() # cache of rendered text
 
 
 def _get_font(name: str='Comic Sans MS', size: int=30) -> pygame.font.Font:
@@ -16,11 +21,120 @@ def _get_font(name: str='Comic Sans MS', size: int=30) -> pygame.font.Font:
     Returns:
         The font object
     """
-    return _FONTS.setdefault(name.lower(), {}).setdefault(size, pygame.font.SysFont(name, size))
+    key = (name.lower(), size)
+    font = _FONTS.get(key, None)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _FONTS[key] = font
+    return font
+
+
+class _GlyphAtlas:
+
+    def __init__(self, font: pygame.font.Font, color: tuple):
+        """Renders text by stitching together glyphs that were
+        each rasterized once, instead of rasterizing the whole string.
+
+        Good for text that keeps changing, like counters. Kerning is
+        lost, which is fine for digits.
+
+        Args:
+            font (Font): the font to render glyphs with.
+            color (tuple): the color of the text as an RGB tuple.
+        """
+        self._font = font
+        self._color = color
+        self._glyphs: Dict[str, pygame.surface.Surface] = {}
+
+    def render(self, text: str) -> pygame.surface.Surface:
+        """Renders a line of text.
+
+        Args:
+            text (str): the text to render.
+
+        Returns:
+            The text as a pygame Surface.
+        """
+        glyphs = [self._get_glyph(char) for char in text]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        height = max([self._font.get_height()] + [glyph.get_height() for glyph in glyphs]) # e.g. '$' sticks out
+
+        # Blending antialiased glyphs onto transparent black would darken
+        # their edges, so start from transparent text color and keep the
+        # most opaque of each pixel instead
+        surface = pygame.Surface((max(width, 1), height), pygame.SRCALPHA)
+        surface.fill((*self._color[:3], 0))
+        x = 0
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+        return surface
+
+    def _get_glyph(self, char: str) -> pygame.surface.Surface:
+        """Gets a single rendered character, rendering it if needed.
+        """
+        glyph = self._glyphs.get(char, None)
+        if glyph is None:
+            glyph = self._font.render(char, True, self._color)
+            self._glyphs[char] = glyph
+        return glyph
+
+
+_ATLASES: Dict[tuple, _GlyphAtlas] = {} # glyph atlases for each (font, size, color)
+
+
+def _get_atlas(font_name: str, size: int, color: tuple) -> _GlyphAtlas:
+    """Retrieves the glyph atlas for a font and color, creating
+    it if it hasn't been used before.
+    """
+    key = (font_name.lower(), size, tuple(color))
+    atlas = _ATLASES.get(key, None)
+    if atlas is None:
+        atlas = _GlyphAtlas(_get_font(font_name, size), color)
+        _ATLASES[key] = atlas
+    return atlas
 
-def draw_text(surface: pygame.surface.Surface, text: str, font_name: str, size: int, color: tuple, pos: tuple):
+
+def render_text(text: str, font_name: str, size: int, color: tuple, use_atlas: bool=False) -> pygame.surface.Surface:
+    """Renders some text to a new surface, or gets it from the
+    cache if the same text was rendered recently.
+
+    Args:
+        text (str): the text to render.
+        font_name (str): the name of the font.
+        size (int): the size of the text.
+        color (tuple): the color of the text as an RGB tuple.
+        use_atlas (bool): whether to stitch the text together from cached
+            glyphs instead of rasterizing it. Use for text that changes a lot.
+
+    Returns:
+        The text as a pygame Surface.
+    """
+    key = (text, font_name.lower(), size, tuple(color), use_atlas)
+    text_surface = _TEXT_CACHE.get(key, None)
+    if text_surface is not None:
+        _TEXT_CACHE.move_to_end(key)
+        return text_surface
+
+    if use_atlas:
+        text_surface = _get_atlas(font_name, size, color).render(text)
+    else:
+        text_surface = _get_font(font_name, size).render(text, True, color)
+
+    # Throw away the least recently used text
+    _TEXT_CACHE[key] = text_surface
+    if len(_TEXT_CACHE) > _TEXT_CACHE_SIZE:
+        _TEXT_CACHE.popitem(last=False)
+
+    return text_surface
+
+
+def draw_text(surface: pygame.surface.Surface, text: str, font_name: str, size: int, color: tuple, pos: tuple, use_atlas: bool=False):
     """Draws some text to a surface.
 
+    Rendered text is cached, so drawing the same text again is
+    just a blit.
+
     Args:
         surface (Surface): the surface to render to.
         text (str): the text to draw.
@@ -28,6 +142,7 @@ def draw_text(surface: pygame.surface.Surface, text: str, font_name: str, size:
         size (int): the size of the text.
         color (tuple): the color of the text as an RGB tuple.
         pos (tuple): the coordinates to draw the text at.
+        use_atlas (bool): whether to stitch the text together from cached
+            glyphs instead of rasterizing it. Use for text that changes a lot.
     """
-    text_surface = _get_font(font_name, size).render(text, True, color)
-    surface.blit(text_surface, pos)
+    surface.blit(render_text(text, font_name, size, color, use_atlas), pos)
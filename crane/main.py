@@ -1,29 +1,114 @@
+import hashlib
+import os
+import random
+import sys
+
 import pygame
 from crane.engine.display import Display
 from crane.engine.engine import Engine
+from crane.engine.profiler import enable_profiler
+from crane.engine.replay import InputRecorder, load_recording
 from crane.game.resources import ICON
-from crane.game.resources import save_config
+from crane.game.resources import disable_saving, enable_history, save_config, seed_random
+from crane.game.scene.crane_scene.pile import get_pile_library
 from crane.game.scene.game import Game
 
 
 TARGET_FPS = 60
 TARGET_UPS = 60
+PHYSICS_DT = 1 / 60
+IDLE_DELAY = 30 # seconds without input or movement before saving power
 
 
 def main():
-    # Set up display, used to draw on
-    display = Display("Kelly's Favorite Game :)")
+    # Opt-in profiling, F3 shows the overlay and F4 dumps to the given file
+    profile_path = os.environ.get('CRANE_PROFILE', None)
+    profiler = enable_profiler(profile_path) if profile_path else None
+
+    # Opt-in record of every play for payout tuning, to the given SQLite file
+    history_path = os.environ.get('CRANE_HISTORY', None)
+    if history_path:
+        enable_history(history_path)
+
+    # Opt-in input recording, replay it with `--replay <path>`
+    seed = random.randrange(2 ** 32)
+    seed_random(seed)
+    record_path = os.environ.get('CRANE_RECORD', None)
+    recorder = InputRecorder(record_path, seed) if record_path else None
+
+    # Settle more prize piles in the background if we're running low.
+    # Not while recording, new piles would change what gets replayed
+    get_pile_library().background = not recorder
+
+    # Set up display, used to draw on. Only what changed is redrawn
+    display = Display("Kelly's Favorite Game :)", dirty_rects=True)
     pygame.display.set_icon(ICON)
 
     # Set up engine, used to handle game logic/timing
-    engine = Engine(display, TARGET_FPS, TARGET_UPS)
+    engine = Engine(display, TARGET_FPS, TARGET_UPS, fixed_dt=PHYSICS_DT, idle_delay=IDLE_DELAY)
+    engine.recorder = recorder
     engine.scene = Game()
     engine.start()
 
     # Save & quit
+    if recorder:
+        recorder.close()
+    if profiler:
+        profiler.dump()
     save_config()
     pygame.quit()
 
 
+def benchmark(num_frames: int=600) -> float:
+    """Runs the game headless as fast as possible, without
+    saving anything.
+
+    Args:
+        num_frames (int): the number of frames to run.
+
+    Returns:
+        The average frames per second.
+    """
+    disable_saving()
+    seed_random(0)
+    display = Display("Kelly's Favorite Game :)", headless=True)
+
+    engine = Engine(display, TARGET_FPS, TARGET_UPS, fixed_dt=PHYSICS_DT)
+    engine.scene = Game()
+    elapsed = engine.run_frames(num_frames, PHYSICS_DT)
+
+    pygame.quit()
+    return num_frames / elapsed
+
+
+def replay(path: str, render: bool=False):
+    """Plays back a recorded session headless, as fast as
+    possible, without saving anything.
+
+    Args:
+        path (str): the recording file.
+        render (bool): whether to render every tick too.
+    """
+    recording = load_recording(path)
+    disable_saving()
+    seed_random(recording.seed)
+    display = Display("Kelly's Favorite Game :)", headless=True)
+
+    engine = Engine(display, TARGET_FPS, TARGET_UPS, fixed_dt=PHYSICS_DT)
+    game = Game()
+    engine.scene = game
+    elapsed = engine.replay(recording, render)
+
+    # Same recording, same game -> same digest
+    digest = hashlib.sha1(game.crane_scene.save_state()).hexdigest()
+    print(f'{recording.num_ticks} ticks in {elapsed:.2f}s ({engine.ups:.1f} ticks/s), final state {digest}')
+    pygame.quit()
+
+
 if __name__ == '__main__':
-    main()
+    if '--benchmark' in sys.argv:
+        print(f'{benchmark():.1f} frames/s')
+    elif '--replay' in sys.argv:
+        replay(sys.argv[sys.argv.index('--replay') + 1], render='--render' in sys.argv)
+    else:
+        main()
@@ -0,0 +1,242 @@
+"""This module contains `CraneEnv`, a headless crane machine
+that's driven by actions instead of the keyboard.
+
+It's meant for simulating lots of plays, e.g. for tuning the
+physics parameters. There's no engine, no display and no frame
+rate cap, every step just updates the scene as fast as it can.
+
+Actions are indices into `ACTIONS`, each of which holds down
+some keys for the whole step, and the crane reads them through
+its own `InputState`. Observations are flat float32 arrays (see
+`CraneEnv.observe()`), and the reward is the price of whatever
+was won minus what was spent during the step.
+"""
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from crane.engine.input import InputState, TickKeys
+from crane.game.resources import get_catalog, get_spend_price
+from crane.game.scene.crane_scene.container_object import CraneState
+from crane.game.scene.crane_scene.crane_scene import CraneScene
+from crane.game.scene.crane_scene.params import CraneParams
+
+
+# Keys held down for each action
+ACTIONS: Tuple[Tuple[int, ...], ...] = (
+    (), # nothing
+    (pygame.K_a,), # move left
+    (pygame.K_d,), # move right
+    (pygame.K_SPACE,), # open the claw
+    (pygame.K_a, pygame.K_SPACE), # move left with the claw open
+    (pygame.K_d, pygame.K_SPACE), # move right with the claw open
+    (pygame.K_s,), # drop
+    (pygame.K_w,), # rise early
+)
+NOOP, LEFT, RIGHT, OPEN, LEFT_OPEN, RIGHT_OPEN, DROP, RISE = range(len(ACTIONS))
+
+_CLAW_FEATURES = 6 + len(CraneState) # support x, y, vx, vy, arm angles, state one-hot
+_PRIZE_FEATURES = 4 # x, y, price, present
+
+
+def get_observation_size(num_prizes: int) -> int:
+    """Gets the length of an observation.
+
+    Args:
+        num_prizes (int): how many prizes the machine is filled with.
+
+    Returns:
+        The number of values in an observation.
+    """
+    return _CLAW_FEATURES + _PRIZE_FEATURES * num_prizes
+
+
+class StepResult(NamedTuple):
+    """What happened during a step.
+
+    observation: the observation after the step.
+    reward: the price of prizes won minus the money spent.
+    done: whether the episode is over.
+    info: extra details, `won` (prize names) and `spent`.
+    """
+    observation: np.ndarray
+    reward: float
+    done: bool
+    info: Dict
+
+
+class CraneEnv:
+
+    def __init__(
+        self,
+        num_prizes: int=30,
+        params: CraneParams=None,
+        dt: float=1/60,
+        frame_skip: int=4,
+        max_time: Optional[float]=60,
+        seed: int=None,
+    ):
+        """A headless crane machine that's played with actions.
+
+        Plays are paid for and prizes are won in the environment's own
+        pocket, so simulating never touches the player's stats.
+
+        The same seed and actions always play out the same way.
+
+        Args:
+            num_prizes (int): how many prizes to fill the machine with.
+            params (CraneParams): the physics parameters, or `None`
+                for the defaults.
+            dt (float): the physics step in seconds.
+            frame_skip (int): how many physics steps each action is held for.
+            max_time (float): how long an episode lasts, in game seconds,
+                or `None` for episodes that never end.
+            seed (int): the random seed, or `None` for a random one.
+        """
+        self._num_prizes = num_prizes
+        self._params = params or CraneParams()
+        self._dt = dt
+        self._frame_skip = frame_skip
+        self._max_steps = None if max_time is None else max(1, round(max_time / (dt * frame_skip)))
+
+        self._rng = random.Random(seed)
+        self._input = InputState()
+        self._spent = 0 # paid since the start of the current step
+        self._scene = self._create_scene()
+        self._held = frozenset()
+        self._steps = 0
+
+        catalog = get_catalog()
+        self._prices = {name: catalog.get_price(name) for name in catalog.names}
+
+    @property
+    def scene(self) -> CraneScene:
+        """Gets the crane scene being simulated.
+        """
+        return self._scene
+
+    @property
+    def params(self) -> CraneParams:
+        """Gets the physics parameters.
+        """
+        return self._params
+
+    @property
+    def observation_size(self) -> int:
+        """Gets the length of the observation arrays.
+        """
+        return get_observation_size(self._num_prizes)
+
+    @property
+    def num_actions(self) -> int:
+        """Gets the number of possible actions.
+        """
+        return len(ACTIONS)
+
+    def _create_scene(self) -> CraneScene:
+        """Creates a new crane scene that pays out of this environment.
+        """
+        scene = CraneScene(self._num_prizes, self._params, self._input, self._rng, self._spend, self._win)
+        scene.capturing = False # never drawn
+        return scene
+
+    def _spend(self):
+        """Pays for a play.
+        """
+        self._spent += get_spend_price()
+
+    def _win(self, prize_name: str):
+        """Wins a prize. Nothing to do, the scene's `won_prizes`
+        already says what was won.
+        """
+
+    def reset(self, seed: int=None) -> np.ndarray:
+        """Starts a new episode with a freshly filled machine.
+
+        Prize bodies are recycled between episodes, which shuffles the
+        order of the bodies in the world, and that changes how the
+        physics plays out. So with a seed the whole scene is rebuilt,
+        and the episode plays out the same no matter what came before.
+
+        Args:
+            seed (int): the random seed, or `None` to carry on
+                with the current random numbers and reuse the scene.
+
+        Returns:
+            The first observation.
+        """
+        if seed is None:
+            self._scene.reset()
+        else:
+            self._rng.seed(seed)
+            self._scene = self._create_scene()
+
+        self._held = frozenset()
+        self._steps = 0
+        return self.observe()
+
+    def step(self, action: int) -> StepResult:
+        """Holds down the keys for an action for `frame_skip` physics steps.
+
+        Args:
+            action (int): the index of the action in `ACTIONS`.
+
+        Returns:
+            What happened, as a `StepResult`.
+        """
+        held = frozenset(ACTIONS[action])
+        pressed = held - self._held
+        self._held = held
+
+        won: List[str] = []
+        self._spent = 0
+        for _ in range(self._frame_skip):
+            keys: TickKeys = (held, pressed)
+            pressed = frozenset()
+
+            self._input.begin_tick(self._dt, keys)
+            self._scene.update(self._dt)
+            won += self._scene.won_prizes
+
+        spent = self._spent
+        self._steps += 1
+        reward = sum(self._prices[name] for name in won) - spent
+        done = self._max_steps is not None and self._steps >= self._max_steps
+        return StepResult(self.observe(), reward, done, {'won': won, 'spent': spent})
+
+    def observe(self) -> np.ndarray:
+        """Gets the current state of the machine as a flat array.
+
+        The first part describes the claw: the support's position
+        (relative to the middle of the machine) and velocity, the
+        angles of both arms and the crane state one-hot encoded.
+        Then there's a row of (x, y, price, present) for every prize,
+        with absent prizes left as zeros.
+
+        Returns:
+            The observation as a float32 array of `observation_size`.
+        """
+        observation = np.zeros(self.observation_size, dtype=np.float32)
+        container = self._scene.container
+        cx, cy = container.center
+
+        support = container.support
+        left, right = container.arms
+        observation[:6] = (
+            support.position[0] - cx,
+            support.position[1] - cy,
+            support.linearVelocity[0],
+            support.linearVelocity[1],
+            left.angle,
+            right.angle,
+        )
+        observation[6 + container.crane_state.value] = 1
+
+        prizes = observation[_CLAW_FEATURES:].reshape(self._num_prizes, _PRIZE_FEATURES)
+        for row, prize in zip(prizes, self._scene.prizes):
+            position = prize.body.position
+            row[:] = (position[0] - cx, position[1] - cy, self._prices[prize.prize_name], 1)
+
+        return observation
@@ -0,0 +1,340 @@
+"""This module estimates the real odds of the crane machine by
+simulating lots of plays with a scripted claw, on every core.
+
+Every play gets a freshly filled machine seeded with the play's
+number, the claw goes somewhere random, grabs, and carries
+whatever it got over the chute. The prizes won in each play are
+cached per (catalog, physics parameters), so running it again
+only simulates plays that haven't been done yet. Prices aren't
+part of the key, payouts are worked out from the current prices,
+so re-pricing prizes doesn't need any new plays.
+
+Run this module to print the estimates as the plays come in:
+
+    python -m crane.sim.payout --plays 2000 --param claw_torque=10
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from crane.game.resources import get_catalog, get_spend_price, load_payouts, load_piles, save_payouts
+from crane.game.scene.crane_scene.container_object import CraneState
+from crane.game.scene.crane_scene.params import CraneParams
+from crane.sim.env import DROP, LEFT, NOOP, OPEN, RIGHT, RISE, CraneEnv
+
+
+# Bump whenever `play()` or the way plays are simulated changes, so old results aren't reused
+_POLICY_VERSION = 2
+
+_Z = 1.96 # 95% confidence intervals
+_MAX_STEPS = 300 # per phase of a play, in case the claw gets stuck
+
+_ENV: CraneEnv = None # one per worker process
+
+
+class Estimate(NamedTuple):
+    """A value estimated from simulated plays.
+
+    mean: the estimate.
+    low, high: the 95% confidence interval.
+    """
+    mean: float
+    low: float
+    high: float
+
+
+def play(env: CraneEnv, rng: random.Random) -> List[str]:
+    """Plays once with a scripted claw: move somewhere random, drop,
+    grab for a bit, rise, then carry it over the chute and let go.
+
+    Args:
+        env (CraneEnv): the environment, already reset.
+        rng (Random): the random number generator for the claw.
+
+    Returns:
+        The names of the prizes won.
+    """
+    container = env.scene.container
+    won: List[str] = []
+
+    def step(action: int):
+        won.extend(env.step(action).info['won'])
+
+    def support_x() -> float:
+        return container.support.position[0] - container.center[0]
+
+    # Anywhere over the prizes, the chute is on the left
+    half_width = container.dimensions[0] / 2
+    target = rng.uniform(-half_width + 4, half_width - 1)
+    for _ in range(_MAX_STEPS):
+        if abs(support_x() - target) < 0.1:
+            break
+        step(RIGHT if support_x() < target else LEFT)
+
+    step(DROP)
+    for _ in range(_MAX_STEPS):
+        if container.crane_state == CraneState.Grabbing:
+            break
+        step(NOOP)
+    for _ in range(rng.randrange(5, 30)):
+        step(NOOP)
+
+    step(RISE)
+    for _ in range(_MAX_STEPS):
+        if container.crane_state == CraneState.Ready:
+            break
+        step(NOOP)
+
+    # Over the chute, open up and wait for everything to fall
+    for _ in range(_MAX_STEPS):
+        if support_x() < -half_width + 2:
+            break
+        step(LEFT)
+    for _ in range(60):
+        step(OPEN)
+    for _ in range(60):
+        step(NOOP)
+
+    return won
+
+
+def get_cache_key(num_prizes: int, params: CraneParams) -> str:
+    """Gets the cache key for plays with the given setup. Anything
+    that changes how plays turn out goes in, prices don't.
+
+    Args:
+        num_prizes (int): how many prizes the machine is filled with.
+        params (CraneParams): the physics parameters.
+
+    Returns:
+        The key.
+    """
+    data = {
+        'catalog': get_catalog().gameplay_digest,
+        'piles': load_piles(),
+        'params': params._asdict(),
+        'num_prizes': num_prizes,
+        'policy': _POLICY_VERSION,
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def _init_worker(num_prizes: int, params: CraneParams):
+    """Creates the worker process's environment.
+    """
+    global _ENV
+    _ENV = CraneEnv(num_prizes, params, max_time=None)
+
+
+def _play_seed(seed: int) -> Tuple[int, List[str]]:
+    """Plays once in a machine filled with the given seed.
+    """
+    _ENV.reset(seed)
+    return seed, play(_ENV, random.Random(seed))
+
+
+class PayoutEstimator:
+
+    def __init__(self, results: Dict[int, List[str]]=None):
+        """Works out win probabilities and payouts from the prizes
+        won in each play, using the catalog's current prices.
+
+        Args:
+            results (Dict[int, List[str]]): the names of the prizes
+                won, by play seed.
+        """
+        self._results: Dict[int, List[str]] = {}
+        self._catalog = get_catalog()
+        self._spend_price = get_spend_price()
+
+        # Per play, whether each prize was won and how much was won in total
+        self._won_any: List[np.ndarray] = []
+        self._payouts: List[float] = []
+
+        for seed, won in (results or {}).items():
+            self.add(seed, won)
+
+    @property
+    def results(self) -> Dict[int, List[str]]:
+        """Gets the names of the prizes won, by play seed.
+        """
+        return self._results
+
+    @property
+    def num_plays(self) -> int:
+        """Gets the number of plays so far.
+        """
+        return len(self._results)
+
+    def add(self, seed: int, won: List[str]):
+        """Adds the result of a play.
+
+        Args:
+            seed (int): the play's seed.
+            won (List[str]): the names of the prizes won.
+        """
+        self._results[seed] = won
+
+        won_any = np.zeros(len(self._catalog), dtype=bool)
+        payout = 0
+        for name in won:
+            i = self._catalog.index(name)
+            if i is not None:
+                won_any[i] = True
+            payout += self._catalog.get_price(name)
+        self._won_any.append(won_any)
+        self._payouts.append(payout)
+
+    def get_payout_per_dollar(self) -> Estimate:
+        """Estimates how much is won for every dollar spent.
+
+        Returns:
+            The estimate.
+        """
+        n = len(self._payouts)
+        if n == 0:
+            return Estimate(0, 0, math.inf)
+
+        payouts = np.array(self._payouts) / self._spend_price
+        mean = payouts.mean()
+        margin = _Z * payouts.std(ddof=1) / math.sqrt(n) if n > 1 else math.inf
+        return Estimate(mean, max(mean - margin, 0), mean + margin)
+
+    def get_win_probabilities(self) -> Dict[str, Estimate]:
+        """Estimates the chance of winning each prize in a play,
+        using Wilson score intervals, which behave for rare prizes.
+
+        Returns:
+            The estimates by prize name.
+        """
+        n = len(self._won_any)
+        if n == 0:
+            return {name: Estimate(0, 0, 1) for name in self._catalog.names}
+
+        wins = np.sum(self._won_any, axis=0)
+        p = wins / n
+        denominator = 1 + _Z ** 2 / n
+        center = (p + _Z ** 2 / (2 * n)) / denominator
+        margin = _Z * np.sqrt(p * (1 - p) / n + _Z ** 2 / (4 * n ** 2)) / denominator
+        return {
+            name: Estimate(float(p[i]), float(max(center[i] - margin[i], 0)), float(min(center[i] + margin[i], 1)))
+            for i, name in enumerate(self._catalog.names)
+        }
+
+    def format(self, top: int=None) -> str:
+        """Formats the estimates as a table, most likely prizes first.
+
+        Args:
+            top (int): how many prizes to show, or `None` for all.
+
+        Returns:
+            The table.
+        """
+        payout = self.get_payout_per_dollar()
+        lines = [
+            f'{self.num_plays} plays, payout per dollar {payout.mean:.3f} [{payout.low:.3f}, {payout.high:.3f}]',
+            f'{"prize":<16}{"price":>8}{"P(win)":>10}{"95% CI":>20}',
+        ]
+        probabilities = sorted(self.get_win_probabilities().items(), key=lambda item: -item[1].mean)
+        for name, estimate in probabilities[:top]:
+            price = self._catalog.get_price(name)
+            lines.append(f'{name:<16}{price:>8.2f}{estimate.mean:>10.4f}    [{estimate.low:.4f}, {estimate.high:.4f}]')
+        return '\n'.join(lines)
+
+
+def simulate(
+    num_plays: int,
+    num_prizes: int=30,
+    params: CraneParams=None,
+    num_processes: int=None,
+    use_cache: bool=True,
+) -> Iterable[PayoutEstimator]:
+    """Simulates plays across worker processes, skipping the ones
+    that are already cached.
+
+    Args:
+        num_plays (int): how many plays there should be in total,
+            seeded 0 to `num_plays - 1`.
+        num_prizes (int): how many prizes to fill the machine with.
+        params (CraneParams): the physics parameters, or `None`
+            for the defaults.
+        num_processes (int): how many worker processes to use, or
+            `None` for one per core.
+        use_cache (bool): whether to load/save cached results.
+
+    Returns:
+        An iterator that yields the estimator after every play, with
+        all the plays so far (cached ones included).
+    """
+    params = params or CraneParams()
+    key = get_cache_key(num_prizes, params)
+    payouts = load_payouts() if use_cache else {}
+    cached = {int(seed): won for seed, won in payouts.get(key, {}).items()}
+
+    estimator = PayoutEstimator({seed: won for seed, won in cached.items() if seed < num_plays})
+    yield estimator
+
+    seeds = [seed for seed in range(num_plays) if seed not in cached]
+    if not seeds:
+        return
+
+    def save():
+        if use_cache:
+            payouts[key] = {**cached, **estimator.results}
+            save_payouts(payouts)
+
+    # Spawned rather than forked, the game has threads running already
+    context = multiprocessing.get_context('spawn')
+    num_processes = min(len(seeds), num_processes or os.cpu_count() or 1)
+    last_save = time.time()
+    with context.Pool(num_processes, _init_worker, (num_prizes, params)) as pool:
+        try:
+            for seed, won in pool.imap_unordered(_play_seed, seeds, chunksize=4):
+                estimator.add(seed, won)
+                yield estimator
+
+                # Keep what's done so far in case we get interrupted
+                if time.time() - last_save > 10:
+                    save()
+                    last_save = time.time()
+        finally:
+            save()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Estimates win probabilities and payouts by simulating plays.')
+    parser.add_argument('--plays', type=int, default=1000, help='how many plays to simulate in total')
+    parser.add_argument('--prizes', type=int, default=30, help='how many prizes to fill the machine with')
+    parser.add_argument('--processes', type=int, default=None, help='how many worker processes, default one per core')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE', help='override a physics parameter, see CraneParams')
+    parser.add_argument('--top', type=int, default=10, help='how many prizes to show while running')
+    parser.add_argument('--interval', type=float, default=2, help='seconds between updates')
+    parser.add_argument('--no-cache', action='store_true', help="don't load or save cached results")
+    args = parser.parse_args()
+
+    overrides = {}
+    for param in args.param:
+        name, _, value = param.partition('=')
+        if name not in CraneParams._fields:
+            parser.error(f'Unknown parameter: {name}')
+        overrides[name] = CraneParams.__annotations__[name](value)
+    params = CraneParams(**overrides)
+
+    start_time = time.time()
+    last_report = 0
+    estimator = None
+    for estimator in simulate(args.plays, args.prizes, params, args.processes, not args.no_cache):
+        if estimator.num_plays < args.plays and time.time() - last_report > args.interval:
+            last_report = time.time()
+            print(estimator.format(args.top) + '\n', flush=True)
+
+    print(estimator.format())
+    print(f'Done in {time.time() - start_time:.1f}s')
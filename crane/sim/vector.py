@@ -0,0 +1,190 @@
+"""This module contains `VectorCraneEnv`, which runs lots of
+independent `CraneEnv`s across a pool of worker processes and
+steps them all at once.
+
+Box2D holds the GIL while stepping, so threads wouldn't help.
+Every worker process owns a slice of the environments, and
+observations/rewards come back stacked into NumPy arrays, one
+row per environment.
+"""
+import multiprocessing
+import multiprocessing.connection
+import os
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+from crane.game.scene.crane_scene.params import CraneParams
+from crane.sim.env import CraneEnv, get_observation_size
+
+
+class VectorStepResult(NamedTuple):
+    """What happened during a step, for every environment.
+
+    observations: the observations as an array (num_envs, observation_size).
+    rewards: the rewards as an array (num_envs,).
+    dones: whether each episode ended, as an array (num_envs,). Finished
+        environments are reset right away, so their observation is
+        already the first one of the next episode.
+    infos: the info dict of every environment.
+    """
+    observations: np.ndarray
+    rewards: np.ndarray
+    dones: np.ndarray
+    infos: List[Dict]
+
+
+def _run_worker(connection: multiprocessing.connection.Connection, seeds: List[int], env_kwargs: dict):
+    """The loop of a worker process. Waits for commands as tuples
+    (command, arg) and sends back the results.
+    """
+    envs = [CraneEnv(seed=seed, **env_kwargs) for seed in seeds]
+    try:
+        while True:
+            command, arg = connection.recv()
+            if command == 'reset':
+                connection.send([env.reset(seed) for env, seed in zip(envs, arg)])
+            elif command == 'step':
+                results = []
+                for env, action in zip(envs, arg):
+                    result = env.step(action)
+                    if result.done:
+                        result = result._replace(observation=env.reset())
+                    results.append(result)
+                connection.send(results)
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class VectorCraneEnv:
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_processes: int=None,
+        seed: int=0,
+        num_prizes: int=30,
+        params: CraneParams=None,
+        **env_kwargs,
+    ):
+        """Lots of crane environments, simulated in parallel.
+
+        Environment `i` is seeded with `seed + i`, so the same seed
+        and actions always play out the same way, no matter how
+        many processes there are.
+
+        Args:
+            num_envs (int): how many environments to run.
+            num_processes (int): how many worker processes to spread
+                them over, or `None` for one per core.
+            seed (int): the random seed of the first environment.
+            num_prizes (int): how many prizes to fill each machine with.
+            params (CraneParams): the physics parameters, or `None`
+                for the defaults.
+            env_kwargs: anything else to pass to `CraneEnv`.
+        """
+        num_processes = min(num_envs, num_processes or os.cpu_count() or 1)
+        env_kwargs = dict(env_kwargs, num_prizes=num_prizes, params=params)
+
+        self._num_envs = num_envs
+        self._observation_size = get_observation_size(num_prizes)
+
+        # Split the environments into contiguous slices, one per worker.
+        # Spawned rather than forked, the game has threads running already
+        context = multiprocessing.get_context('spawn')
+        bounds = np.linspace(0, num_envs, num_processes + 1).astype(int)
+        self._slices = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self._connections: List[multiprocessing.connection.Connection] = []
+        self._processes: List[multiprocessing.Process] = []
+        for s in self._slices:
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=_run_worker,
+                args=(worker_connection, list(range(seed + s.start, seed + s.stop)), env_kwargs),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    @property
+    def num_envs(self) -> int:
+        """Gets the number of environments.
+        """
+        return self._num_envs
+
+    @property
+    def observation_size(self) -> int:
+        """Gets the length of each environment's observation.
+        """
+        return self._observation_size
+
+    def reset(self, seed: int=None) -> np.ndarray:
+        """Starts a new episode in every environment.
+
+        Args:
+            seed (int): the random seed of the first environment, with
+                environment `i` getting `seed + i`, or `None` to carry
+                on with the current random numbers.
+
+        Returns:
+            The first observations as an array (num_envs, observation_size).
+        """
+        for connection, s in zip(self._connections, self._slices):
+            seeds = [None if seed is None else seed + i for i in range(s.start, s.stop)]
+            connection.send(('reset', seeds))
+        return np.stack([
+            observation
+            for connection in self._connections
+            for observation in connection.recv()
+        ])
+
+    def step(self, actions: Sequence[int]) -> VectorStepResult:
+        """Steps every environment with its own action.
+
+        Args:
+            actions (Sequence[int]): one action per environment.
+
+        Returns:
+            What happened, as a `VectorStepResult`.
+        """
+        actions = np.asarray(actions).tolist()
+        if len(actions) != self._num_envs:
+            raise ValueError(f'Expected {self._num_envs} actions, got {len(actions)}')
+
+        # Send everything first, so the workers all step at the same time
+        for connection, s in zip(self._connections, self._slices):
+            connection.send(('step', actions[s]))
+        results = [result for connection in self._connections for result in connection.recv()]
+
+        return VectorStepResult(
+            np.stack([result.observation for result in results]),
+            np.array([result.reward for result in results], dtype=np.float32),
+            np.array([result.done for result in results], dtype=bool),
+            [result.info for result in results],
+        )
+
+    def close(self):
+        """Stops the worker processes.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self) -> 'VectorCraneEnv':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -7,6 +7,7 @@ setup(
     author='mtmk',
     install_requires=[
         'pygame',
-        'box2d'
+        'box2d',
+        'numpy',
     ],
 )
\ No newline at end of file
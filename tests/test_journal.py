@@ -0,0 +1,21 @@
+"""Checks that the journal survives a crash halfway through a line."""
+import json
+
+from crane.game.resources.journal import replay
+
+
+def test_replay_cuts_off_torn_line(tmp_path):
+    path = tmp_path / 'config.journal'
+    path.write_text(json.dumps({'type': 'spend', 'amount': 1, 'seq': 1}) + '\n{"type": "sp')
+
+    config = {}
+    assert replay(config, path) == 1
+    assert config['spent'] == 1
+
+    # Events written after the restart have to be readable
+    with open(path, 'a') as f:
+        f.write(json.dumps({'type': 'spend', 'amount': 2, 'seq': 2}) + '\n')
+
+    config = {}
+    assert replay(config, path) == 2
+    assert config['spent'] == 3
@@ -0,0 +1,19 @@
+"""Checks that saved stats load back in."""
+from crane.game.resources import get_catalog
+from crane.game.resources.stats import PrizeStats
+
+
+def test_load_config_with_prizes():
+    names = get_catalog().names
+    config = {'prizes': {names[0]: 2, names[1]: 0, 'no longer in the catalog': 1}, 'spent': 1.5}
+    stats = PrizeStats(config, get_catalog())
+
+    assert stats.total_prizes == 3
+    assert stats.unique_prizes == 2
+
+
+def test_load_empty_config():
+    stats = PrizeStats({}, get_catalog())
+
+    assert stats.total_prizes == 0
+    assert stats.unique_prizes == 0